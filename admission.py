@@ -0,0 +1,91 @@
+# admission.py
+# Admission control around the model calls. Each model has a gate with a fixed number of
+# concurrent calls and a short, bounded wait queue. A caller that cannot get a slot before
+# its deadline gets ModelBusy straight away instead of parking a web worker behind the
+# model, so logins and other non-AI pages keep their threads during a submission burst.
+#
+#   SENTIMENT_CONCURRENCY / SENTIMENT_QUEUE / SENTIMENT_WAIT_SECONDS   (default 2 / 8 / 1.5)
+#   SUMMARY_CONCURRENCY   / SUMMARY_QUEUE   / SUMMARY_WAIT_SECONDS     (default 1 / 2 / 3)
+#   MODEL_RETRY_SECONDS   when a turned-away summary stream should try again (default 15)
+#
+# Admitted / queued / rejected counts and current slot usage are exported on /metrics.
+import os
+import time
+import functools
+import threading
+from contextlib import contextmanager
+
+from instrumentation import MODEL_ADMISSIONS, MODEL_SLOTS, record
+
+class ModelBusy(Exception):
+    pass
+
+class Gate:
+    def __init__(self, name, concurrency, queue_size, wait_seconds):
+        self.name = name
+        self.concurrency, self.queue_size, self.wait_seconds = concurrency, queue_size, wait_seconds
+        self.active = self.waiting = 0
+        self.cond = threading.Condition()
+        MODEL_SLOTS.track(lambda: self.active, name, "active")
+        MODEL_SLOTS.track(lambda: self.waiting, name, "waiting")
+
+    def has_capacity(self):
+        return self.active < self.concurrency and not self.waiting
+
+    def acquire(self, wait=None):
+        """Take a slot, waiting at most `wait` seconds in the queue; raises ModelBusy otherwise."""
+        wait = self.wait_seconds if wait is None else wait
+        start = time.perf_counter()
+        with self.cond:
+            # Newcomers do not overtake callers already queued
+            if self.has_capacity():
+                self.active += 1
+                MODEL_ADMISSIONS.inc(self.name, "admitted")
+                return
+            if self.waiting >= self.queue_size or wait <= 0:
+                MODEL_ADMISSIONS.inc(self.name, "rejected_full")
+                raise ModelBusy(self.name)
+            self.waiting += 1
+            MODEL_ADMISSIONS.inc(self.name, "queued")
+            try:
+                admitted = self.cond.wait_for(lambda: self.active < self.concurrency, timeout=wait)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                MODEL_ADMISSIONS.inc(self.name, "rejected_timeout")
+                raise ModelBusy(self.name)
+            self.active += 1
+            MODEL_ADMISSIONS.inc(self.name, "admitted")
+        record(f"{self.name}_queue", time.perf_counter() - start)
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify()
+
+    @contextmanager
+    def admit(self, wait=None):
+        self.acquire(wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def guard(self, fn):
+        """Wrap a blocking model call so it runs only with a slot."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.admit():
+                return fn(*args, **kwargs)
+        return wrapper
+
+def gate_from_env(name, concurrency, queue_size, wait_seconds):
+    prefix = name.upper()
+    return Gate(name,
+                int(os.environ.get(f"{prefix}_CONCURRENCY", str(concurrency))),
+                int(os.environ.get(f"{prefix}_QUEUE", str(queue_size))),
+                float(os.environ.get(f"{prefix}_WAIT_SECONDS", str(wait_seconds))))
+
+SENTIMENT_GATE = gate_from_env("sentiment", 2, 8, 1.5)
+SUMMARY_GATE = gate_from_env("summary", 1, 2, 3)
+RETRY_SECONDS = int(os.environ.get("MODEL_RETRY_SECONDS", "15"))
@@ -1,26 +1,51 @@
 import os
+import json
 import uuid
-import sqlite3
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+from contextlib import closing
+from datetime import datetime, timezone
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash, stream_with_context
+from functools import lru_cache
 
 # Custom Modules
-from db import get_connection, init_db
-from summarizer import generate_final_summary
+from db import get_connection, init_db, save_form_summary, list_shards, wallclock_ts, college_exists, IntegrityError, DB_SHARDED, COLLEGE_CODE
+from passwords import hash_password, verify_password, PasswordBusy
+from summarizer import stream_final_summary
+from instrumentation import init_instrumentation, instrument_connection, timed
+from assets import init_assets
+from group_commit import response_writer, CommitPending
+from roster import queue_job, job_status
+from trends import trend_series, SCOPES
+from admission import SENTIMENT_GATE, SUMMARY_GATE, ModelBusy, RETRY_SECONDS
+import backlog
+import inference
+import warehouse
 
 # Try to import sentiment model, else use placeholder
 try:
-    from model_utils import predict_sentiment
+    from model_utils import predict_sentiment_scored, classify
 except ImportError:
-    def predict_sentiment(text): return "Neutral"
+    def predict_sentiment_scored(text): return "Neutral", None, None
+    classify = None
+
+# --- HOT-PATH INSTRUMENTATION ---
+get_connection = instrument_connection(get_connection)
+# Model calls only run with a gate slot; queue time is charged to sentiment_queue, not sentiment
+score_sentiment = timed("sentiment")(predict_sentiment_scored)
+predict_sentiment_scored = SENTIMENT_GATE.guard(score_sentiment)
+stream_final_summary = timed("summary")(stream_final_summary)
+submit_response = timed("db")(response_writer.submit)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "master-overwatch-key-998877")
+init_instrumentation(app)
+init_assets(app)
 
 # --- INITIALIZE DATABASE ---
 with app.app_context():
     init_db()
+# The backlog takes the gate itself, so it gets the ungated scorer
+backlog_classify = classify or (lambda texts: [score_sentiment(t) for t in texts])
+backlog.start(backlog_classify)
 
 # --- SECURITY UTILS ---
 def login_required(role=None):
@@ -33,10 +58,114 @@ def login_required(role=None):
         return False
     return True
 
+# --- PROFILE COMPLETION ---
+def profile_completion(fields):
+    # Stored on students.profile_completion whenever the profile changes
+    return int((sum(1 for f in fields if f and str(f).strip()) / 6) * 100)
+
+# --- APPROVALS ---
+PENDING_PAGE_SIZE = int(os.environ.get("PENDING_PAGE_SIZE", "50"))
+ID_CHUNK = 500  # stays under SQLite's bound-parameter limit
+
+def pending_filter(college_code, role=None, q=None):
+    sql = """
+        FROM users u LEFT JOIN teachers t ON u.id = t.user_id LEFT JOIN students s ON u.id = s.user_id
+        WHERE u.status = 'pending' AND u.college_code = ?
+    """
+    params = [college_code]
+    if role in ("teacher", "student"):
+        sql += " AND u.role = ?"
+        params.append(role)
+    if q:
+        sql += " AND (u.email LIKE ? OR COALESCE(t.full_name, s.full_name) LIKE ? OR s.prn_number LIKE ?)"
+        params += [f"%{q}%"] * 3
+    return sql, params
+
+def pending_page(cur, college_code, page, role=None, q=None):
+    sql, params = pending_filter(college_code, role, q)
+    total = cur.execute("SELECT COUNT(*) " + sql, params).fetchone()[0]
+    pages = max(1, -(-total // PENDING_PAGE_SIZE))
+    page = min(max(page, 1), pages)
+    rows = cur.execute(f"""
+        SELECT u.id, COALESCE(t.full_name, s.full_name) as name, u.email, u.role, s.prn_number {sql}
+        ORDER BY u.id LIMIT ? OFFSET ?
+    """, params + [PENDING_PAGE_SIZE, (page - 1) * PENDING_PAGE_SIZE]).fetchall()
+    return rows, {"page": page, "pages": pages, "total": total, "role": role or "", "q": q or ""}
+
+def approval_targets(conn, payload, college_code, role=None):
+    """Pending users an approval request applies to: the posted user_ids, or every match of the filter."""
+    if (payload.get("scope") or "selected") == "all":
+        sql, params = pending_filter(college_code, role or payload.get("role"), payload.get("q"))
+        return conn.execute("SELECT u.id, u.role " + sql, params).fetchall()
+
+    ids = payload.get("user_ids") if request.is_json else request.form.getlist("user_ids") or request.form.getlist("user_id")
+    ids = [int(i) for i in (ids or []) if str(i).isdigit()]
+    targets = []
+    for start in range(0, len(ids), ID_CHUNK):
+        chunk = ids[start:start + ID_CHUNK]
+        sql = f"SELECT id, role FROM users WHERE status = 'pending' AND college_code = ? AND id IN ({', '.join('?' * len(chunk))})"
+        params = [college_code, *chunk]
+        if role:
+            sql += " AND role = ?"
+            params.append(role)
+        targets += conn.execute(sql, params).fetchall()
+    return targets
+
+def apply_approvals(conn, targets, action, college_code):
+    # Status changes and their audit rows commit together
+    status = "approved" if action == "approve" else "rejected"
+    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    conn.executemany("UPDATE users SET status = ? WHERE id = ? AND status = 'pending'",
+                     [(status, t[0]) for t in targets])
+    conn.executemany("""
+        INSERT INTO approval_logs (acted_by_user_id, target_user_id, college_code, action, role, action_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(session["user_id"], t[0], college_code, status, t[1], now) for t in targets])
+    conn.commit()
+    return status
+
+def handle_approvals(role=None):
+    cc = session["college_code"]
+    payload = request.get_json(silent=True) or request.form
+    conn = get_connection(cc)
+    try:
+        targets = approval_targets(conn, payload, cc, role)
+        status = apply_approvals(conn, targets, payload.get("action"), cc)
+    finally:
+        conn.close()
+    if request.is_json:
+        return {"status": status, "count": len(targets)}
+    if len(targets) > 1:
+        flash(f"{len(targets)} nodes {status}.", "success")
+    return None
+
+# --- STORAGE ROUTING ---
+def form_connection(form_id, role, college_code):
+    # Superadmins can open any college's form, so find the shard that holds it
+    if role == "superadmin":
+        for shard in list_shards():
+            conn = get_connection(shard)
+            if conn.execute("SELECT 1 FROM feedback_forms WHERE id = ?", (form_id,)).fetchone():
+                return conn
+            conn.close()
+    return get_connection(college_code)
+
 # --- CACHE CONTROL ---
 @app.after_request
 def add_header(response):
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    # Static files and fingerprinted assets carry their own policy
+    if "Cache-Control" in response.headers:
+        return response
+    if "user_id" in session and response.mimetype == "text/html":
+        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+        return response
+    # Everything else may be kept but is revalidated on each use; unchanged bodies come back as 304
+    response.cache_control.no_cache = True
+    if "user_id" in session:
+        response.cache_control.private = True
+    if request.method == "GET" and response.status_code == 200 and not response.is_streamed:
+        response.add_etag(weak=True)
+        response.make_conditional(request)
     return response
 
 # --- PUBLIC ROUTES ---
@@ -53,16 +182,20 @@ def signup():
 
 @app.route("/register", methods=["POST"])
 def register():
-    conn = get_connection()
-    cur = conn.cursor()
     name = request.form.get("name")
     email = request.form.get("email")
     prn = request.form.get("student_id")
     password = request.form.get("password")
     college_code = request.form.get("college_code")
     role = request.form.get("role", "student")
+    # Checked against the catalog before anything (including a college shard) is opened
+    if not college_exists(college_code):
+        flash("Unknown college code. Ask your college administrator for the correct one.", "error")
+        return redirect(url_for("signup"))
+    conn = get_connection(college_code)
+    cur = conn.cursor()
 
-    hashed_pw = generate_password_hash(password)
+    hashed_pw = hash_password(password)
 
     try:
         cur.execute("""
@@ -79,7 +212,7 @@ def register():
         conn.commit()
         flash("Registration successful. Pending admin approval.", "success")
         return redirect(url_for("login"))
-    except sqlite3.IntegrityError:
+    except IntegrityError:
         flash("Email or ID already exists.", "error")
     finally:
         conn.close()
@@ -95,13 +228,15 @@ def login():
         password = request.form.get("password")
         selected_role = request.form.get("role") 
         
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM users WHERE email = ?", (email,))
-        user = cur.fetchone()
-        conn.close()
+        user, profile_id = fetch_login_user(email)
+
+        try:
+            valid, stale_hash = verify_password(user["password"], password) if user else (False, False)
+        except PasswordBusy:
+            flash("Login service is busy. Please retry in a moment.", "warning")
+            return redirect(url_for("login"))
 
-        if user and check_password_hash(user["password"], password):
+        if valid:
             # --- THE MASTER BYPASS LOGIC ---
             is_superadmin = (user["role"] == "superadmin")
             if not is_superadmin and user["role"] != selected_role:
@@ -111,6 +246,13 @@ def login():
             if user["status"] != "approved":
                 flash("Account pending approval.", "warning")
                 return redirect(url_for("login"))
+
+            # Transparent upgrade to the configured hash scheme
+            if stale_hash:
+                conn = get_connection()
+                conn.execute("UPDATE users SET password = ? WHERE id = ?", (hash_password(password), user["id"]))
+                conn.commit()
+                conn.close()
             
             session.clear()
             session["user_id"] = user["id"]
@@ -118,44 +260,103 @@ def login():
             session["college_code"] = user["college_code"]
             
             if user["role"] in ["student", "teacher"]:
-                conn = get_connection()
-                cur = conn.cursor()
-                table = "students" if user["role"] == "student" else "teachers"
-                cur.execute(f"SELECT id FROM {table} WHERE user_id = ?", (user["id"],))
-                profile = cur.fetchone()
-                session["profile_id"] = profile["id"] if profile else None
-                conn.close()
+                session["profile_id"] = profile_id
 
             return redirect(url_for(f"{user['role']}_dashboard"))
         
         flash("Invalid email or password.", "error")
     return render_template("login.html")
 
+# --- AUTH FAST PATH ---
+LOGIN_QUERY = """
+    SELECT u.id, u.password, u.role, u.status, u.college_code, COALESCE(s.id, t.id) AS profile_id
+    FROM users u
+    LEFT JOIN students s ON s.user_id = u.id
+    LEFT JOIN teachers t ON t.user_id = u.id
+    WHERE u.email = ?
+"""
+
+def fetch_login_user(email):
+    # User and profile id in one query; sharded catalogs have no profile tables,
+    # so there the profile id comes from a cached per-shard lookup instead
+    conn = get_connection()
+    if not DB_SHARDED:
+        user = conn.execute(LOGIN_QUERY, (email,)).fetchone()
+        conn.close()
+        return user, (user["profile_id"] if user else None)
+
+    user = conn.execute("SELECT id, password, role, status, college_code FROM users WHERE email = ?", (email,)).fetchone()
+    conn.close()
+    if not user or user["role"] not in ("student", "teacher"):
+        return user, None
+    return user, lookup_profile_id(user["id"], user["role"], user["college_code"])
+
+@lru_cache(maxsize=65536)
+def lookup_profile_id(user_id, role, college_code):
+    conn = get_connection(college_code)
+    table = "students" if role == "student" else "teachers"
+    profile = conn.execute(f"SELECT id FROM {table} WHERE user_id = ?", (user_id,)).fetchone()
+    conn.close()
+    return profile["id"] if profile else None
+
 # --- SUPERADMIN SECTION ---
 
 @app.route("/superadmin/dashboard")
 def superadmin_dashboard():
     if not login_required("superadmin"): return redirect(url_for("login"))
+    # Totals come from the analytics snapshot (warehouse.py); live counts only until its first refresh
+    stats = analytics_overview()
+    live_counts = stats is None
     conn = get_connection()
     cur = conn.cursor()
-    stats = {
-        "total_colleges": cur.execute("SELECT COUNT(DISTINCT college_code) FROM users WHERE college_code != 'GLOBAL'").fetchone()[0],
-        "total_users": cur.execute("SELECT COUNT(*) FROM users").fetchone()[0],
-        "total_feedback": cur.execute("SELECT COUNT(*) FROM feedback_responses").fetchone()[0]
-    }
+    if live_counts:
+        stats = {
+            "total_colleges": cur.execute("SELECT COUNT(DISTINCT college_code) FROM users WHERE college_code != 'GLOBAL'").fetchone()[0],
+            "total_users": cur.execute("SELECT COUNT(*) FROM users").fetchone()[0],
+            "total_feedback": 0,
+            "snapshot_at": None,
+        }
     cur.execute("SELECT id, email, college_code, status, created_at FROM users WHERE role='admin'")
     admins = cur.fetchall()
-    cur.execute("SELECT feedback, sentiment, college_code, submitted_at FROM feedback_responses ORDER BY id DESC LIMIT 10")
-    recent_feedback = cur.fetchall()
     conn.close()
+
+    # Feedback lives in the college shards: fan out and merge (indexed, newest 10 per shard)
+    recent_feedback = []
+    for college_code in list_shards():
+        conn = get_connection(college_code)
+        cur = conn.cursor()
+        if live_counts:
+            stats["total_feedback"] += cur.execute("SELECT COUNT(*) FROM feedback_responses").fetchone()[0]
+        cur.execute("SELECT feedback, sentiment, college_code, submitted_at FROM feedback_responses ORDER BY id DESC LIMIT 10")
+        recent_feedback.extend(cur.fetchall())
+        conn.close()
+    recent_feedback = sorted(recent_feedback, key=lambda r: r["submitted_at"] or "", reverse=True)[:10]
     return render_template("superadmin.html", stats=stats, admins=admins, recent_feedback=recent_feedback)
 
+def analytics_overview():
+    try:
+        con = warehouse.connect()
+    except ImportError:
+        return None
+    if con is None:
+        return None
+    try:
+        stats = warehouse.overview(con)
+    finally:
+        con.close()
+    # Snapshot times are wall-clock seconds (db.wallclock_ts), so format them as UTC
+    stats["snapshot_label"] = datetime.fromtimestamp(stats["snapshot_at"], timezone.utc).strftime("%Y-%m-%d %H:%M")
+    return stats
+
 @app.route("/superadmin/add_admin", methods=["POST"])
 def superadmin_add_admin():
     if not login_required("superadmin"): return redirect(url_for("login"))
     email = request.form.get("email")
-    password = generate_password_hash(request.form.get("password"))
-    college_code = request.form.get("college_code")
+    password = hash_password(request.form.get("password"))
+    college_code = request.form.get("college_code") or ""
+    if not COLLEGE_CODE.fullmatch(college_code):
+        flash("College codes may only use letters, digits, '-' and '_' (up to 32 characters).", "error")
+        return redirect(url_for("superadmin_dashboard"))
     conn = get_connection()
     cur = conn.cursor()
     try:
@@ -172,7 +373,7 @@ def superadmin_add_admin():
 @app.route("/admin/dashboard")
 def admin_dashboard():
     if not login_required("admin"): return redirect(url_for("login"))
-    conn = get_connection()
+    conn = get_connection(session["college_code"])
     cur = conn.cursor()
     cc = session["college_code"]
     
@@ -183,11 +384,8 @@ def admin_dashboard():
         "responses": cur.execute("SELECT COUNT(*) FROM feedback_responses WHERE college_code=?", (cc,)).fetchone()[0]
     }
     
-    pending = cur.execute("""
-        SELECT u.id, COALESCE(t.full_name, s.full_name) as name, u.email, u.role 
-        FROM users u LEFT JOIN teachers t ON u.id = t.user_id LEFT JOIN students s ON u.id = s.user_id 
-        WHERE u.status = 'pending' AND u.college_code = ?
-    """, (cc,)).fetchall()
+    pending, pending_pager = pending_page(cur, cc, request.args.get("page", 1, type=int),
+                                          request.args.get("role"), request.args.get("q"))
     
     teachers = cur.execute("""
         SELECT t.user_id, t.full_name as name, t.department 
@@ -205,20 +403,24 @@ def admin_dashboard():
         SELECT f.id, f.title, f.created_at, COUNT(r.id), t.full_name 
         FROM feedback_forms f JOIN teachers t ON f.teacher_id = t.id 
         LEFT JOIN feedback_responses r ON f.id = r.form_id 
-        WHERE f.college_code = ? GROUP BY f.id
+        WHERE f.college_code = ? GROUP BY f.id, t.full_name
     """, (cc,)).fetchall()
     
     conn.close()
-    return render_template("admin_dashboard.html", stats=stats, pending_users=pending, 
+    return render_template("admin_dashboard.html", stats=stats, pending_users=pending, pending_pager=pending_pager,
                            all_teachers=teachers, all_students=all_students, all_forms=forms)
 
 @app.route("/admin/delete_user", methods=["POST"])
 def admin_delete_user():
     if not login_required("admin"): return redirect(url_for("login"))
     user_id = request.form.get("user_id")
-    conn = get_connection()
+    conn = get_connection(session["college_code"])
     cur = conn.cursor()
     cur.execute("DELETE FROM users WHERE id = ? AND college_code = ?", (user_id, session["college_code"]))
+    # Shards have no FK to the catalog, so profile rows are removed explicitly
+    if cur.rowcount:
+        cur.execute("DELETE FROM students WHERE user_id = ?", (user_id,))
+        cur.execute("DELETE FROM teachers WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
     flash("Node purged from network.", "success")
@@ -231,19 +433,20 @@ def admin_delete_teacher():
 @app.route("/admin/approve_user", methods=["POST"])
 def admin_approve_user():
     if not login_required("admin"): return redirect(url_for("login"))
-    status = "approved" if request.form.get("action") == "approve" else "rejected"
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("UPDATE users SET status = ? WHERE id = ? AND college_code = ?", (status, request.form.get("user_id"), session["college_code"]))
-    conn.commit()
-    conn.close()
+    handle_approvals()
     return redirect(url_for("admin_dashboard"))
 
+@app.route("/admin/approve_users", methods=["POST"])
+def admin_approve_users():
+    if not login_required("admin"): return redirect(url_for("login"))
+    result = handle_approvals()
+    return result or redirect(url_for("admin_dashboard", **request.args))
+
 @app.route("/admin/add_teacher", methods=["POST"])
 def admin_add_teacher():
     if not login_required("admin"): return redirect(url_for("login"))
-    hashed_pw = generate_password_hash(request.form.get("password"))
-    conn = get_connection()
+    hashed_pw = hash_password(request.form.get("password"))
+    conn = get_connection(session["college_code"])
     cur = conn.cursor()
     try:
         cur.execute("INSERT INTO users (email, password, role, status, college_code, created_at) VALUES (?, ?, 'teacher', 'approved', ?, ?)",
@@ -256,20 +459,40 @@ def admin_add_teacher():
     finally: conn.close()
     return redirect(url_for("admin_dashboard"))
 
+@app.route("/admin/import_roster", methods=["POST"])
+def admin_import_roster():
+    if not login_required("admin"): return redirect(url_for("login"))
+    upload = request.files.get("roster")
+    if not upload or not upload.filename:
+        flash("Select a roster CSV to import.", "error")
+        return redirect(url_for("admin_dashboard"))
+    # The import runs in its own process (roster.py --job); this request only queues it
+    job_id = queue_job(upload.stream, session["college_code"], request.form.get("role") or None)
+    if request.accept_mimetypes.best == "application/json":
+        return {"job_id": job_id, "status": "queued",
+                "status_url": url_for("admin_import_roster_status", job_id=job_id)}, 202
+    flash(f"Roster import queued as job {job_id}. Imported accounts appear once it finishes.", "success")
+    return redirect(url_for("admin_dashboard"))
+
+@app.route("/admin/import_roster/<job_id>")
+def admin_import_roster_status(job_id):
+    if not login_required("admin"): return {"error": "forbidden"}, 403
+    status = job_status(job_id)
+    if not status or status["college_code"] != session["college_code"]:
+        return {"error": "unknown job"}, 404
+    return {"job_id": job_id, **status}
+
 # --- TEACHER SECTION ---
 
 @app.route("/teacher/dashboard")
 def teacher_dashboard():
     if not login_required("teacher"): return redirect(url_for("login"))
-    conn = get_connection()
+    conn = get_connection(session["college_code"])
     cur = conn.cursor()
     cur.execute("SELECT * FROM teachers WHERE user_id = ?", (session["user_id"],))
     teacher = cur.fetchone()
-    pending = cur.execute("""
-        SELECT u.id, s.full_name, s.prn_number FROM users u 
-        JOIN students s ON u.id = s.user_id 
-        WHERE u.status = 'pending' AND u.college_code = ?
-    """, (session["college_code"],)).fetchall()
+    pending, pending_pager = pending_page(cur, session["college_code"], request.args.get("page", 1, type=int),
+                                          "student", request.args.get("q"))
     my_students = cur.execute("""
         SELECT full_name, prn_number, mobile_no FROM students 
         WHERE college_code = ? AND user_id IN (SELECT id FROM users WHERE status='approved')
@@ -280,14 +503,15 @@ def teacher_dashboard():
         WHERE f.teacher_id = ? GROUP BY f.id
     """, (session["profile_id"],)).fetchall()
     conn.close()
-    return render_template("teacher_dashboard.html", teacher=teacher, pending_students=pending, my_students=my_students, forms=forms)
+    return render_template("teacher_dashboard.html", teacher=teacher, pending_students=pending, pending_pager=pending_pager,
+                           my_students=my_students, forms=forms)
 
 @app.route("/teacher/create_form", methods=["POST"])
 def create_form():
     if not login_required("teacher"): return redirect(url_for("login"))
     title = request.form.get("title")
     if title:
-        conn = get_connection()
+        conn = get_connection(session["college_code"])
         cur = conn.cursor()
         f_id = str(uuid.uuid4())[:8]
         cur.execute("INSERT INTO feedback_forms (id, title, college_code, created_at, teacher_id) VALUES (?, ?, ?, ?, ?)",
@@ -300,49 +524,78 @@ def create_form():
 @app.route("/approve_student", methods=["POST"])
 def approve_student():
     if not login_required("teacher"): return redirect(url_for("login"))
-    u_id = request.form.get("user_id")
-    status = "approved" if request.form.get("action") == "approve" else "rejected"
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("UPDATE users SET status = ? WHERE id = ? AND college_code = ?", (status, u_id, session["college_code"]))
-    conn.commit()
-    conn.close()
+    handle_approvals(role="student")
     return redirect(url_for("teacher_dashboard"))
 
+@app.route("/approve_students", methods=["POST"])
+def approve_students():
+    if not login_required("teacher"): return redirect(url_for("login"))
+    result = handle_approvals(role="student")
+    return result or redirect(url_for("teacher_dashboard", **request.args))
+
 # --- STUDENT SECTION ---
 
 @app.route("/student/dashboard", methods=["GET", "POST"])
 def student_dashboard():
     if not login_required("student"): return redirect(url_for("login"))
-    conn = get_connection()
+    conn = get_connection(session["college_code"])
     cur = conn.cursor()
     if request.method == "POST":
         action = request.form.get("action")
         if action == "update_profile":
+            fields = [request.form.get(k) for k in ("mobile", "dept", "class", "year", "teacher", "hod")]
             cur.execute("""
                 UPDATE students SET mobile_no=?, department=?, class_name=?, 
-                academic_year=?, teacher_name=?, hod_name=? WHERE user_id=?
-            """, (request.form.get("mobile"), request.form.get("dept"), request.form.get("class"),
-                  request.form.get("year"), request.form.get("teacher"), request.form.get("hod"), session["user_id"]))
+                academic_year=?, teacher_name=?, hod_name=?, profile_completion=? WHERE user_id=?
+            """, (*fields, profile_completion(fields), session["user_id"]))
             conn.commit()
             flash("Metadata synchronized.", "success")
         elif action == "submit_feedback":
             fb = request.form.get("feedback")
-            cur.execute("""
-                INSERT INTO feedback_responses (form_id, student_id, college_code, feedback, sentiment, submitted_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (request.form.get("form_id"), session["profile_id"], session["college_code"], 
-                  fb, predict_sentiment(fb), datetime.now().strftime("%Y-%m-%d %H:%M")))
-            conn.commit()
-            flash("Signal transmitted.", "success")
+            form_id = request.form.get("form_id")
+            # Cheap check before inference; the unique (form_id, student_id) index settles races
+            if cur.execute("SELECT 1 FROM feedback_responses WHERE form_id = ? AND student_id = ?",
+                           (form_id, session["profile_id"])).fetchone():
+                flash("Feedback already submitted for this session.", "warning")
+            else:
+                try:
+                    try:
+                        # Under asgi.py the text was already scored on the inference pool
+                        sentiment, confidence, model_version = inference.prescored(fb) or predict_sentiment_scored(fb)
+                    except ModelBusy:
+                        # Saturated: keep the submission and let the backlog thread score it
+                        sentiment = confidence = model_version = None
+                    # Group commit: the writer thread batches concurrent submissions into one transaction
+                    now = datetime.now()
+                    submit_response(session["college_code"], """
+                        INSERT INTO feedback_responses (form_id, student_id, college_code, feedback, sentiment, sentiment_confidence,
+                                                        model_version, submitted_at, submitted_ts)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (form_id, session["profile_id"], session["college_code"], 
+                          fb, sentiment, confidence, model_version, now.strftime("%Y-%m-%d %H:%M"), wallclock_ts(now)))
+                    flash("Signal transmitted." if sentiment else "Signal transmitted. Sentiment analysis is queued.", "success")
+                except CommitPending:
+                    # Not confirmed yet, but not lost either: the writer still holds it
+                    flash("Signal received and queued for storage.", "success")
+                except IntegrityError:
+                    flash("Feedback already submitted for this session.", "warning")
 
     cur.execute("SELECT * FROM students WHERE user_id = ?", (session["user_id"],))
     student = cur.fetchone()
-    fields = [student['mobile_no'], student['department'], student['class_name'], student['academic_year'], student['teacher_name'], student['hod_name']]
-    progress = int((sum(1 for f in fields if f and str(f).strip()) / 6) * 100)
-    forms = cur.execute("SELECT id, title FROM feedback_forms WHERE college_code = ?", (session["college_code"],)).fetchall()
+    progress = student["profile_completion"] or 0
+    # Only forms this student has not answered yet (anti-join on the unique response index)
+    forms = cur.execute("""
+        SELECT f.id, f.title FROM feedback_forms f
+        WHERE f.college_code = ? AND NOT EXISTS (
+            SELECT 1 FROM feedback_responses r WHERE r.form_id = f.id AND r.student_id = ?
+        )
+        ORDER BY f.created_at DESC
+    """, (session["college_code"], session["profile_id"])).fetchall()
+    answered_count = cur.execute("SELECT COUNT(*) FROM feedback_responses WHERE student_id = ?",
+                                 (session["profile_id"],)).fetchone()[0]
     conn.close()
-    return render_template("student_dashboard.html", student=student, progress=progress, forms=forms)
+    return render_template("student_dashboard.html", student=student, progress=progress, forms=forms,
+                           answered_count=answered_count)
 
 # --- ANALYTICS (AI CACHING ENABLED) ---
 
@@ -350,7 +603,7 @@ def student_dashboard():
 def view_analytics(form_id):
     if "user_id" not in session: return redirect(url_for("login"))
     
-    conn = get_connection()
+    conn = form_connection(form_id, session.get("role"), session.get("college_code"))
     cur = conn.cursor()
     
     # 1. Fetch Form & Cached Summary
@@ -365,24 +618,157 @@ def view_analytics(form_id):
     cur.execute("SELECT feedback, sentiment FROM feedback_responses WHERE form_id = ?", (form_id,))
     responses = cur.fetchall()
     
+    # Topic/sentiment breakdown, maintained offline by topics.py
+    topics = cur.execute("""
+        SELECT topic, positive, neutral, negative, total FROM form_topics
+        WHERE form_id = ? AND total > 0 ORDER BY total DESC
+    """, (form_id,)).fetchall()
+
     # 3. Intelligent AI Summary Caching
+    # Uncached summaries are no longer generated inline: the page renders
+    # immediately and streams the summary from /analytics/<form_id>/stream.
     ai_report = form['ai_summary']
+    stream_summary = not ai_report and len(responses) > 0
     
-    if not ai_report and len(responses) > 0:
-        # Convert DB result to plain list for summarizer
-        feedback_list = [r['feedback'] for r in responses]
-        
-        # Slow part (only once)
-        ai_report = generate_final_summary(feedback_list)
-        
-        # Cache the result
-        cur.execute("UPDATE feedback_forms SET ai_summary = ? WHERE id = ?", (ai_report, form_id))
-        conn.commit()
-    elif not ai_report:
+    if not ai_report and not stream_summary:
         ai_report = "Insufficient feedback signals to generate intelligence summary."
 
     conn.close()
-    return render_template("analytics.html", title=form["title"], responses=responses, ai_summary=ai_report)
+    return render_template("analytics.html", title=form["title"], form_id=form_id, responses=responses,
+                           ai_summary=ai_report, stream_summary=stream_summary, topics=topics)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Shared with the native async stream handler in asgi.py
+def load_summary_job(form_id, role, college_code):
+    conn = form_connection(form_id, role, college_code)
+    cur = conn.cursor()
+    cur.execute("SELECT ai_summary, college_code FROM feedback_forms WHERE id = ?", (form_id,))
+    form = cur.fetchone()
+
+    if not form:
+        conn.close()
+        return None
+
+    job = {"cached": form["ai_summary"], "college_code": form["college_code"], "feedback": [], "last_response_id": 0}
+    if not job["cached"]:
+        cur.execute("SELECT id, feedback FROM feedback_responses WHERE form_id = ? ORDER BY id", (form_id,))
+        rows = cur.fetchall()
+        job["feedback"] = [r["feedback"] for r in rows]
+        job["last_response_id"] = rows[-1]["id"] if rows else 0
+    conn.close()
+    return job
+
+def store_summary(job, form_id, summary):
+    conn = get_connection(job["college_code"])
+    save_form_summary(conn, form_id, summary, job["last_response_id"])
+    conn.commit()
+    conn.close()
+
+@app.route("/analytics/<form_id>/stream")
+def stream_analytics_summary(form_id):
+    if "user_id" not in session: return redirect(url_for("login"))
+
+    job = load_summary_job(form_id, session.get("role"), session.get("college_code"))
+    if not job:
+        return "Not Found", 404
+
+    def generate():
+        if job["cached"]:
+            yield sse_event("done", job["cached"])
+            return
+
+        if not job["feedback"]:
+            yield sse_event("done", "Insufficient feedback signals to generate intelligence summary.")
+            return
+
+        try:
+            SUMMARY_GATE.acquire()
+        except ModelBusy:
+            # Summary model saturated: the page shows a queued state and reconnects later
+            yield sse_event("queued", RETRY_SECONDS)
+            return
+        try:
+            # closing(): on a client disconnect the backend stops generating before the slot is freed
+            with closing(stream_final_summary(job["feedback"], college_code=job["college_code"])) as events:
+                for event, data in events:
+                    if event == "done":
+                        # Cache the result before closing the stream
+                        store_summary(job, form_id, data)
+                    yield sse_event(event, data)
+        finally:
+            SUMMARY_GATE.release()
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# --- SENTIMENT TRENDS ---
+
+@app.route("/api/trends")
+def api_trends():
+    role = session.get("role")
+    if role not in ("superadmin", "admin", "teacher"): return {"error": "forbidden"}, 403
+    scope = request.args.get("scope", "college")
+    granularity = request.args.get("granularity", "day")
+    days = request.args.get("days", 7 if granularity == "hour" else 365, type=int)
+    # Superadmins pick the college; everyone else is pinned to their own (and teachers to their own forms)
+    college_code = request.args.get("college") if role == "superadmin" else session["college_code"]
+    teacher_id = session.get("profile_id") if role == "teacher" else None
+    scope_id = request.args.get("id") or (college_code if scope == "college" else teacher_id)
+    if scope not in SCOPES or not scope_id:
+        return {"error": "unknown scope"}, 400
+    # Validate before connecting: opening a shard for a code creates its file
+    if role == "superadmin" and (college_code or scope != "form"):
+        if not college_code or not COLLEGE_CODE.fullmatch(college_code):
+            return {"error": "invalid college code"}, 400
+        if not college_exists(college_code):
+            return {"error": "unknown college"}, 404
+
+    conn = None
+    try:
+        conn = form_connection(scope_id, role, college_code) if scope == "form" else get_connection(college_code)
+        since = wallclock_ts() - days * 86400
+        series = trend_series(conn, scope, scope_id, granularity, since, college_code, teacher_id)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    finally:
+        if conn is not None:
+            conn.close()
+    return {"scope": scope, "id": scope_id, "granularity": granularity, "series": series}
+
+# --- CROSS-COLLEGE REPORTS (analytics snapshot) ---
+
+@app.route("/api/reports/<report>")
+def api_reports(report):
+    if session.get("role") != "superadmin": return {"error": "forbidden"}, 403
+    try:
+        con = warehouse.connect()
+    except ImportError:
+        return {"error": "reporting needs the duckdb package"}, 503
+    if con is None:
+        return {"error": "no analytics snapshot yet; run warehouse.py"}, 503
+
+    days = request.args.get("days", 365, type=int)
+    since = wallclock_ts() - days * 86400
+    college_code = request.args.get("college") or None
+    try:
+        if report == "colleges":
+            rows = warehouse.college_breakdown(con, since)
+        elif report == "trend":
+            rows = warehouse.trend(con, request.args.get("granularity", "week"), since, college_code)
+        elif report == "top_forms":
+            rows = warehouse.top_forms(con, min(request.args.get("limit", 10, type=int), 100),
+                                       request.args.get("order", "responses"), college_code,
+                                       request.args.get("min_responses", 5, type=int))
+        else:
+            return {"error": "unknown report"}, 404
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    finally:
+        con.close()
+    return {"report": report, "snapshot_at": warehouse.snapshot_time(), "rows": rows}
 
 @app.route("/logout")
 def logout():
@@ -0,0 +1,185 @@
+# asgi.py
+# ASGI serving mode:  uvicorn asgi:application --host 0.0.0.0 --port 10000 --workers 2
+#
+# The Flask app runs on up to ASGI_THREADS threads, so a blocked SQLite call or page render
+# occupies a thread, not the worker. Model calls go through the async inference client: summary
+# streams are served natively async, and feedback submissions are scored on the inference pool
+# before the Flask view runs, so neither holds a request thread while a model works.
+import os
+import re
+import json
+import asyncio
+from contextlib import aclosing
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.http import parse_cookie
+
+from app import app, load_summary_job, store_summary
+from admission import SUMMARY_GATE, ModelBusy, RETRY_SECONDS
+import inference
+
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", "64"))
+# DB work of the native routes
+WSGI_EXECUTOR = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="wsgi")
+WSGI_APP = WsgiToAsgi(app)
+WSGI_SLOTS = asyncio.Semaphore(ASGI_THREADS)
+STREAM_ROUTE = re.compile(r"^/analytics/([^/]+)/stream$")
+SUBMIT_PATH = "/student/dashboard"
+PRESCORE_MAX_BYTES = 65536
+
+async def serve_wsgi(scope, receive, send):
+    # WsgiToAsgi runs every request on one shared thread unless it is inside a ThreadSensitiveContext,
+    # which gives the request a thread of its own; the semaphore bounds how many exist at once
+    async with WSGI_SLOTS:
+        async with ThreadSensitiveContext():
+            await WSGI_APP(scope, receive, send)
+
+# --- SESSION (same signed cookie Flask issues) ---
+def load_session(scope):
+    headers = dict(scope.get("headers", []))
+    cookies = parse_cookie(headers.get(b"cookie", b"").decode("latin1"))
+    value = cookies.get(app.config["SESSION_COOKIE_NAME"])
+    if not value:
+        return {}
+    serializer = app.session_interface.get_signing_serializer(app)
+    try:
+        return serializer.loads(value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except Exception:
+        return {}
+
+async def send_simple(send, status, body=b"", headers=()):
+    await send({"type": "http.response.start", "status": status, "headers": list(headers)})
+    await send({"type": "http.response.body", "body": body})
+
+async def send_event(send, event, data):
+    payload = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+    await send({"type": "http.response.body", "body": payload, "more_body": True})
+
+# --- FEEDBACK SUBMISSIONS: SCORED BEFORE THE VIEW ---
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+def replay(body, receive):
+    """A receive callable that hands the already-read body to the WSGI bridge."""
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive_again():
+        return pending.pop() if pending else await receive()
+    return receive_again
+
+async def prescore_submission(scope, receive):
+    """Score a student's feedback with inference.classify and leave the result in inference.PRESCORED.
+
+    Returns the receive callable to run the Flask view with, or None if the client went away.
+    """
+    headers = dict(scope.get("headers", []))
+    length = headers.get(b"content-length", b"")
+    # Anything else (uploads, other forms, other roles) goes to Flask untouched
+    if (not length.isdigit() or int(length) > PRESCORE_MAX_BYTES or load_session(scope).get("role") != "student"
+            or not headers.get(b"content-type", b"").startswith(b"application/x-www-form-urlencoded")):
+        return receive
+
+    body = await read_body(receive)
+    if body is None:
+        return None
+    form = parse_qs(body.decode("latin1"))
+    text = form.get("feedback", [""])[0]
+    if form.get("action", [""])[0] == "submit_feedback" and text:
+        inference.PRESCORED.set((text, await inference.classify(text)))
+    return replay(body, receive)
+
+# --- NATIVE ASYNC SUMMARY STREAM ---
+async def relay_summary(send, job, form_id):
+    loop = asyncio.get_running_loop()
+    # aclosing(): if this task is cancelled, it only ends once the producer and the model have stopped
+    async with aclosing(inference.stream_summary(job["feedback"], job["college_code"])) as events:
+        async for event, data in events:
+            if event == "done":
+                await loop.run_in_executor(WSGI_EXECUTOR, store_summary, job, form_id, data)
+            await send_event(send, event, data)
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+async def stream_summary(scope, receive, send, form_id):
+    session = load_session(scope)
+    if "user_id" not in session:
+        return await send_simple(send, 302, headers=[(b"location", b"/login")])
+
+    loop = asyncio.get_running_loop()
+    job = await loop.run_in_executor(WSGI_EXECUTOR, load_summary_job, form_id,
+                                     session.get("role"), session.get("college_code"))
+    if not job:
+        return await send_simple(send, 404, b"Not Found")
+
+    await send({"type": "http.response.start", "status": 200, "headers": [
+        (b"content-type", b"text/event-stream; charset=utf-8"),
+        (b"cache-control", b"no-cache"),
+        (b"x-accel-buffering", b"no"),
+    ]})
+
+    if job["cached"]:
+        await send_event(send, "done", job["cached"])
+    elif not job["feedback"]:
+        await send_event(send, "done", "Insufficient feedback signals to generate intelligence summary.")
+    else:
+        try:
+            # Same gate as the WSGI stream; the bounded wait happens on a pool thread, not the loop
+            await loop.run_in_executor(WSGI_EXECUTOR, SUMMARY_GATE.acquire)
+        except ModelBusy:
+            await send_event(send, "queued", RETRY_SECONDS)
+        else:
+            relay = asyncio.ensure_future(relay_summary(send, job, form_id))
+            # Released when the relay has finished, i.e. after generation stopped, however this handler exits
+            relay.add_done_callback(lambda _: SUMMARY_GATE.release())
+            disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+            try:
+                await asyncio.wait([relay, disconnect], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                disconnect.cancel()
+                if not relay.done():
+                    # Client gone: stop generating for it
+                    relay.cancel()
+                    await asyncio.wait([relay])
+            if relay.cancelled():
+                return
+            relay.result()
+
+    await send({"type": "http.response.body", "body": b""})
+
+# --- ENTRY POINT ---
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            WSGI_EXECUTOR.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+
+    match = STREAM_ROUTE.match(scope["path"])
+    if match and scope["method"] == "GET":
+        return await stream_summary(scope, receive, send, match.group(1))
+
+    if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == SUBMIT_PATH:
+        receive = await prescore_submission(scope, receive)
+        if receive is None:
+            return
+
+    await serve_wsgi(scope, receive, send)
@@ -0,0 +1,157 @@
+# assets.py
+# Fingerprinted static files and compressed responses.
+#
+#   static/css/login.css  ->  /assets/css/login.1c9e4f02ab7d.css
+#
+# The name carries a hash of the content, so a changed file gets a new URL and every URL can
+# be cached by browsers for a year (immutable). Templates link files with asset_url(). Each
+# file is written once, gzip- and (when the brotli module is installed) brotli-compressed,
+# under ASSETS_BUILD_DIR; requests pick the best stored encoding instead of compressing.
+# Dynamic HTML/JSON/CSS/JS/text responses are compressed on the way out.
+#
+#   ASSETS_BUILD_DIR     fingerprinted and precompressed copies (default data/assets)
+#   COMPRESS_MIN_BYTES   smaller dynamic responses are sent as-is (default 1024)
+#   COMPRESS_LEVEL       gzip level for dynamic responses (default 6)
+#
+#   python assets.py     rebuild ahead of a deploy (the app also builds on start)
+import os
+import sys
+import json
+import gzip
+import hashlib
+import mimetypes
+
+from flask import abort, request, send_from_directory, url_for
+
+BUILD_DIR = os.environ.get("ASSETS_BUILD_DIR", os.path.join("data", "assets"))
+MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+LEVEL = int(os.environ.get("COMPRESS_LEVEL", "6"))
+MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE = {"text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+                "application/javascript", "application/json", "image/svg+xml"}
+SUFFIX = {"br": ".br", "gzip": ".gz"}
+
+_manifest = {}  # static path -> fingerprinted path
+_encodings = {}  # fingerprinted path -> stored encodings, best first
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+def compress(data, encoding, level=LEVEL):
+    if encoding == "br":
+        # Quality 11 is for build time only; per-request brotli stays around gzip's cost
+        return _brotli().compress(data, quality=11 if level >= 9 else 5)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def best_encoding(accepted, available=("br", "gzip")):
+    for encoding in available:
+        if accepted[encoding] > 0 and (encoding != "br" or _brotli()):
+            return encoding
+    return None
+
+def fingerprint(path, data):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+def _write(path, data):
+    if os.path.exists(path):
+        return
+    # Every worker builds on start; per-process temp names keep their writes from colliding
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def build(static_dir="static", build_dir=BUILD_DIR):
+    """Copy every static file to its fingerprinted name plus compressed variants; returns the manifest.
+
+    Earlier builds are left in place, so pages rendered before a deploy keep resolving.
+    """
+    manifest, encodings = {}, {}
+    for folder, _, files in os.walk(static_dir):
+        for name in sorted(files):
+            if name.startswith("."):
+                continue
+            source = os.path.join(folder, name)
+            path = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+            target = manifest[path] = fingerprint(path, data)
+            _write(os.path.join(build_dir, target), data)
+
+            encodings[target] = []
+            if mimetypes.guess_type(name)[0] not in COMPRESSIBLE:
+                continue
+            for encoding in ("br", "gzip"):
+                if encoding == "br" and not _brotli():
+                    continue
+                packed = compress(data, encoding, level=9)
+                if len(packed) < len(data):
+                    _write(os.path.join(build_dir, target + SUFFIX[encoding]), packed)
+                    encodings[target].append(encoding)
+
+    path = os.path.join(build_dir, "manifest.json")
+    os.makedirs(build_dir, exist_ok=True)
+    with open(f"{path}.{os.getpid()}.tmp", "w") as f:
+        json.dump({"files": manifest, "encodings": encodings}, f, indent=2)
+    os.replace(f"{path}.{os.getpid()}.tmp", path)
+    return manifest, encodings
+
+def asset_url(path):
+    # Files added after start (or a failed build) fall back to the plain, revalidated /static URL
+    if path in _manifest:
+        return url_for("asset", path=_manifest[path])
+    return url_for("static", filename=path)
+
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = best_encoding(request.accept_encodings)
+    if not encoding or response.content_length is None or response.content_length < MIN_BYTES:
+        return response
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers["Content-Encoding"] = encoding
+    # The body is no longer byte-identical to what a strong validator was computed over
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_assets(app):
+    build_dir = os.path.abspath(BUILD_DIR)
+    try:
+        manifest, encodings = build(app.static_folder, build_dir)
+        _manifest.update(manifest)
+        _encodings.update(encodings)
+    except OSError as e:
+        print(f"⚠️ Static asset build failed ({e}); serving unfingerprinted /static URLs")
+
+    @app.route("/assets/<path:path>", endpoint="asset")
+    def serve_asset(path):
+        if path not in _encodings:
+            abort(404)
+        encoding = best_encoding(request.accept_encodings, _encodings[path])
+        response = send_from_directory(build_dir, path + SUFFIX.get(encoding, ""),
+                                       mimetype=mimetypes.guess_type(path)[0], max_age=MAX_AGE)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.immutable = True
+        return response
+
+    app.add_template_global(asset_url)
+    app.after_request(compress_response)
+
+if __name__ == "__main__":
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else "static"
+    manifest, encodings = build(static_dir)
+    for path, target in manifest.items():
+        print(f"📦 {path} -> {target} {' '.join(encodings[target])}".rstrip())
+    print(f"✅ {len(manifest)} asset(s) in {BUILD_DIR}")
@@ -0,0 +1,89 @@
+# backlog.py
+# Sentiment for responses stored while the sentiment gate was saturated (sentiment IS NULL,
+# see admission.py). Each web process runs a daemon thread that scores them in batches
+# whenever the gate has a free slot, so live submissions always go first.
+#
+#   BACKLOG_INTERVAL_SECONDS   how often the thread looks for work (default 10, 0 disables)
+#   BACKLOG_BATCH_SIZE         responses per forward pass (default 32)
+#   SENTIMENT_MAX_ATTEMPTS     failed tries before a response is left unlabelled (default 3, see db.py)
+#
+#   python backlog.py          drain every shard once, e.g. from cron
+import os
+import time
+import threading
+
+from db import get_connection, list_shards, awaiting_sentiment
+from admission import SENTIMENT_GATE, ModelBusy
+
+BACKLOG_INTERVAL = float(os.environ.get("BACKLOG_INTERVAL_SECONDS", "10"))
+BACKLOG_BATCH = int(os.environ.get("BACKLOG_BATCH_SIZE", "32"))
+
+def classify_each(classify, rows):
+    # A batch failed: score its rows one at a time so a single bad text cannot sink the rest
+    results = []
+    for row in rows:
+        try:
+            results.append(classify([row["feedback"]])[0])
+        except Exception as e:
+            print(f"⚠️ Deferred sentiment for response {row['id']} failed: {e}")
+            results.append(None)
+    return results
+
+def score_pending(conn, classify, batch_size=BACKLOG_BATCH):
+    """Score one batch of unscored responses; returns (scored, failed) row counts. Raises ModelBusy."""
+    rows = conn.execute(f"SELECT id, feedback FROM feedback_responses WHERE {awaiting_sentiment()} ORDER BY id LIMIT ?",
+                        (batch_size,)).fetchall()
+    if not rows:
+        return 0, 0
+    with SENTIMENT_GATE.admit():
+        try:
+            results = classify([r["feedback"] for r in rows])
+        except Exception:
+            results = classify_each(classify, rows)
+    scored = [(*result, row["id"]) for row, result in zip(rows, results) if result is not None]
+    failed = [(row["id"],) for row, result in zip(rows, results) if result is None]
+    # Another process may have scored the same rows meanwhile; the first write wins
+    conn.executemany("""
+        UPDATE feedback_responses SET sentiment = ?, sentiment_confidence = ?, model_version = ?
+        WHERE id = ? AND sentiment IS NULL
+    """, scored)
+    # Past SENTIMENT_MAX_ATTEMPTS the row drops out of awaiting_sentiment and stays unlabelled
+    conn.executemany("UPDATE feedback_responses SET sentiment_attempts = sentiment_attempts + 1 "
+                     "WHERE id = ? AND sentiment IS NULL", failed)
+    conn.commit()
+    return len(scored), len(failed)
+
+def drain(classify, yield_to_live=True, batch_size=BACKLOG_BATCH):
+    total = 0
+    for shard in list_shards():
+        conn = get_connection(shard)
+        try:
+            while not yield_to_live or SENTIMENT_GATE.has_capacity():
+                scored, failed = score_pending(conn, classify, batch_size)
+                total += scored
+                # Failed rows are retried on a later run, not straight away in this one
+                if failed or not scored:
+                    break
+        finally:
+            conn.close()
+    return total
+
+def _run(classify):
+    while True:
+        time.sleep(BACKLOG_INTERVAL)
+        try:
+            scored = drain(classify)
+            if scored:
+                print(f"✅ Scored {scored} deferred response(s)")
+        except ModelBusy:
+            pass  # live traffic took the slots; try again next tick
+        except Exception as e:
+            print(f"⚠️ Deferred sentiment scoring failed: {e}")
+
+def start(classify):
+    if BACKLOG_INTERVAL > 0:
+        threading.Thread(target=_run, args=(classify,), name="sentiment-backlog", daemon=True).start()
+
+if __name__ == "__main__":
+    from model_utils import classify
+    print(f"✅ Scored {drain(classify, yield_to_live=False)} deferred response(s)")
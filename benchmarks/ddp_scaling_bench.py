@@ -0,0 +1,110 @@
+# benchmarks/ddp_scaling_bench.py
+# Training throughput (samples/s) of the sentiment classifier under CPU DDP (gloo) at
+# several worker counts, each launched with torchrun on this machine. Cores are split
+# evenly between workers unless --threads is given.
+#
+#   python benchmarks/ddp_scaling_bench.py --workers 1 2 4 8 --steps 30
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+CSV_PATH = os.path.join(ROOT, "data", "student_feedback_2000.csv")
+LABELS = {"Negative": 0, "Neutral": 1, "Positive": 2}
+
+def worker(args):
+    # One DDP rank: a fixed number of optimizer steps over its shard of the CSV
+    import torch
+    import torch.distributed as dist
+    from transformers import AutoModelForSequenceClassification
+    from tokenization import load_tokenizer, encode_batch
+
+    dist.init_process_group("gloo")
+    rank, world = dist.get_rank(), dist.get_world_size()
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    with open(CSV_PATH, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    enc = encode_batch(load_tokenizer(args.model), [r["feedback"] for r in rows], return_tensors="pt")
+    dataset = torch.utils.data.TensorDataset(enc["input_ids"], enc["attention_mask"],
+                                             torch.tensor([LABELS[r["sentiment"]] for r in rows]))
+    sampler = torch.utils.data.distributed.DistributedSampler(dataset, world, rank, shuffle=True)
+    loader = torch.utils.data.DataLoader(dataset, batch_size=args.batch_size, sampler=sampler)
+
+    model = torch.nn.parallel.DistributedDataParallel(
+        AutoModelForSequenceClassification.from_pretrained(args.model, num_labels=3))
+    optimizer = torch.optim.AdamW(model.parameters(), lr=3e-5)
+
+    def batches():
+        epoch = 0
+        while True:
+            sampler.set_epoch(epoch)
+            yield from loader
+            epoch += 1
+
+    stream = batches()
+    model.train()
+    for step in range(args.warmup + args.steps):
+        if step == args.warmup:
+            dist.barrier()
+            start = time.perf_counter()
+        input_ids, attention_mask, labels = next(stream)
+        loss = model(input_ids=input_ids, attention_mask=attention_mask, labels=labels).loss
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+
+    elapsed = torch.tensor(time.perf_counter() - start)
+    dist.all_reduce(elapsed, op=dist.ReduceOp.MAX)
+    if rank == 0:
+        samples = args.steps * args.batch_size * world
+        print("RESULT " + json.dumps({"workers": world, "threads": args.threads,
+                                      "samples_per_s": samples / elapsed.item()}), flush=True)
+    dist.destroy_process_group()
+
+def launch(workers, threads, args):
+    cmd = [sys.executable, "-m", "torch.distributed.run", "--standalone", f"--nproc_per_node={workers}",
+           os.path.abspath(__file__), "--worker", "--threads", str(threads), "--steps", str(args.steps),
+           "--warmup", str(args.warmup), "--batch-size", str(args.batch_size), "--model", args.model]
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads))
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    for line in out.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    print(out.stderr[-2000:], file=sys.stderr)
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU DDP training scaling benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=None, help="threads per worker (default: cores / workers)")
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16, help="per worker")
+    parser.add_argument("--model", default="prajjwal1/bert-tiny")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    cores = os.cpu_count() or 1
+    print(f"{'workers':>8}{'threads':>9}{'samples/s':>12}{'speedup':>9}")
+    base = None
+    for n in args.workers:
+        result = launch(n, args.threads or max(1, cores // n), args)
+        if result is None:
+            print(f"{n:>8}{'failed':>30}")
+            continue
+        base = base or result["samples_per_s"]
+        print(f"{n:>8}{result['threads']:>9}{result['samples_per_s']:>12.1f}{result['samples_per_s'] / base:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/group_commit_bench.py
+# Sustained feedback INSERT throughput on one SQLite file: commit-per-request vs group commit.
+#
+#   python benchmarks/group_commit_bench.py --threads 32 --seconds 5
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+INSERT = """
+    INSERT INTO feedback_responses (form_id, student_id, college_code, feedback, sentiment, submitted_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def run(label, submit, threads, seconds):
+    done = [0] * threads
+    stop = time.monotonic() + seconds
+
+    def worker(i):
+        while time.monotonic() < stop:
+            submit(None, INSERT, (None, None, "BENCH", "Labs were well equipped.", "Positive", "2026-01-01 09:00"))
+            done[i] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    rate = sum(done) / seconds
+    print(f"{label:<22}{sum(done):>10}{rate:>14.0f}")
+    return rate
+
+def main():
+    parser = argparse.ArgumentParser(description="Group commit throughput benchmark")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    import db
+    import group_commit
+    db.init_db()
+
+    batched = group_commit.GroupCommitWriter()
+
+    def direct_submit(college_code, sql, params):
+        conn = db.get_connection(college_code)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    print(f"\n{args.threads} writer threads, {args.seconds:.0f}s each")
+    print(f"{'mode':<22}{'rows':>10}{'rows/sec':>14}")
+    base = run("commit per request", direct_submit, args.threads, args.seconds)
+    fast = run("group commit", batched.submit, args.threads, args.seconds)
+    batched.stop()
+    print(f"speed-up: {fast / base:.1f}x, avg batch {batched.stats['rows'] / max(batched.stats['batches'], 1):.1f} rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/login_bench.py
+# Password verification throughput, which bounds logins/sec, per hash scheme:
+# one core (single thread) and all cores (PASSWORD_WORKERS threads).
+#
+#   python benchmarks/login_bench.py --seconds 3
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+METHODS = ["pbkdf2:sha256:1000000", "scrypt:32768:8:1", "scrypt:16384:8:1", "pbkdf2:sha256:600000"]
+
+def make_checker(method):
+    if method == "argon2":
+        from argon2 import PasswordHasher
+        hasher = PasswordHasher()
+        stored = hasher.hash("correct horse")
+        return lambda: hasher.verify(stored, "correct horse")
+    stored = generate_password_hash("correct horse", method)
+    return lambda: check_password_hash(stored, "correct horse")
+
+def throughput(check, threads, seconds):
+    stop = time.monotonic() + seconds
+
+    def worker():
+        n = 0
+        while time.monotonic() < stop:
+            check()
+            n += 1
+        return n
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: worker(), range(threads)))
+    return total / seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Login hash throughput benchmark")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    methods = list(METHODS)
+    try:
+        import argon2  # noqa: F401
+        methods.append("argon2")
+    except ImportError:
+        print("(argon2-cffi not installed, skipping argon2)", file=sys.stderr)
+
+    print(f"{'scheme':<24}{'logins/s 1 core':>17}{f'logins/s {args.workers} workers':>22}")
+    for method in methods:
+        check = make_checker(method)
+        single = throughput(check, 1, args.seconds)
+        pooled = throughput(check, args.workers, args.seconds)
+        print(f"{method:<24}{single:>17.1f}{pooled:>22.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/long_text_bench.py
+# Cost and accuracy of three ways to score feedback longer than the 128-token limit:
+#   truncate  - first 128 tokens only (the old behaviour)
+#   window    - overlapping 128-token windows, one batched forward pass (model_utils default)
+#   long512   - raise max_length to 512 (the naive fix; attention cost grows quadratically)
+#
+# Long texts are built from the training CSV the way long complaints are usually written: a
+# polite neutral opening followed by several sentences carrying the actual sentiment, which
+# is the label. Latency is reported per length bucket and for a realistic mix where most
+# submissions are short.
+#
+#   python benchmarks/long_text_bench.py --model student_feedback_bert --long-share 0.05
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+# Benchmark a fixed model: no registry polling, no cascade
+os.environ.setdefault("MODEL_POLL_SECONDS", "0")
+os.environ.setdefault("CASCADE", "0")
+
+import model_utils
+from tokenization import encode_batch
+
+CSV_PATH = os.path.join(ROOT, "data", "student_feedback_2000.csv")
+STRATEGIES = {"truncate": dict(windowed=False), "window": dict(windowed=True),
+              "long512": dict(windowed=False, max_length=512)}
+# 128 = rows from the CSV as they are; larger buckets are built long texts
+BUCKETS = [128, 256, 512, 1024]
+
+def load_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(r["feedback"], model_utils.LABELS.index(r["sentiment"])) for r in csv.DictReader(f)]
+
+def build_long(rows, tokenizer, target_tokens, rng):
+    """A neutral opening (about a third of the text) followed by same-label sentences."""
+    by_label = {}
+    for text, label in rows:
+        by_label.setdefault(label, []).append(text)
+    label = rng.choice([0, 2])
+    parts, length = [], 0
+    while length < target_tokens // 3:
+        parts.append(rng.choice(by_label[1]))
+        length = len(tokenizer(" ".join(parts))["input_ids"])
+    while length < target_tokens:
+        parts.append(rng.choice(by_label[label]))
+        length = len(tokenizer(" ".join(parts))["input_ids"])
+    return " ".join(parts), label
+
+def latency_ms(loaded, texts, options):
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        model_utils.score(loaded, [text], **options)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def accuracy(loaded, texts, labels, options):
+    preds = [label for label, _ in model_utils.score(loaded, texts, **options)]
+    return sum(p == y for p, y in zip(preds, labels)) / max(len(labels), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-feedback scoring cost and accuracy")
+    parser.add_argument("--model", default=None, help="model folder (default: the serving model)")
+    parser.add_argument("--per-bucket", type=int, default=40)
+    parser.add_argument("--long-share", type=float, default=0.05,
+                        help="share of submissions longer than 128 tokens in the realistic mix")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    loaded = model_utils.LoadedModel(args.model, args.model).warm() if args.model else model_utils.active_model()
+    rows = load_rows(CSV_PATH)
+
+    samples = {}
+    for bucket in BUCKETS:
+        if bucket <= 128:
+            texts = [rng.choice(rows) for _ in range(args.per_bucket)]
+        else:
+            texts = [build_long(rows, loaded.tokenizer, bucket, rng) for _ in range(args.per_bucket)]
+        samples[bucket] = texts
+    sizes = {b: sum(len(encode_batch(loaded.tokenizer, [t], max_length=4096, padding=False)["input_ids"][0])
+                    for t, _ in s) / len(s) for b, s in samples.items()}
+
+    print(f"model {loaded.version}\n")
+    print(f"{'bucket':>7}{'avg tok':>9}" + "".join(f"{name + ' ms':>15}{'acc':>7}" for name in STRATEGIES))
+    cost = {name: {} for name in STRATEGIES}
+    for bucket, pairs in samples.items():
+        texts, labels = [t for t, _ in pairs], [y for _, y in pairs]
+        line = f"{bucket:>7}{sizes[bucket]:>9.0f}"
+        for name, options in STRATEGIES.items():
+            cost[name][bucket] = latency_ms(loaded, texts, options)
+            line += f"{cost[name][bucket]:>15.2f}{accuracy(loaded, texts, labels, options):>7.2f}"
+        print(line)
+
+    # Realistic mix: short submissions dominate, the long share spread evenly over the long buckets
+    long_buckets = BUCKETS[1:]
+    print(f"\nexpected ms per submission with {args.long_share:.0%} long feedback:")
+    for name in STRATEGIES:
+        long_cost = sum(cost[name][b] for b in long_buckets) / len(long_buckets)
+        print(f"  {name:<10}{(1 - args.long_share) * cost[name][128] + args.long_share * long_cost:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/summarizer_bench.py
+# Compare summary backends on latency, peak memory and ROUGE against the transformers path.
+#
+#   python benchmarks/summarizer_bench.py --responses 60 --backends transformers llamacpp extractive
+#   python benchmarks/summarizer_bench.py --prefill      # prompt prefix KV-cache saving
+#
+# Every backend runs in its own subprocess so peak RSS is not polluted by the others.
+import argparse
+import copy
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+CSV_PATH = os.path.join(ROOT, "data", "student_feedback_2000.csv")
+
+def load_feedback(n, seed=42):
+    with open(CSV_PATH, newline="", encoding="utf-8") as f:
+        rows = [row["feedback"] for row in csv.DictReader(f)]
+    random.Random(seed).shuffle(rows)
+    return rows[:n]
+
+# --- ROUGE (F1, whitespace tokens, no extra dependency) ---
+def _ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+def _f1(overlap, cand_total, ref_total):
+    if not overlap or not cand_total or not ref_total:
+        return 0.0
+    p, r = overlap / cand_total, overlap / ref_total
+    return 2 * p * r / (p + r)
+
+def rouge_n(candidate, reference, n):
+    c, r = _ngrams(candidate.lower().split(), n), _ngrams(reference.lower().split(), n)
+    return _f1(sum((c & r).values()), sum(c.values()), sum(r.values()))
+
+def rouge_l(candidate, reference):
+    c, r = candidate.lower().split(), reference.lower().split()
+    prev = [0] * (len(r) + 1)
+    for tok in c:
+        cur = [0]
+        for j, ref_tok in enumerate(r):
+            cur.append(prev[j] + 1 if tok == ref_tok else max(prev[j + 1], cur[j]))
+        prev = cur
+    return _f1(prev[-1], len(c), len(r))
+
+# --- CHILD: one backend, one process ---
+def run_backend(name, n):
+    from summarizer import generate_final_summary
+    from summary_backends import get_backend
+
+    feedback = load_feedback(n)
+
+    start = time.perf_counter()
+    get_backend(name)
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summary = generate_final_summary(feedback, backend_name=name)
+    summarize_s = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"backend": name, "load_s": load_s, "summarize_s": summarize_s,
+                      "peak_rss_mb": peak_mb, "summary": summary}))
+
+# --- PREFILL: shared prompt prefix with and without the cached KV ---
+def run_prefill(n, repeats=3):
+    from summary_backends import TransformersBackend
+    from utils import chunk_list, clean_text
+
+    backend = TransformersBackend()
+    if backend.prefix_cache is None:
+        backend.warm_prefix_cache()
+    torch = backend.torch
+    chunks = ["\n".join(chunk) for chunk in chunk_list([clean_text(f) for f in load_feedback(n)], chunk_size=20)]
+
+    full_s, cached_s = [], []
+    with torch.no_grad():
+        for text in chunks:
+            full_ids = backend.tokenizer(backend.format_prompt(text), return_tensors="pt").input_ids.to(backend.model.device)
+            suffix_ids = backend.tokenizer(text + backend.prompt_tail, return_tensors="pt",
+                                           add_special_tokens=False).input_ids.to(backend.model.device)
+            for _ in range(repeats):
+                start = time.perf_counter()
+                backend.model(input_ids=full_ids, use_cache=True)
+                full_s.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                cache = copy.deepcopy(backend.prefix_cache)
+                mask = torch.ones(1, backend.prefix_ids.shape[1] + suffix_ids.shape[1], dtype=torch.long, device=suffix_ids.device)
+                backend.model(input_ids=suffix_ids, past_key_values=cache, attention_mask=mask, use_cache=True)
+                cached_s.append(time.perf_counter() - start)
+
+    full_ms = 1000 * sum(full_s) / len(full_s)
+    cached_ms = 1000 * sum(cached_s) / len(cached_s)
+    print(f"\nPrefill on {len(chunks)} chunk(s) x {repeats} ({backend.prefix_ids.shape[1]} shared prefix tokens)")
+    print(f"{'full prompt':<20}{full_ms:>10.1f} ms/chunk")
+    print(f"{'cached prefix':<20}{cached_ms:>10.1f} ms/chunk")
+    print(f"{'saving':<20}{full_ms - cached_ms:>10.1f} ms/chunk ({100 * (1 - cached_ms / full_ms):.1f}%)")
+
+# --- PARENT ---
+def main():
+    parser = argparse.ArgumentParser(description="Compare summary backends")
+    parser.add_argument("--responses", type=int, default=60)
+    parser.add_argument("--backends", nargs="+", default=["transformers", "llamacpp", "extractive"])
+    parser.add_argument("--reference", default="transformers", help="backend whose summary is the ROUGE reference")
+    parser.add_argument("--prefill", action="store_true", help="measure prefill time saved by the prefix KV cache")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prefill:
+        run_prefill(args.responses)
+        return
+
+    if args.child:
+        run_backend(args.child, args.responses)
+        return
+
+    results = {}
+    for name in args.backends:
+        proc = subprocess.run([sys.executable, __file__, "--child", name, "--responses", str(args.responses)],
+                              capture_output=True, text=True, cwd=ROOT)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(f"⚠️ {name} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'no output'}")
+            continue
+        results[name] = json.loads(lines[-1])
+
+    reference = results.get(args.reference, {}).get("summary")
+
+    print(f"\nSummary benchmark on {args.responses} responses")
+    print(f"{'backend':<14}{'load s':>9}{'summ s':>9}{'peak MB':>10}{'R-1':>7}{'R-2':>7}{'R-L':>7}")
+    for name, r in results.items():
+        if reference:
+            scores = (rouge_n(r["summary"], reference, 1), rouge_n(r["summary"], reference, 2), rouge_l(r["summary"], reference))
+            rouge = "".join(f"{s:>7.3f}" for s in scores)
+        else:
+            rouge = f"{'n/a':>7}" * 3
+        print(f"{name:<14}{r['load_s']:>9.2f}{r['summarize_s']:>9.2f}{r['peak_rss_mb']:>10.0f}{rouge}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/tokenizer_bench.py
+# Slow (Python BertTokenizer) vs fast (Rust) tokenizer throughput on the training CSV,
+# for one-call-per-text and batched encoding. That both produce identical input ids is
+# checked by tests/test_tokenization.py.
+#
+#   python benchmarks/tokenizer_bench.py --tokenizer bert-base-uncased --repeat 5
+import argparse
+import csv
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from tokenization import load_tokenizer, encode_batch, MAX_LENGTH
+
+def load_texts(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["feedback"] for row in csv.DictReader(f)]
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokenizer throughput benchmark")
+    parser.add_argument("--tokenizer", default="bert-base-uncased")
+    parser.add_argument("--csv", default=os.path.join(ROOT, "data", "student_feedback_2000.csv"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_texts(args.csv)
+    slow = load_tokenizer(args.tokenizer, use_fast=False)
+    fast = load_tokenizer(args.tokenizer, use_fast=True)
+    if not fast.is_fast:
+        sys.exit(f"No fast tokenizer available for {args.tokenizer}")
+
+    print(f"{'mode':<28}{'seconds':>10}{'texts/s':>12}")
+    for label, tok, batched in [("slow, one call per text", slow, False), ("slow, batched", slow, True),
+                                ("fast, one call per text", fast, False), ("fast, batched", fast, True)]:
+        if batched:
+            fn = lambda: encode_batch(tok, texts, MAX_LENGTH)
+        else:
+            fn = lambda: [encode_batch(tok, [t], MAX_LENGTH) for t in texts]
+        secs = timed(fn, args.repeat)
+        print(f"{label:<28}{secs:>10.3f}{len(texts) / secs:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,64 @@
 import sqlite3
 import os
+import re
+import glob
+import calendar
+import threading
 from datetime import datetime
-from werkzeug.security import generate_password_hash
+from passwords import hash_password
+import db_postgres
 
 # Database file path
 DB_FOLDER = "data"
 DB_NAME = "feedback_system.db"
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
 
-def get_connection():
-    if not os.path.exists(DB_FOLDER):
-        os.makedirs(DB_FOLDER)
+# --- BACKEND ---
+# DB_BACKEND=postgres routes every connection to a pooled PostgreSQL database (db_postgres.py)
+DB_BACKEND = os.environ.get("DB_BACKEND", "sqlite")
+IntegrityError = (sqlite3.IntegrityError, db_postgres.IntegrityError)
 
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
+# --- SHARDING ---
+# With DB_SHARDED=1 every college gets its own SQLite file under data/colleges/ and
+# DB_PATH only holds the global catalog (users). Shard connections ATTACH the catalog,
+# so joins against `users` keep working while feedback writes lock only their own file.
+DB_SHARDED = os.environ.get("DB_SHARDED", "0") == "1" and DB_BACKEND == "sqlite"
+SHARD_FOLDER = os.path.join(DB_FOLDER, "colleges")
+_ready_shards = set()
+_shard_lock = threading.Lock()
+# College codes double as shard file names, so only codes that are already safe file names are allowed
+COLLEGE_CODE = re.compile(r"[A-Za-z0-9_-]{1,32}")
+
+def shard_path(college_code=None):
+    if not DB_SHARDED or not college_code:
+        return DB_PATH
+    if not COLLEGE_CODE.fullmatch(college_code):
+        raise ValueError(f"Invalid college code: {college_code!r}")
+    return os.path.join(SHARD_FOLDER, f"{college_code}.db")
+
+def college_exists(college_code):
+    # A college is in the catalog once the superadmin has created its administrator
+    if not college_code or not COLLEGE_CODE.fullmatch(college_code):
+        return False
+    conn = get_connection()
+    try:
+        return conn.execute("SELECT 1 FROM users WHERE role = 'admin' AND college_code = ?",
+                            (college_code,)).fetchone() is not None
+    finally:
+        conn.close()
+
+def list_shards():
+    # College codes with a shard file; [None] means the single shared database
+    if not DB_SHARDED:
+        return [None]
+    return sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(SHARD_FOLDER, "*.db")))
+
+def _connect(path):
+    folder = os.path.dirname(path)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
     
@@ -23,12 +69,169 @@ def get_connection():
         
     return conn
 
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
+def get_connection(college_code=None):
+    if DB_BACKEND == "postgres":
+        return db_postgres.get_connection()
 
-    print("⚡ Initializing Multi-Tenant Intelligence Database...")
+    path = shard_path(college_code)
+    conn = _connect(path)
+    if path == DB_PATH:
+        return conn
+
+    with _shard_lock:
+        if path not in _ready_shards:
+            cur = conn.cursor()
+            create_college_tables(cur, user_fk=False)
+            conn.commit()
+            _ready_shards.add(path)
+    conn.execute("ATTACH DATABASE ? AS catalog", (DB_PATH,))
+    return conn
+
+def backend_of(conn):
+    # Postgres connections (also behind instrumentation proxies) say so; sqlite3 ones have no attribute
+    return getattr(conn, "backend", "sqlite")
+
+def iter_rows(conn, sql, params=(), batch_size=2000):
+    # Large reads: a server-side cursor on Postgres, plain cursor iteration on SQLite
+    if backend_of(conn) == "postgres":
+        yield from db_postgres.iter_rows(conn, sql, params, batch_size)
+        return
+    cur = conn.execute(sql, params)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+def bulk_insert(conn, table, columns, rows):
+    # Large writes: COPY on Postgres, executemany on SQLite
+    if backend_of(conn) == "postgres":
+        db_postgres.copy_rows(conn, table, columns, rows)
+        return
+    placeholders = ", ".join("?" for _ in columns)
+    conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+def wallclock_ts(dt=None):
+    # submitted_ts: seconds since the epoch of the local wall-clock time stored in submitted_at,
+    # so hour/day buckets line up with local days and existing rows backfill with plain SQL
+    return calendar.timegm((dt or datetime.now()).timetuple())
+
+# submitted_at is "%Y-%m-%d %H:%M" from the web app and "%d %b %Y %H:%M" from the Streamlit console
+SUBMITTED_TS_SQL = """CAST(strftime('%s', CASE WHEN submitted_at LIKE '____-__-__ %' THEN submitted_at
+    ELSE substr(submitted_at, 8, 4) || '-' || CASE substr(submitted_at, 4, 3) {months} END
+         || '-' || substr(submitted_at, 1, 2) || substr(submitted_at, 12) END) AS INTEGER)""".format(
+    months=" ".join(f"WHEN '{calendar.month_abbr[m]}' THEN '{m:02d}'" for m in range(1, 13)))
 
+def backfill_responses(cur):
+    """Fill in submitted_ts and college_code on rows stored without them; returns True if any changed."""
+    cur.execute(f"UPDATE feedback_responses SET submitted_ts = {SUBMITTED_TS_SQL} "
+                "WHERE submitted_ts IS NULL AND submitted_at IS NOT NULL")
+    changed = cur.rowcount > 0
+    cur.execute("""UPDATE feedback_responses SET college_code = (
+                       SELECT college_code FROM feedback_forms f WHERE f.id = feedback_responses.form_id)
+                   WHERE college_code IS NULL""")
+    return changed or cur.rowcount > 0
+
+def ensure_column(cur, table, column, declaration):
+    # CREATE TABLE IF NOT EXISTS never alters existing files, so new columns are added here
+    existing = [row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+    if column not in existing:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        return True
+    return False
+
+def index_exists(cur, name):
+    return cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone() is not None
+
+def archive_duplicate_responses(cur):
+    """Move every submission but the first per (form, student) into feedback_responses_duplicates."""
+    duplicates = """student_id IS NOT NULL AND id NOT IN (
+        SELECT MIN(id) FROM feedback_responses WHERE student_id IS NOT NULL GROUP BY form_id, student_id
+    )"""
+    if not cur.execute(f"SELECT 1 FROM feedback_responses WHERE {duplicates} LIMIT 1").fetchone():
+        return 0
+    cur.execute("""CREATE TABLE IF NOT EXISTS feedback_responses_duplicates AS
+                   SELECT *, '' AS archived_at FROM feedback_responses WHERE 0""")
+    columns = [row[1] for row in cur.execute("PRAGMA table_info(feedback_responses_duplicates)").fetchall()]
+    kept = ", ".join(c for c in columns if c != "archived_at")
+    cur.execute(f"""INSERT INTO feedback_responses_duplicates ({kept}, archived_at)
+                    SELECT {kept}, ? FROM feedback_responses WHERE {duplicates}""",
+                (datetime.now().strftime("%Y-%m-%d %H:%M"),))
+    cur.execute(f"DELETE FROM feedback_responses WHERE {duplicates}")
+    return cur.rowcount
+
+# --- DEFERRED SENTIMENT ---
+# Rows stored while the sentiment model was saturated are scored later by backlog.py. A row
+# that fails SENTIMENT_MAX_ATTEMPTS times is given up on and stays unlabelled, so it no longer
+# holds back topic tagging and the warehouse export.
+SENTIMENT_MAX_ATTEMPTS = int(os.environ.get("SENTIMENT_MAX_ATTEMPTS", "3"))
+
+def awaiting_sentiment(alias=None):
+    """SQL condition matching responses the backlog will still try to score."""
+    prefix = f"{alias}." if alias else ""
+    return f"{prefix}sentiment IS NULL AND {prefix}sentiment_attempts < {SENTIMENT_MAX_ATTEMPTS}"
+
+def save_form_summary(conn, form_id, summary, last_response_id):
+    # Remember which responses the cached summary covers so the scheduler can spot stale forms
+    conn.execute("""
+        UPDATE feedback_forms SET ai_summary = ?, summary_last_response_id = ?, summary_updated_at = ?
+        WHERE id = ?
+    """, (summary, last_response_id, datetime.now().strftime("%Y-%m-%d %H:%M"), form_id))
+
+# Same rule as app.profile_completion: share of the six profile fields that are filled in
+PROFILE_COMPLETION_SQL = "(" + " + ".join(
+    f"(CASE WHEN TRIM(COALESCE({col}, '')) <> '' THEN 1 ELSE 0 END)"
+    for col in ("mobile_no", "department", "class_name", "academic_year", "teacher_name", "hod_name")
+) + ") * 100 / 6"
+
+# --- SENTIMENT ROLLUPS ---
+# Hourly and daily per-form counts, kept current by triggers on feedback_responses so every
+# insert path (web, group commit, shard migration) maintains them in the same transaction.
+ROLLUP_GRANULARITIES = {"hour": 3600, "day": 86400}
+
+def rollup_statement(row, sign, granularity, seconds):
+    return f"""
+            INSERT INTO sentiment_rollups (granularity, bucket, form_id, college_code, teacher_id, positive, neutral, negative, total)
+            SELECT '{granularity}', {row}.submitted_ts - {row}.submitted_ts % {seconds}, {row}.form_id, f.college_code, f.teacher_id,
+                   {sign}(CASE WHEN {row}.sentiment = 'Positive' THEN 1 ELSE 0 END),
+                   {sign}(CASE WHEN {row}.sentiment = 'Neutral' THEN 1 ELSE 0 END),
+                   {sign}(CASE WHEN {row}.sentiment = 'Negative' THEN 1 ELSE 0 END), {sign}1
+            FROM feedback_forms f WHERE f.id = {row}.form_id
+            ON CONFLICT (granularity, bucket, form_id) DO UPDATE SET
+                positive = positive + excluded.positive, neutral = neutral + excluded.neutral,
+                negative = negative + excluded.negative, total = total + excluded.total;"""
+
+def rollup_trigger_sql(event):
+    # UPDATE (a deferred response getting its sentiment) moves the row's count from the old label to the new
+    if event == "UPDATE":
+        changes, header = [("OLD", "-"), ("NEW", "+")], "AFTER UPDATE OF sentiment"
+    else:
+        changes, header = [("NEW", "+") if event == "INSERT" else ("OLD", "-")], f"AFTER {event}"
+    statements = [rollup_statement(row, sign, granularity, seconds)
+                  for row, sign in changes for granularity, seconds in ROLLUP_GRANULARITIES.items()]
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_{event.lower()} {header} ON feedback_responses
+    WHEN {changes[0][0]}.submitted_ts IS NOT NULL
+    BEGIN {"".join(statements)}
+    END
+    """
+
+def rebuild_rollups(cur):
+    cur.execute("DELETE FROM sentiment_rollups")
+    for granularity, seconds in ROLLUP_GRANULARITIES.items():
+        cur.execute(f"""
+            INSERT INTO sentiment_rollups (granularity, bucket, form_id, college_code, teacher_id, positive, neutral, negative, total)
+            SELECT '{granularity}', r.submitted_ts - r.submitted_ts % {seconds}, r.form_id, f.college_code, f.teacher_id,
+                   SUM(CASE WHEN r.sentiment = 'Positive' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN r.sentiment = 'Neutral' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN r.sentiment = 'Negative' THEN 1 ELSE 0 END),
+                   COUNT(*)
+            FROM feedback_responses r JOIN feedback_forms f ON f.id = r.form_id
+            WHERE r.submitted_ts IS NOT NULL
+            GROUP BY r.submitted_ts - r.submitted_ts % {seconds}, r.form_id, f.college_code, f.teacher_id
+        """)
+
+def create_user_table(cur):
     # 1. USERS TABLE
     cur.execute("""
     CREATE TABLE IF NOT EXISTS users (
@@ -45,8 +248,12 @@ def init_db():
     )
     """)
 
+def create_college_tables(cur, user_fk=True):
+    # Shards cannot reference the attached catalog, so the users FK only exists in single-file mode
+    fk = "FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE" if user_fk else ""
+
     # 2. TEACHERS TABLE
-    cur.execute("""
+    cur.execute(f"""
     CREATE TABLE IF NOT EXISTS teachers (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id INTEGER UNIQUE,
@@ -55,13 +262,13 @@ def init_db():
         department TEXT,
         position TEXT,
         class_year TEXT,
-        division TEXT,
-        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        division TEXT{"," if fk else ""}
+        {fk}
     )
     """)
 
     # 3. STUDENTS TABLE
-    cur.execute("""
+    cur.execute(f"""
     CREATE TABLE IF NOT EXISTS students (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id INTEGER UNIQUE,
@@ -75,7 +282,7 @@ def init_db():
         teacher_name TEXT,
         hod_name TEXT,
         assigned_teacher_id INTEGER,
-        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        {fk + "," if fk else ""}
         FOREIGN KEY (assigned_teacher_id) REFERENCES teachers(id) ON DELETE SET NULL
     )
     """)
@@ -121,13 +328,131 @@ def init_db():
     )
     """)
 
+    # 7. SUMMARY RUNS (nightly precomputation log)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS summary_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        form_id TEXT,
+        backend TEXT,
+        responses INTEGER,
+        chunks INTEGER,
+        input_tokens INTEGER,
+        output_tokens INTEGER,
+        duration_s REAL,
+        started_at TEXT,
+        FOREIGN KEY (form_id) REFERENCES feedback_forms(id) ON DELETE CASCADE
+    )
+    """)
+
+    # 8. SENTIMENT ROLLUPS (trend series, see rollup_trigger_sql)
+    rollups_exist = cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sentiment_rollups'").fetchone()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sentiment_rollups (
+        granularity TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        form_id TEXT NOT NULL,
+        college_code TEXT,
+        teacher_id INTEGER,
+        positive INTEGER DEFAULT 0,
+        neutral INTEGER DEFAULT 0,
+        negative INTEGER DEFAULT 0,
+        total INTEGER DEFAULT 0,
+        PRIMARY KEY (granularity, bucket, form_id)
+    )
+    """)
+
+    # 9. TOPICS (written by topics.py, read by the analytics page)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS response_topics (
+        response_id INTEGER NOT NULL,
+        form_id TEXT,
+        topic TEXT NOT NULL,
+        score REAL,
+        PRIMARY KEY (response_id, topic),
+        FOREIGN KEY (response_id) REFERENCES feedback_responses(id) ON DELETE CASCADE
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS form_topics (
+        form_id TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        positive INTEGER DEFAULT 0,
+        neutral INTEGER DEFAULT 0,
+        negative INTEGER DEFAULT 0,
+        total INTEGER DEFAULT 0,
+        PRIMARY KEY (form_id, topic),
+        FOREIGN KEY (form_id) REFERENCES feedback_forms(id) ON DELETE CASCADE
+    )
+    """)
+
+    # ---------------- SCHEMA MIGRATIONS ----------------
+    ensure_column(cur, "feedback_forms", "summary_last_response_id", "INTEGER DEFAULT 0")
+    ensure_column(cur, "feedback_forms", "summary_updated_at", "TEXT DEFAULT NULL")
+    ensure_column(cur, "feedback_forms", "topics_last_response_id", "INTEGER DEFAULT 0")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_form ON feedback_responses(form_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_student ON feedback_responses(student_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_forms_college ON feedback_forms(college_code, created_at)")
+
+    if ensure_column(cur, "students", "profile_completion", "INTEGER DEFAULT 0"):
+        cur.execute(f"UPDATE students SET profile_completion = {PROFILE_COMPLETION_SQL}")
+
+    # One response per student per form; later duplicates from before the index are archived, not lost
+    if not index_exists(cur, "idx_responses_unique"):
+        archived = archive_duplicate_responses(cur)
+        if archived:
+            print(f"⚠️ Moved {archived} duplicate feedback submission(s) to feedback_responses_duplicates")
+        cur.execute("CREATE UNIQUE INDEX idx_responses_unique ON feedback_responses(form_id, student_id)")
+
+    # Integer timestamps for range queries; submitted_at stays for display
+    ensure_column(cur, "feedback_responses", "submitted_ts", "INTEGER")
+    # Rows from before the column, or from an older Streamlit console, are timestamped here; the
+    # insert triggers skipped them, so the rollups are recounted
+    if backfill_responses(cur):
+        rollups_exist = False
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_ts ON feedback_responses(college_code, submitted_ts)")
+    # Registry version of the sentiment model that scored the row (NULL for rows scored before the registry)
+    ensure_column(cur, "feedback_responses", "model_version", "TEXT")
+    # Calibrated probability of the stored label (see the cascade in model_utils)
+    ensure_column(cur, "feedback_responses", "sentiment_confidence", "REAL")
+    # Failed deferred-scoring attempts (see awaiting_sentiment)
+    ensure_column(cur, "feedback_responses", "sentiment_attempts", "INTEGER DEFAULT 0")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rollups_college ON sentiment_rollups(college_code, granularity, bucket)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rollups_teacher ON sentiment_rollups(teacher_id, granularity, bucket)")
+    cur.execute(rollup_trigger_sql("INSERT"))
+    cur.execute(rollup_trigger_sql("DELETE"))
+    cur.execute(rollup_trigger_sql("UPDATE"))
+    # Responses stored while the sentiment model was saturated, scored later by backlog.py
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_unscored ON feedback_responses(id) WHERE sentiment IS NULL")
+    # Cascaded response deletes run after the form row is gone, so drop the form's rollups directly
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_form_delete AFTER DELETE ON feedback_forms
+    BEGIN
+        DELETE FROM sentiment_rollups WHERE form_id = OLD.id;
+    END
+    """)
+    if not rollups_exist:
+        rebuild_rollups(cur)
+
+def init_db():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    print("⚡ Initializing Multi-Tenant Intelligence Database...")
+
+    if DB_BACKEND == "postgres":
+        db_postgres.create_schema(cur)
+    else:
+        create_user_table(cur)
+        if not DB_SHARDED:
+            create_college_tables(cur)
+
     # ---------------- INITIALIZE SYSTEM ROLES ----------------
 
     # A. CREATE MASTER SUPER ADMIN (OM DHAGE)
     try:
         cur.execute("SELECT id FROM users WHERE email='omdhage.dev@gmail.com'")
         if not cur.fetchone():
-            hashed_master_password = generate_password_hash("dhage04")
+            hashed_master_password = hash_password("dhage04")
             cur.execute("""
             INSERT INTO users (email, password, role, status, college_code, is_verified, created_at)
             VALUES (?, ?, 'superadmin', 'approved', 'GLOBAL', 1, ?)
@@ -144,7 +469,7 @@ def init_db():
     try:
         cur.execute("SELECT id FROM users WHERE email='admin@college.com'")
         if not cur.fetchone():
-            hashed_admin_password = generate_password_hash("admin123")
+            hashed_admin_password = hash_password("admin123")
             cur.execute("""
             INSERT INTO users (email, password, role, status, college_code, is_verified, created_at)
             VALUES (?, ?, 'admin', 'approved', 'AIFB001', 1, ?)
@@ -159,7 +484,56 @@ def init_db():
 
     conn.commit()
     conn.close()
-    print(f"✅ Database Ready at: {DB_PATH}")
+    print(f"✅ Database Ready at: {db_postgres.DATABASE_URL if DB_BACKEND == 'postgres' else DB_PATH}")
+
+def migrate_to_shards():
+    # One-off copy of an existing single-file database into per-college shards.
+    # DB_PATH keeps its old tables as the catalog; only users are read from it afterwards.
+    if not DB_SHARDED:
+        print("⚠️ Set DB_SHARDED=1 before migrating")
+        return
+
+    catalog = _connect(DB_PATH)
+    legacy_tables = {r[0] for r in catalog.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    codes = [r[0] for r in catalog.execute("SELECT DISTINCT college_code FROM users WHERE college_code IS NOT NULL")]
+    catalog.close()
+
+    for code in codes:
+        if not COLLEGE_CODE.fullmatch(code):
+            print(f"⚠️ Skipping college code {code!r}: not usable as a shard name")
+            continue
+        conn = get_connection(code)
+        for table in ["teachers", "students", "feedback_forms", "feedback_responses", "approval_logs", "summary_runs",
+                      "response_topics", "form_topics"]:
+            if table not in legacy_tables:
+                continue
+            shard_cols = [r[1] for r in conn.execute(f"PRAGMA main.table_info({table})")]
+            legacy_cols = {r[1] for r in conn.execute(f"PRAGMA catalog.table_info({table})")}
+            cols = ", ".join(c for c in shard_cols if c in legacy_cols)
+            if table in ("feedback_responses", "summary_runs", "response_topics", "form_topics"):
+                where = "form_id IN (SELECT id FROM catalog.feedback_forms WHERE college_code = ?)"
+            else:
+                where = "college_code = ?"
+            conn.execute(f"INSERT OR IGNORE INTO main.{table} ({cols}) SELECT {cols} FROM catalog.{table} WHERE {where}", (code,))
+        # Legacy rows predate submitted_ts, so the insert triggers skipped them
+        backfill_responses(conn.cursor())
+        rebuild_rollups(conn.cursor())
+        conn.commit()
+        conn.close()
+        print(f"✅ Shard ready: {shard_path(code)}")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    import sys
+    if "--migrate-shards" in sys.argv:
+        init_db()
+        migrate_to_shards()
+    elif "--rebuild-rollups" in sys.argv:
+        init_db()
+        for shard in list_shards():
+            conn = get_connection(shard)
+            rebuild_rollups(conn.cursor())
+            conn.commit()
+            conn.close()
+            print(f"✅ Rollups rebuilt: {shard or DB_PATH}")
+    else:
+        init_db()
\ No newline at end of file
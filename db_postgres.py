@@ -0,0 +1,380 @@
+# db_postgres.py
+# PostgreSQL backend for db.get_connection (DB_BACKEND=postgres, DATABASE_URL=postgresql://...).
+# Requires: pip install "psycopg[binary,pool]"
+#
+# Connections come from a psycopg_pool pool and are wrapped so the app's SQLite-style SQL
+# keeps working: `?` placeholders, rows readable by name and index, cursor.lastrowid.
+import os
+import re
+import sqlite3
+import threading
+
+try:
+    import psycopg
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    psycopg = None
+
+DATABASE_URL = os.environ.get("DATABASE_URL", "postgresql://localhost/feedback_system")
+POOL_MIN = int(os.environ.get("DB_POOL_MIN", "2"))
+POOL_MAX = int(os.environ.get("DB_POOL_MAX", "20"))
+
+IntegrityError = psycopg.IntegrityError if psycopg else sqlite3.IntegrityError
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# --- ROW COMPATIBILITY (behaves like sqlite3.Row) ---
+class Row(tuple):
+    def __new__(cls, names, values):
+        row = super().__new__(cls, values)
+        row._index = names
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._index)
+
+def row_factory(cursor):
+    if cursor.description is None:
+        return tuple
+    names = {col.name: i for i, col in enumerate(cursor.description)}
+    return lambda values: Row(names, values)
+
+def translate(sql):
+    # sqlite "?" placeholders -> psycopg "%s"; literal % must be doubled
+    return sql.replace("%", "%%").replace("?", "%s")
+
+_INSERT = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+# Tables with a generated integer id: inserts into these report it as cursor.lastrowid.
+# Others (feedback_forms uses caller-chosen text ids, the rollup/topic tables have none) don't.
+ID_TABLES = {"users", "teachers", "students", "feedback_responses", "approval_logs", "summary_runs"}
+
+class PgCursor:
+    def __init__(self, cursor):
+        self._cur = cursor
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        sql = translate(sql)
+        # Emulate sqlite's lastrowid for single-row inserts into tables that have a serial id
+        insert = _INSERT.match(sql)
+        returning = bool(insert) and insert.group(1).lower() in ID_TABLES and "RETURNING" not in sql.upper()
+        if returning:
+            sql = sql.rstrip().rstrip(";") + " RETURNING id"
+        self._cur.execute(sql, params)
+        if returning:
+            row = self._cur.fetchone()
+            self.lastrowid = row[0] if row else None
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cur.executemany(translate(sql), seq_of_params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+class PgConnection:
+    backend = "postgres"
+
+    def __init__(self, pool, conn):
+        self._pool, self._conn = pool, conn
+
+    def cursor(self, name=None):
+        if name:
+            # Named cursors are server-side: rows stream in batches instead of one big fetch
+            return self._conn.cursor(name=name)
+        return PgCursor(self._conn.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        # Back to the pool with no transaction left open
+        if self._conn is None:
+            return
+        if self._conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+            self._conn.rollback()
+        self._pool.putconn(self._conn)
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def get_pool():
+    global _pool
+    if psycopg is None:
+        raise RuntimeError("DB_BACKEND=postgres requires psycopg (pip install \"psycopg[binary,pool]\")")
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DATABASE_URL, min_size=POOL_MIN, max_size=POOL_MAX,
+                                   kwargs={"row_factory": row_factory}, open=True)
+    return _pool
+
+def get_connection():
+    pool = get_pool()
+    return PgConnection(pool, pool.getconn())
+
+# --- LARGE READS AND BULK WRITES ---
+def iter_rows(conn, sql, params=(), batch_size=2000):
+    cur = conn.cursor(name=f"stream_{threading.get_ident()}")
+    cur.execute(translate(sql), params)
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cur.close()
+
+def copy_rows(conn, table, columns, rows):
+    with conn.cursor().copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+# --- SCHEMA ---
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT CHECK(role IN ('superadmin','admin','teacher','student')) NOT NULL,
+        status TEXT CHECK(status IN ('pending','approved','rejected')) DEFAULT 'pending',
+        college_code TEXT NOT NULL,
+        otp_code TEXT DEFAULT NULL,
+        otp_expiry TIMESTAMP DEFAULT NULL,
+        is_verified INTEGER DEFAULT 0,
+        created_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS teachers (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+        full_name TEXT,
+        college_code TEXT,
+        department TEXT,
+        position TEXT,
+        class_year TEXT,
+        division TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS students (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+        full_name TEXT,
+        prn_number TEXT UNIQUE,
+        college_code TEXT,
+        mobile_no TEXT,
+        department TEXT,
+        class_name TEXT,
+        academic_year TEXT,
+        teacher_name TEXT,
+        hod_name TEXT,
+        assigned_teacher_id INTEGER REFERENCES teachers(id) ON DELETE SET NULL,
+        profile_completion INTEGER DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS feedback_forms (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        college_code TEXT,
+        created_at TEXT,
+        teacher_id INTEGER REFERENCES teachers(id) ON DELETE CASCADE,
+        ai_summary TEXT DEFAULT NULL,
+        summary_last_response_id INTEGER DEFAULT 0,
+        summary_updated_at TEXT DEFAULT NULL,
+        topics_last_response_id INTEGER DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS feedback_responses (
+        id SERIAL PRIMARY KEY,
+        form_id TEXT REFERENCES feedback_forms(id) ON DELETE CASCADE,
+        student_id INTEGER REFERENCES students(id) ON DELETE CASCADE,
+        college_code TEXT,
+        feedback TEXT,
+        sentiment TEXT,
+        submitted_at TEXT,
+        submitted_ts BIGINT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS approval_logs (
+        id SERIAL PRIMARY KEY,
+        acted_by_user_id INTEGER,
+        target_user_id INTEGER,
+        college_code TEXT,
+        action TEXT,
+        role TEXT,
+        action_date TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_runs (
+        id SERIAL PRIMARY KEY,
+        form_id TEXT REFERENCES feedback_forms(id) ON DELETE CASCADE,
+        backend TEXT,
+        responses INTEGER,
+        chunks INTEGER,
+        input_tokens INTEGER,
+        output_tokens INTEGER,
+        duration_s REAL,
+        started_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS response_topics (
+        response_id INTEGER NOT NULL REFERENCES feedback_responses(id) ON DELETE CASCADE,
+        form_id TEXT,
+        topic TEXT NOT NULL,
+        score REAL,
+        PRIMARY KEY (response_id, topic)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS form_topics (
+        form_id TEXT NOT NULL REFERENCES feedback_forms(id) ON DELETE CASCADE,
+        topic TEXT NOT NULL,
+        positive INTEGER DEFAULT 0,
+        neutral INTEGER DEFAULT 0,
+        negative INTEGER DEFAULT 0,
+        total INTEGER DEFAULT 0,
+        PRIMARY KEY (form_id, topic)
+    )
+    """,
+    "ALTER TABLE feedback_forms ADD COLUMN IF NOT EXISTS topics_last_response_id INTEGER DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS idx_responses_form ON feedback_responses(form_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_responses_student ON feedback_responses(student_id)",
+    "CREATE INDEX IF NOT EXISTS idx_forms_college ON feedback_forms(college_code, created_at)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_responses_unique ON feedback_responses(form_id, student_id)",
+    "ALTER TABLE feedback_responses ADD COLUMN IF NOT EXISTS submitted_ts BIGINT",
+    "ALTER TABLE feedback_responses ADD COLUMN IF NOT EXISTS model_version TEXT",
+    "ALTER TABLE feedback_responses ADD COLUMN IF NOT EXISTS sentiment_confidence REAL",
+    "ALTER TABLE feedback_responses ADD COLUMN IF NOT EXISTS sentiment_attempts INTEGER DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS idx_responses_unscored ON feedback_responses(id) WHERE sentiment IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_responses_ts ON feedback_responses(college_code, submitted_ts)",
+    """
+    CREATE TABLE IF NOT EXISTS sentiment_rollups (
+        granularity TEXT NOT NULL,
+        bucket BIGINT NOT NULL,
+        form_id TEXT NOT NULL REFERENCES feedback_forms(id) ON DELETE CASCADE,
+        college_code TEXT,
+        teacher_id INTEGER,
+        positive INTEGER DEFAULT 0,
+        neutral INTEGER DEFAULT 0,
+        negative INTEGER DEFAULT 0,
+        total INTEGER DEFAULT 0,
+        PRIMARY KEY (granularity, bucket, form_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_rollups_college ON sentiment_rollups(college_code, granularity, bucket)",
+    "CREATE INDEX IF NOT EXISTS idx_rollups_teacher ON sentiment_rollups(teacher_id, granularity, bucket)",
+    # Same maintenance as db.rollup_trigger_sql, one function for inserts, deletes and sentiment updates
+    """
+    CREATE OR REPLACE FUNCTION maintain_sentiment_rollups() RETURNS trigger AS $$
+    DECLARE
+        r feedback_responses;
+        sign INTEGER;
+        g RECORD;
+        pass INTEGER;
+    BEGIN
+        -- An UPDATE takes the old row out (pass 1) and puts the new one in (pass 2)
+        FOR pass IN 1..(CASE WHEN TG_OP = 'UPDATE' THEN 2 ELSE 1 END) LOOP
+            IF TG_OP = 'INSERT' OR pass = 2 THEN r := NEW; sign := 1; ELSE r := OLD; sign := -1; END IF;
+            CONTINUE WHEN r.submitted_ts IS NULL;
+            FOR g IN SELECT * FROM (VALUES ('hour', 3600), ('day', 86400)) AS v(name, seconds) LOOP
+                INSERT INTO sentiment_rollups (granularity, bucket, form_id, college_code, teacher_id, positive, neutral, negative, total)
+                SELECT g.name, r.submitted_ts - r.submitted_ts % g.seconds, r.form_id, f.college_code, f.teacher_id,
+                       sign * COALESCE((r.sentiment = 'Positive')::int, 0), sign * COALESCE((r.sentiment = 'Neutral')::int, 0),
+                       sign * COALESCE((r.sentiment = 'Negative')::int, 0), sign
+                FROM feedback_forms f WHERE f.id = r.form_id
+                ON CONFLICT (granularity, bucket, form_id) DO UPDATE SET
+                    positive = sentiment_rollups.positive + excluded.positive,
+                    neutral = sentiment_rollups.neutral + excluded.neutral,
+                    negative = sentiment_rollups.negative + excluded.negative,
+                    total = sentiment_rollups.total + excluded.total;
+            END LOOP;
+        END LOOP;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER trg_rollups AFTER INSERT OR DELETE OR UPDATE OF sentiment ON feedback_responses
+    FOR EACH ROW EXECUTE FUNCTION maintain_sentiment_rollups()
+    """,
+]
+
+def create_schema(cur):
+    for statement in SCHEMA:
+        cur.execute(statement)
+
+# --- IMPORT FROM SQLITE ---
+TABLE_ORDER = ["users", "teachers", "students", "feedback_forms", "feedback_responses", "approval_logs", "summary_runs",
+               "response_topics", "form_topics"]
+
+def import_sqlite(sqlite_path):
+    from db import bulk_insert, rebuild_rollups
+    src = sqlite3.connect(sqlite_path)
+    existing = {r[0] for r in src.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    conn = get_connection()
+    create_schema(conn.cursor())
+
+    for table in TABLE_ORDER:
+        if table not in existing:
+            continue
+        pg_cols = [r[0] for r in conn.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position", (table,)
+        ).fetchall()]
+        columns = [r[1] for r in src.execute(f"PRAGMA table_info({table})") if r[1] in pg_cols]
+        bulk_insert(conn, table, columns, src.execute(f"SELECT {', '.join(columns)} FROM {table}"))
+        if table in ID_TABLES:
+            # COPY bypasses the SERIAL sequences
+            conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}")
+        print(f"✅ Imported {table}")
+
+    # Older SQLite files have no submitted_ts; backfill it and recount the trend rollups
+    conn.execute("UPDATE feedback_responses SET submitted_ts = EXTRACT(EPOCH FROM submitted_at::timestamp)::bigint "
+                 "WHERE submitted_ts IS NULL AND submitted_at IS NOT NULL")
+    rebuild_rollups(conn.cursor())
+    conn.commit()
+    conn.close()
+    src.close()
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) == 3 and sys.argv[1] == "--import-sqlite":
+        import_sqlite(sys.argv[2])
+    else:
+        print("usage: python db_postgres.py --import-sqlite data/feedback_system.db")
@@ -0,0 +1,154 @@
+# group_commit.py
+# One writer thread per process that batches INSERTs arriving within a few milliseconds
+# into a single transaction. Callers block until their row is committed, so an
+# acknowledged submission is exactly as durable as a direct conn.commit(). A caller that
+# is not acknowledged within ACK_TIMEOUT gets CommitPending: the row is still queued.
+#
+#   GROUP_COMMIT            "0" disables batching (each submit commits on its own)
+#   GROUP_COMMIT_WINDOW_MS  how long the writer waits to fill a batch (default 5)
+#   GROUP_COMMIT_MAX_BATCH  upper bound on rows per transaction (default 256)
+import os
+import time
+import queue
+import atexit
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+
+from db import get_connection, IntegrityError
+
+GROUP_COMMIT = os.environ.get("GROUP_COMMIT", "1") == "1"
+WINDOW_MS = float(os.environ.get("GROUP_COMMIT_WINDOW_MS", "5"))
+MAX_BATCH = int(os.environ.get("GROUP_COMMIT_MAX_BATCH", "256"))
+ACK_TIMEOUT = 30
+
+class CommitPending(Exception):
+    """Not acknowledged in time; the statement stays queued and may still commit."""
+
+class GroupCommitWriter:
+    def __init__(self, window_ms=WINDOW_MS, max_batch=MAX_BATCH, connect=get_connection):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.connect = connect
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stats = {"batches": 0, "rows": 0}
+        atexit.register(self.stop)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=ACK_TIMEOUT)
+
+    def submit(self, college_code, sql, params):
+        """Queue one statement and block until the batch containing it has committed.
+
+        Raises the statement's own error if it failed, or CommitPending if the writer has not
+        got to it within ACK_TIMEOUT (it is not withdrawn, so it must not be reported as failed).
+        """
+        if not GROUP_COMMIT:
+            conn = self.connect(college_code)
+            try:
+                conn.execute(sql, params)
+                conn.commit()
+            finally:
+                conn.close()
+            return
+
+        self.start()
+        future = Future()
+        self.queue.put((college_code, sql, params, future))
+        try:
+            future.result(timeout=ACK_TIMEOUT)
+        except TimeoutError:
+            raise CommitPending(f"not committed within {ACK_TIMEOUT}s, still queued") from None
+
+    # --- WRITER THREAD ---
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self.queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        # One transaction per database file (shard) and one executemany per statement
+        by_college = defaultdict(list)
+        for item in batch:
+            by_college[item[0]].append(item)
+
+        for college_code, items in by_college.items():
+            try:
+                conn = self.connect(college_code)
+            except Exception as e:
+                for item in items:
+                    item[3].set_exception(e)
+                continue
+            try:
+                try:
+                    self._commit(conn, items)
+                finally:
+                    conn.close()
+            except Exception as e:
+                # rollback() or close() failed: the writer carries on, and every row of this
+                # shard without an answer gets the error instead of a CommitPending later
+                for item in items:
+                    if not item[3].done():
+                        item[3].set_exception(e)
+
+    def _commit(self, conn, items):
+        by_sql = defaultdict(list)
+        for item in items:
+            by_sql[item[1]].append(item)
+        try:
+            for sql, group in by_sql.items():
+                conn.executemany(sql, [item[2] for item in group])
+            conn.commit()
+        except IntegrityError:
+            conn.rollback()
+            # Isolate the bad row(s): replay one by one so the rest of the batch still lands
+            for item in items:
+                try:
+                    conn.execute(item[1], item[2])
+                    conn.commit()
+                    item[3].set_result(True)
+                except Exception as e:
+                    conn.rollback()
+                    item[3].set_exception(e)
+            return
+        except Exception as e:
+            # Locked database, lost connection...: not the rows' fault, and replaying them one
+            # by one would only wait out the busy timeout again per row
+            conn.rollback()
+            for item in items:
+                item[3].set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(items)
+        for item in items:
+            item[3].set_result(True)
+
+response_writer = GroupCommitWriter()
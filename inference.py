@@ -0,0 +1,75 @@
+# inference.py
+# Async client for the models. Inference runs on its own bounded thread pool, so
+# coroutines awaiting a summary or a sentiment score never hold an event-loop or request thread.
+import os
+import asyncio
+import threading
+import contextvars
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+from summarizer import stream_final_summary
+from admission import SENTIMENT_GATE, SUMMARY_GATE, ModelBusy
+from instrumentation import timed
+
+try:
+    from model_utils import predict_sentiment_scored
+except ImportError:
+    def predict_sentiment_scored(text): return "Neutral", None, None
+
+# Enough threads for every admitted model call plus the sentiment callers waiting for a slot;
+# summary callers wait for theirs before they reach the pool
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", str(
+    SENTIMENT_GATE.concurrency + SENTIMENT_GATE.queue_size + SUMMARY_GATE.concurrency)))
+_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+_END = object()
+
+score_sentiment = SENTIMENT_GATE.guard(timed("sentiment")(predict_sentiment_scored))
+# (text, result) of a submission asgi.py scored before handing the request to the Flask view
+PRESCORED = contextvars.ContextVar("prescored", default=None)
+
+def prescored(text):
+    """This request's classify() result for `text`, if the ASGI layer already scored it."""
+    value = PRESCORED.get()
+    return value[1] if value and value[0] == text else None
+
+async def classify(text):
+    """(sentiment, confidence, model_version), or (None, None, None) when the model is saturated."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_executor, score_sentiment, text)
+    except ModelBusy:
+        return None, None, None
+
+async def stream_summary(feedback_list, college_code=None):
+    """Async iterator over stream_final_summary's (event, data) tuples."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            with closing(stream_final_summary(feedback_list, college_code=college_code)) as items:
+                for item in items:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+    producer = loop.run_in_executor(_executor, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Consumer gone (client disconnected, task cancelled): the backend stops generating, and
+        # this only returns once it has, so a model slot held by the caller is released on an idle model
+        cancelled.set()
+        await producer
@@ -0,0 +1,321 @@
+# instrumentation.py
+# Per-request timing breakdown (DB / template / sentiment / summary), Prometheus-format
+# metrics on /metrics and an opt-in sampling profiler for slow requests.
+#
+#   PROFILE_THRESHOLD_MS   enable the sampler; requests slower than this dump folded stacks
+#   PROFILE_INTERVAL_MS    sampling interval (default 5)
+#   PROFILE_DIR            where .folded files go (default data/profiles), feed them to flamegraph.pl
+#   METRICS_TOKEN          bearer token scrapers send to /metrics; without it the endpoint is off.
+#                          Requests carrying it also get a Server-Timing header
+#   SERVER_TIMING          1 = send Server-Timing to every client (local debugging only)
+import os
+import sys
+import hmac
+import time
+import inspect
+import functools
+import threading
+from collections import defaultdict
+from datetime import datetime
+from flask import g, request, has_request_context, before_render_template, template_rendered, Response
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+PROFILE_THRESHOLD_MS = float(os.environ.get("PROFILE_THRESHOLD_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join("data", "profiles"))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
+# --- METRIC STORE ---
+class Histogram:
+    def __init__(self, name, help_text, labels):
+        self.name, self.help, self.labels = name, help_text, labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            buckets, total, count = self.series.get(label_values, ([0] * len(BUCKETS), 0.0, 0))
+            buckets = [c + (value <= b) for c, b in zip(buckets, BUCKETS)]
+            self.series[label_values] = (buckets, total + value, count + 1)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (buckets, total, count) in sorted(self.series.items()):
+                labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+                for bound, bucket in zip(BUCKETS, buckets):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name, self.help, self.labels = name, help_text, labels
+        self.series = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.series[label_values] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.series.items()):
+                labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+                lines.append(f"{self.name}{{{labels}}} {value:g}")
+        return lines
+
+class Gauge:
+    """Current values, read from callbacks at scrape time."""
+    def __init__(self, name, help_text, labels):
+        self.name, self.help, self.labels = name, help_text, labels
+        self.series = {}
+
+    def track(self, read, *label_values):
+        self.series[label_values] = read
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for label_values, read in sorted(self.series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {read():g}")
+        return lines
+
+REQUEST_SECONDS = Histogram("app_request_seconds", "Total request handling time", ("route", "method", "status"))
+COMPONENT_SECONDS = Histogram("app_request_component_seconds", "Time spent per component within a request",
+                              ("route", "component"))
+CALL_SECONDS = Histogram("app_component_call_seconds", "Duration of individual instrumented calls", ("component",))
+DB_QUERIES = Counter("app_db_queries_total", "SQL statements executed", ("route",))
+SLOW_PROFILES = Counter("app_slow_request_profiles_total", "Slow requests dumped by the sampling profiler", ("route",))
+MODEL_ADMISSIONS = Counter("app_model_admissions_total", "Model calls by admission outcome", ("model", "outcome"))
+MODEL_SLOTS = Gauge("app_model_slots", "Model calls running or waiting for a slot", ("model", "state"))
+METRICS = [REQUEST_SECONDS, COMPONENT_SECONDS, CALL_SECONDS, DB_QUERIES, SLOW_PROFILES, MODEL_ADMISSIONS, MODEL_SLOTS]
+
+def current_route():
+    return (request.endpoint or "unknown") if has_request_context() else "background"
+
+def record(component, seconds):
+    CALL_SECONDS.observe(seconds, component)
+    if has_request_context() and hasattr(g, "timings"):
+        g.timings[component] += seconds
+
+# --- TIMING WRAPPERS ---
+def timed(component):
+    """Decorator that charges a function's wall time to `component`; generators are timed while iterated."""
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                it = fn(*args, **kwargs)
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(it)
+                        except StopIteration:
+                            record(component, time.perf_counter() - start)
+                            return
+                        record(component, time.perf_counter() - start)
+                        yield item
+                finally:
+                    # Closing the wrapper closes the generator now, not whenever it is collected
+                    it.close()
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(component, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class TimedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return getattr(self._cursor, method)(*args)
+        finally:
+            record("db", time.perf_counter() - start)
+
+    def execute(self, *args):
+        DB_QUERIES.inc(current_route())
+        self._timed("execute", *args)
+        return self
+
+    def executemany(self, *args):
+        DB_QUERIES.inc(current_route())
+        self._timed("executemany", *args)
+        return self
+
+    def fetchone(self):
+        return self._timed("fetchone")
+
+    def fetchall(self):
+        return self._timed("fetchall")
+
+    def fetchmany(self, *args):
+        return self._timed("fetchmany", *args)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class TimedConnection:
+    """Proxy around a DB-API connection that charges statement and commit time to 'db'."""
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def execute(self, *args):
+        return TimedCursor(self._conn.cursor()).execute(*args)
+
+    def executemany(self, *args):
+        return TimedCursor(self._conn.cursor()).executemany(*args)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return self._conn.commit()
+        finally:
+            record("db", time.perf_counter() - start)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def instrument_connection(factory):
+    @functools.wraps(factory)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        conn = factory(*args, **kwargs)
+        record("db", time.perf_counter() - start)
+        return TimedConnection(conn)
+    return wrapper
+
+# --- SAMPLING PROFILER ---
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into folded-stack counts."""
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id, self.interval = thread_id, interval
+        self.stacks = defaultdict(int)
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def dump_profile(route, duration, stacks):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{route.replace('.', '_')}_{int(duration * 1000)}ms.folded"
+    with open(os.path.join(PROFILE_DIR, name), "w") as f:
+        for stack, count in stacks.items():
+            f.write(f"{stack} {count}\n")
+    SLOW_PROFILES.inc(route)
+
+def observe_request(route, method, status, duration, timings, sampler=None):
+    REQUEST_SECONDS.observe(duration, route, method, status)
+    accounted = 0.0
+    for component, seconds in timings.items():
+        COMPONENT_SECONDS.observe(seconds, route, component)
+        accounted += seconds
+    COMPONENT_SECONDS.observe(max(duration - accounted, 0.0), route, "other")
+
+    if sampler is not None:
+        sampler.stop()
+        if duration * 1000 >= PROFILE_THRESHOLD_MS and sampler.stacks:
+            dump_profile(route, duration, sampler.stacks)
+
+# --- FLASK HOOKS ---
+def has_metrics_token():
+    if not METRICS_TOKEN:
+        return False
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+
+def init_instrumentation(app):
+    @app.before_request
+    def _start_timer():
+        g.timings = defaultdict(float)
+        g.request_start = time.perf_counter()
+        g.sampler = None
+        if PROFILE_THRESHOLD_MS > 0:
+            g.sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+            g.sampler.start()
+
+    @app.after_request
+    def _stop_timer(response):
+        if not hasattr(g, "request_start"):
+            return response
+        route, method, timings, start, sampler = current_route(), request.method, g.timings, g.request_start, g.sampler
+        status = str(response.status_code)
+        # Per-component timings tell an outsider which requests reach the database or the model
+        if SERVER_TIMING or app.debug or has_metrics_token():
+            response.headers["Server-Timing"] = ", ".join(
+                f"{component};dur={seconds * 1000:.1f}" for component, seconds in timings.items()
+            ) or f"total;dur={(time.perf_counter() - start) * 1000:.1f}"
+
+        def finish():
+            observe_request(route, method, status, time.perf_counter() - start, timings, sampler)
+
+        if response.is_streamed:
+            # The body (and the model time charged while producing it) comes after this hook;
+            # the request is only complete once the server closes the response
+            response.call_on_close(finish)
+        else:
+            finish()
+        return response
+
+    # Template render time: signal pairs fire on the rendering thread
+    def _render_started(sender, template, context, **extra):
+        g.render_start = time.perf_counter()
+
+    def _render_finished(sender, template, context, **extra):
+        if "render_start" in g:
+            record("template", time.perf_counter() - g.pop("render_start"))
+
+    before_render_template.connect(_render_started, app, weak=False)
+    template_rendered.connect(_render_finished, app, weak=False)
+
+    @app.route("/metrics")
+    def metrics():
+        # Source addresses say nothing behind a reverse proxy, so scrapers authenticate with a token
+        if not METRICS_TOKEN:
+            return "Not Found", 404
+        if not has_metrics_token():
+            return "Unauthorized", 401, {"WWW-Authenticate": 'Bearer realm="metrics"'}
+        lines = []
+        for metric in METRICS:
+            lines.extend(metric.render())
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,162 @@
+# model_registry.py
+# Versioned local store for the sentiment model:
+#
+#   models/
+#     v1/  config.json, model.safetensors, tokenizer files..., manifest.json
+#     v2/  ...
+#     CURRENT            -> name of the version serving traffic
+#
+#   python model_registry.py register student_feedback_tinybert_distilled --metrics results/distillation_report.json
+#   python model_registry.py activate v2
+#   python model_registry.py rollback
+#   python model_registry.py list
+#
+# Running workers poll CURRENT (see model_utils) and hot-swap to the new version without
+# a restart, so activation is just an atomic rename of that file.
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+
+REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", "models")
+CURRENT_FILE = "CURRENT"
+MANIFEST = "manifest.json"
+
+def version_path(version):
+    return os.path.join(REGISTRY_DIR, version)
+
+def checksum(folder):
+    # sha256 over every file except the manifest, in a stable order
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if name == MANIFEST or not os.path.isfile(path):
+            continue
+        h.update(name.encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+def read_manifest(version):
+    with open(os.path.join(version_path(version), MANIFEST)) as f:
+        return json.load(f)
+
+def list_versions():
+    if not os.path.isdir(REGISTRY_DIR):
+        return []
+    versions = [v for v in os.listdir(REGISTRY_DIR) if os.path.isfile(os.path.join(version_path(v), MANIFEST))]
+    # Registration order; the manifest mtime breaks ties within the same second
+    return sorted(versions, key=lambda v: (read_manifest(v)["created_at"],
+                                           os.stat(os.path.join(version_path(v), MANIFEST)).st_mtime_ns))
+
+def current_version():
+    try:
+        with open(os.path.join(REGISTRY_DIR, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def current_stamp():
+    """Identifies one write of CURRENT: activate() replaces the file, so re-activating a version changes it."""
+    try:
+        stat = os.stat(os.path.join(REGISTRY_DIR, CURRENT_FILE))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+def verify(version):
+    return checksum(version_path(version)) == read_manifest(version)["sha256"]
+
+def register(source_dir, version=None, metrics=None, notes=None):
+    """Copy a saved model folder into the registry and write its manifest. Returns the version name."""
+    existing = list_versions()
+    version = version or f"v{len(existing) + 1}"
+    target = version_path(version)
+    if os.path.exists(target):
+        raise ValueError(f"Version {version} already exists")
+
+    staging = target + ".tmp"
+    shutil.copytree(source_dir, staging)
+    manifest = {
+        "version": version,
+        "source": os.path.abspath(source_dir),
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sha256": checksum(staging),
+        "metrics": metrics or {},
+        "notes": notes,
+    }
+    with open(os.path.join(staging, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(staging, target)
+    return version
+
+def activate(version):
+    if version not in list_versions():
+        raise ValueError(f"Unknown model version {version}")
+    if not verify(version):
+        raise ValueError(f"Checksum mismatch for {version}; refusing to activate")
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    tmp = os.path.join(REGISTRY_DIR, CURRENT_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(REGISTRY_DIR, CURRENT_FILE))
+
+def previous_version():
+    versions, current = list_versions(), current_version()
+    if current not in versions or versions.index(current) == 0:
+        return None
+    return versions[versions.index(current) - 1]
+
+def load_metrics(path, source_dir):
+    # Accept a flat JSON object, or the distillation report (list of rows, one per model)
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        source = os.path.abspath(source_dir)
+        data = next((row for row in data if os.path.abspath(row.get("model", "")) == source), data[-1] if data else {})
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment model registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    reg = sub.add_parser("register")
+    reg.add_argument("source_dir")
+    reg.add_argument("--version")
+    reg.add_argument("--metrics", help="JSON file with evaluation metrics")
+    reg.add_argument("--notes")
+    reg.add_argument("--activate", action="store_true")
+    act = sub.add_parser("activate")
+    act.add_argument("version")
+    sub.add_parser("rollback")
+    sub.add_parser("list")
+    args = parser.parse_args()
+
+    if args.command == "register":
+        metrics = load_metrics(args.metrics, args.source_dir) if args.metrics else None
+        version = register(args.source_dir, args.version, metrics, args.notes)
+        print(f"✅ Registered {version} from {args.source_dir}")
+        if args.activate:
+            activate(version)
+            print(f"🚀 Activated {version}")
+    elif args.command == "activate":
+        activate(args.version)
+        print(f"🚀 Activated {args.version}")
+    elif args.command == "rollback":
+        previous = previous_version()
+        if not previous:
+            sys.exit("Nothing to roll back to")
+        activate(previous)
+        print(f"⏪ Rolled back to {previous}")
+    else:
+        current = current_version()
+        for version in list_versions():
+            m = read_manifest(version)
+            marker = "*" if version == current else " "
+            print(f"{marker} {version:<8}{m['created_at']:<22}{json.dumps(m['metrics'])[:60]}")
+
+if __name__ == "__main__":
+    main()
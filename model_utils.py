@@ -1,29 +1,175 @@
+import os
+import json
+import threading
+import time
 import torch
-from transformers import BertTokenizer, BertForSequenceClassification
-
-# Load model ONCE when server starts
-try:
-    # Point to the folder where modeltrain.py saved the model
-    MODEL_PATH = "student_feedback_bert" 
-    tokenizer = BertTokenizer.from_pretrained(MODEL_PATH)
-    model = BertForSequenceClassification.from_pretrained(MODEL_PATH, num_labels=3)
-    model.eval()
-    print("✅ Custom Model Loaded Successfully")
-except:
-    print("⚠️ Custom Model not found, loading base BERT (Predictions will be random)")
-    tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
-    model = BertForSequenceClassification.from_pretrained("bert-base-uncased", num_labels=3)
+from transformers import BertForSequenceClassification
+from tokenization import load_tokenizer, encode_batch, encode_windows, MAX_LENGTH
+import model_registry
+
+LABELS = ["Negative", "Neutral", "Positive"]
+POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", "5"))
+# Written by modules/cascade.py; without it every text goes straight to the full model
+CASCADE_CONFIG = os.environ.get("CASCADE_CONFIG", os.path.join("results", "cascade.json"))
+# Long feedback is scored over overlapping windows instead of its first MAX_LENGTH tokens
+WINDOWED = os.environ.get("SENTIMENT_WINDOWS", "1") == "1"
+WARMUP_TEXTS = ["The teacher explained concepts very clearly.", "Labs are okay.",
+                "The wifi in the classroom never works and nobody fixes it."]
+
+class LoadedModel:
+    def __init__(self, version, path, fallback=None):
+        self.version = version
+        self.tokenizer = load_tokenizer(path, fallback=fallback)
+        self.model = BertForSequenceClassification.from_pretrained(path, num_labels=3)
+        self.model.eval()
+
+    def warm(self):
+        # First calls allocate buffers and pick kernels; pay that before taking traffic
+        for batch in ([WARMUP_TEXTS[0]], WARMUP_TEXTS):
+            with torch.no_grad():
+                self.model(**encode_batch(self.tokenizer, batch, return_tensors="pt"))
+        return self
+
+def load_initial():
+    version = model_registry.current_version()
+    if version:
+        try:
+            return LoadedModel(version, model_registry.version_path(version)).warm()
+        except Exception as e:
+            print(f"⚠️ Registry model {version} failed to load ({e}), falling back")
+    # Load model ONCE when server starts
+    try:
+        # Point to the folder where modeltrain.py saved the model
+        MODEL_PATH = "student_feedback_bert"
+        loaded = LoadedModel(MODEL_PATH, MODEL_PATH)
+        print("✅ Custom Model Loaded Successfully")
+        return loaded
+    except:
+        print("⚠️ Custom Model not found, loading base BERT (Predictions will be random)")
+        return LoadedModel("bert-base-uncased", "bert-base-uncased")
+
+# Swapped as a single reference, so a request always sees one consistent model/tokenizer pair
+_active = load_initial()
+
+def active_version():
+    return _active.version
+
+def active_model():
+    return _active
+
+def swap_to(version):
+    """Load, verify and warm `version` off the request path, then switch to it atomically."""
+    global _active
+    if not model_registry.verify(version):
+        raise ValueError(f"Checksum mismatch for model {version}")
+    start = time.perf_counter()
+    loaded = LoadedModel(version, model_registry.version_path(version)).warm()
+    previous, _active = _active.version, loaded
+    print(f"🔄 Sentiment model {previous} -> {version} ({time.perf_counter() - start:.1f}s load, no downtime)")
+
+def _watch_registry():
+    # The CURRENT write whose version failed to load. Keyed on the write, not the version name,
+    # so activating the version again (e.g. after repairing it) gets a fresh attempt.
+    failed_stamp = None
+    while True:
+        time.sleep(POLL_SECONDS)
+        stamp = version = None
+        try:
+            stamp = model_registry.current_stamp()
+            if stamp is None or stamp == failed_stamp:
+                continue
+            version = model_registry.current_version()
+            if version and version != _active.version:
+                swap_to(version)
+        except Exception as e:
+            # Keep serving the current model; not retried until CURRENT is written again
+            failed_stamp = stamp
+            print(f"⚠️ Model hot-swap to {version} failed: {e}")
+
+if POLL_SECONDS > 0:
+    threading.Thread(target=_watch_registry, name="model-registry-watch", daemon=True).start()
+
+# --- CONFIDENCE CASCADE ---
+# A small model (the distilled bert-tiny) answers on its own when its temperature-calibrated
+# probability clears the threshold picked by modules/cascade.py; only the uncertain rest is
+# escalated to the full model.
+class Cascade:
+    def __init__(self, config):
+        self.threshold = config["threshold"]
+        self.fast_temperature = config["fast_temperature"]
+        self.slow_temperature = config["slow_temperature"]
+        self.slow_version = config.get("slow_version")
+        path = config["fast_model"]
+        self.fast = LoadedModel(os.path.basename(os.path.normpath(path)), path).warm()
+
+    def temperature_for(self, loaded):
+        # Calibration only holds for the full model it was fitted on; a hot-swapped one gets raw softmax
+        return self.slow_temperature if loaded.version == self.slow_version else 1.0
+
+def load_cascade():
+    if os.environ.get("CASCADE", "1") == "0" or not os.path.exists(CASCADE_CONFIG):
+        return None
+    try:
+        with open(CASCADE_CONFIG) as f:
+            cascade = Cascade(json.load(f))
+        print(f"✅ Sentiment cascade: {cascade.fast.version} answers at p >= {cascade.threshold:.3f}")
+        return cascade
+    except Exception as e:
+        print(f"⚠️ Sentiment cascade disabled ({e}); every text uses the full model")
+        return None
+
+_cascade = load_cascade()
+
+def score(loaded, texts, temperature=1.0, batch_size=64, windowed=WINDOWED, max_length=MAX_LENGTH):
+    """(label index, calibrated probability) per text.
+
+    Windowed: all windows of a batch go through one forward pass, and a text's probabilities
+    are the mean over its windows weighted by their real-token counts. Short texts have a
+    single window, so they cost exactly what plain truncation does.
+    """
+    scored = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        if windowed:
+            inputs, owners = encode_windows(loaded.tokenizer, chunk, max_length)
+        else:
+            inputs, owners = encode_batch(loaded.tokenizer, chunk, max_length, return_tensors="pt"), list(range(len(chunk)))
+        with torch.no_grad():
+            probs = torch.softmax(loaded.model(**inputs).logits / temperature, dim=-1)
+        if len(owners) > len(chunk):
+            weights = inputs["attention_mask"].sum(dim=1, keepdim=True).to(probs.dtype)
+            index = torch.tensor(owners)
+            totals = torch.zeros(len(chunk), probs.shape[1], dtype=probs.dtype).index_add_(0, index, probs * weights)
+            probs = totals / torch.zeros(len(chunk), 1, dtype=probs.dtype).index_add_(0, index, weights)
+        best = probs.max(dim=-1)
+        scored.extend(zip(best.indices.tolist(), best.values.tolist()))
+    return scored
+
+def classify(texts, batch_size=64):
+    """(label, calibrated probability, model version) per text."""
+    texts = list(texts)
+    active, cascade = _active, _cascade
+    results = [None] * len(texts)
+    pending = list(range(len(texts)))
+
+    if cascade:
+        escalate = []
+        for i, (label, prob) in zip(pending, score(cascade.fast, texts, cascade.fast_temperature, batch_size)):
+            if prob >= cascade.threshold:
+                results[i] = (LABELS[label], prob, cascade.fast.version)
+            else:
+                escalate.append(i)
+        pending = escalate
+
+    if pending:
+        temperature = cascade.temperature_for(active) if cascade else 1.0
+        scored = score(active, [texts[i] for i in pending], temperature, batch_size)
+        for i, (label, prob) in zip(pending, scored):
+            results[i] = (LABELS[label], prob, active.version)
+    return results
+
+def predict_sentiment_scored(text):
+    return classify([text])[0]
 
 def predict_sentiment(text):
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=128
-    )
-    with torch.no_grad():
-        outputs = model(**inputs)
-
-    labels = ["Negative", "Neutral", "Positive"]
-    return labels[torch.argmax(outputs.logits).item()]
\ No newline at end of file
+    return predict_sentiment_scored(text)[0]
\ No newline at end of file
@@ -1,7 +1,7 @@
 import streamlit as st
 from datetime import datetime
-import pandas as pd
 from db import get_connection
+from modules import queries
 
 # ---------------- ADMIN LOGIN ----------------
 def admin_login():
@@ -15,7 +15,7 @@ def admin_login():
         cur = conn.cursor()
 
         cur.execute("""
-            SELECT id, status
+            SELECT id, status, college_code
             FROM users
             WHERE email=? AND password=? AND role='admin'
         """, (email, password))
@@ -27,7 +27,7 @@ def admin_login():
             st.error("Invalid admin credentials")
             return
 
-        user_id, status = row
+        user_id, status, college_code = row
 
         if status != "approved":
             st.error("Admin account not approved")
@@ -35,6 +35,7 @@ def admin_login():
 
         st.session_state.admin_logged_in = True
         st.session_state.admin_user_id = user_id
+        st.session_state.admin_college_code = college_code
         st.success("Admin login successful")
         st.rerun()
 
@@ -74,6 +75,7 @@ def add_teacher():
             """, (user_id, name, department, designation))
 
             conn.commit()
+            queries.teachers_page.clear()
             st.success("Teacher added and approved")
 
         except Exception:
@@ -86,117 +88,95 @@ def add_teacher():
 def manage_teachers():
     st.subheader("👩‍🏫 Manage Teachers")
 
-    conn = get_connection()
-    cur = conn.cursor()
+    college_code = st.session_state.get("admin_college_code")
+    teachers, total = queries.teachers_page(college_code, queries.current_page("teachers_page"))
 
-    cur.execute("""
-        SELECT users.id, teachers.full_name, users.email, users.status
-        FROM users
-        JOIN teachers ON teachers.user_id = users.id
-        WHERE users.role='teacher'
-    """)
-
-    teachers = cur.fetchall()
-
-    if not teachers:
+    if not total:
         st.info("No teachers found")
-        conn.close()
         return
 
-    for user_id, name, email, status in teachers:
+    for user_id, name, email, status in teachers.itertuples(index=False):
         with st.expander(f"{name} | {email} | {status.upper()}"):
             col1, col2 = st.columns(2)
 
             with col1:
                 if st.button("✅ Approve", key=f"approve_teacher_{user_id}"):
-                    cur.execute("UPDATE users SET status='approved' WHERE id=?", (user_id,))
-                    conn.commit()
+                    set_teacher_status(int(user_id), "approved", college_code)
                     st.success("Teacher approved")
                     st.rerun()
 
             with col2:
                 if st.button("❌ Reject", key=f"reject_teacher_{user_id}"):
-                    cur.execute("UPDATE users SET status='rejected' WHERE id=?", (user_id,))
-                    conn.commit()
+                    set_teacher_status(int(user_id), "rejected", college_code)
                     st.error("Teacher rejected")
                     st.rerun()
 
-    conn.close()
+    queries.paginator(total, "teachers_page")
+
+def set_teacher_status(user_id, status, college_code):
+    # Logged like approvals made from the web app
+    queries.write([
+        ("UPDATE users SET status=? WHERE id=?", (status, user_id)),
+        ("""
+            INSERT INTO approval_logs
+            (acted_by_user_id, target_user_id, college_code, action, role, action_date)
+            VALUES (?, ?, ?, ?, 'teacher', ?)
+        """, (
+            st.session_state.admin_user_id,
+            user_id,
+            college_code,
+            status,
+            datetime.now().strftime("%d %b %Y %H:%M")
+        )),
+    ], college_code)
+    queries.teachers_page.clear()
+    queries.approval_logs_page.clear()
 
 # ---------------- VIEW STUDENTS ----------------
 def view_students():
     st.subheader("🧑‍🎓 All Students")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT students.full_name, students.prn_number, users.status
-        FROM students
-        JOIN users ON users.id = students.user_id
-    """)
-
-    rows = cur.fetchall()
-    conn.close()
+    search = st.text_input("Search by name or PRN", key="students_search").strip()
+    df, total = queries.students_page(st.session_state.get("admin_college_code"),
+                                      queries.current_page("students_page"), search)
 
-    if not rows:
+    if not total:
         st.info("No students found")
         return
 
-    df = pd.DataFrame(rows, columns=["Name", "PRN", "Status"])
     st.dataframe(df, use_container_width=True)
+    queries.paginator(total, "students_page")
 
 # ---------------- VIEW ALL FEEDBACKS ----------------
 def view_all_feedbacks():
     st.subheader("📊 All Feedbacks (System-wide)")
 
-    conn = get_connection()
-    cur = conn.cursor()
+    # Chart from a GROUP BY; the table pages through rows instead of loading them all
+    college_code = st.session_state.get("admin_college_code")
+    counts = queries.sentiment_counts(college_code)
 
-    cur.execute("""
-        SELECT feedback_forms.title,
-               feedback_responses.feedback,
-               feedback_responses.sentiment
-        FROM feedback_responses
-        JOIN feedback_forms ON feedback_forms.id = feedback_responses.form_id
-    """)
-
-    rows = cur.fetchall()
-    conn.close()
-
-    if not rows:
+    if counts.empty:
         st.info("No feedback available")
         return
 
-    df = pd.DataFrame(rows, columns=["Feedback Title", "Feedback", "Sentiment"])
+    st.bar_chart(counts)
+    df, total = queries.feedback_page(college_code, queries.current_page("feedback_page"))
     st.dataframe(df, use_container_width=True)
-    st.bar_chart(df["Sentiment"].value_counts())
+    queries.paginator(total, "feedback_page")
 
 # ---------------- VIEW APPROVAL LOGS ----------------
 def view_approval_logs():
     st.subheader("📜 Approval Logs")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT acted_by_user_id, target_user_id, action, role, action_date
-        FROM approval_logs
-        ORDER BY action_date DESC
-    """)
-
-    rows = cur.fetchall()
-    conn.close()
+    df, total = queries.approval_logs_page(st.session_state.get("admin_college_code"),
+                                           queries.current_page("logs_page"))
 
-    if not rows:
+    if not total:
         st.info("No approval logs found")
         return
 
-    df = pd.DataFrame(
-        rows,
-        columns=["By User ID", "Target User ID", "Action", "Role", "Date"]
-    )
     st.dataframe(df, use_container_width=True)
+    queries.paginator(total, "logs_page")
 
 # ---------------- ADMIN DASHBOARD ----------------
 def admin_dashboard():
@@ -0,0 +1,213 @@
+# cascade.py
+# Calibrates the two stages of the sentiment cascade used by model_utils and picks the
+# confidence threshold at which the small model may answer alone. Run from modules/ like
+# distill.py, after the distilled student exists:
+#
+#   python cascade.py --fast student_feedback_tinybert_distilled --slow ../student_feedback_bert
+#
+# The held-out split is cut in two. On the calibration half both models are temperature-scaled
+# (so stored probabilities mean what they say) and the lowest threshold whose cascade accuracy
+# still meets --target-accuracy (default: the full model's own accuracy) is picked; the numbers
+# written to ../results/cascade.json are measured on the evaluation half, which neither step saw.
+# Texts are scored the way model_utils.score serves them, windows included (SENTIMENT_WINDOWS).
+import argparse
+import json
+import os
+import time
+
+import torch
+import torch.nn.functional as F
+from transformers import AutoModelForSequenceClassification
+
+from studfeedload import test_texts, test_labels
+from tokenization import load_tokenizer, encode_batch, encode_windows
+
+CONFIG_PATH = os.path.join("..", "results", "cascade.json")
+# Same switch model_utils reads; importing model_utils would load the serving models
+WINDOWED = os.environ.get("SENTIMENT_WINDOWS", "1") == "1"
+
+# ===============================
+# 1️⃣ Held-out Logits
+# ===============================
+def load(model_dir):
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    return model, load_tokenizer(model_dir, fallback="bert-base-uncased")
+
+def held_out_logits(model, tok, texts, batch_size=64, windowed=WINDOWED):
+    """(logits, owners, weights) for every window model_utils.score would run on `texts`."""
+    logits, owners, weights = [], [], []
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            if windowed:
+                inputs, owner = encode_windows(tok, chunk)
+            else:
+                inputs, owner = encode_batch(tok, chunk, return_tensors="pt"), range(len(chunk))
+            logits.append(model(**inputs).logits)
+            owners.extend(start + o for o in owner)
+            weights.append(inputs["attention_mask"].sum(dim=1))
+    return torch.cat(logits), torch.tensor(owners), torch.cat(weights).float()
+
+def text_probs(windows, temperature=1.0):
+    """Per-text probabilities as model_utils.score computes them: the softmax of each window at
+    `temperature`, averaged over a text's windows weighted by their real-token counts.
+
+    `windows` is held_out_logits' triple, or a plain logits tensor with one window per text.
+    """
+    if torch.is_tensor(windows):
+        return F.softmax(windows / temperature, dim=-1)
+    logits, owners, weights = windows
+    probs = F.softmax(logits / temperature, dim=-1) * weights[:, None]
+    texts = int(owners.max()) + 1
+    totals = torch.zeros(texts, probs.shape[1]).index_add_(0, owners, probs)
+    return totals / torch.zeros(texts, 1).index_add_(0, owners, weights[:, None])
+
+def split_held_out(n, calibration_fraction=0.5, seed=0):
+    """Disjoint (calibration, evaluation) index lists over n held-out texts, the same on every run."""
+    order = torch.randperm(n, generator=torch.Generator().manual_seed(seed)).tolist()
+    cut = int(n * calibration_fraction)
+    return order[:cut], order[cut:]
+
+def latency_ms(model, tok, texts, runs=200):
+    # Single-text latency, which is what a submission pays per stage
+    timings = []
+    with torch.no_grad():
+        for text in (texts * (runs // max(len(texts), 1) + 1))[:runs]:
+            start = time.perf_counter()
+            inputs = encode_windows(tok, [text])[0] if WINDOWED else encode_batch(tok, [text], return_tensors="pt")
+            model(**inputs)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+# ===============================
+# 2️⃣ Temperature Scaling
+# ===============================
+def fit_temperature(windows, labels):
+    # One scalar, so a grid over the NLL is exact enough and cannot diverge. The NLL is taken on
+    # the window-averaged probabilities, since that is what the threshold is compared against
+    grid = [0.25 + 0.05 * i for i in range(96)]
+    return min(grid, key=lambda t: F.nll_loss(text_probs(windows, t).clamp_min(1e-12).log(), labels).item())
+
+def expected_calibration_error(probs, labels, bins=10):
+    conf, pred = probs.max(dim=-1)
+    correct = (pred == labels).float()
+    ece = 0.0
+    for lo in range(bins):
+        mask = (conf > lo / bins) & (conf <= (lo + 1) / bins)
+        if mask.any():
+            ece += mask.float().mean().item() * abs(conf[mask].mean().item() - correct[mask].mean().item())
+    return ece
+
+# ===============================
+# 3️⃣ Threshold Search
+# ===============================
+def pick_threshold(fast_probs, slow_probs, labels, target):
+    """Lowest threshold (fewest escalations) whose cascade accuracy is >= target, or None."""
+    conf, fast_pred = fast_probs.max(dim=-1)
+    fast_ok = (fast_pred == labels).float()
+    slow_ok = (slow_probs.argmax(dim=-1) == labels).float()
+    n = len(labels)
+
+    # Walk thresholds from high to low: texts enter the fast stage in order of confidence
+    order = torch.argsort(conf, descending=True)
+    fast_correct = torch.cumsum(fast_ok[order], 0)
+    slow_correct_rest = slow_ok.sum() - torch.cumsum(slow_ok[order], 0)
+    # Escalating everything is the full model alone
+    best = {"threshold": 1.01, "accuracy": slow_ok.mean().item(), "escalation_rate": 1.0} if slow_ok.mean() >= target else None
+    for k in range(n):
+        # Ties: only cut where the next confidence is strictly lower
+        if k + 1 < n and conf[order[k + 1]] == conf[order[k]]:
+            continue
+        accuracy = (fast_correct[k] + slow_correct_rest[k]).item() / n
+        if accuracy >= target:
+            best = {"threshold": conf[order[k]].item(), "accuracy": accuracy, "escalation_rate": 1 - (k + 1) / n}
+    return best
+
+def cascade_metrics(fast_probs, slow_probs, labels, threshold):
+    """Accuracy and escalation rate at `threshold`, routing as model_utils.classify does."""
+    conf, fast_pred = fast_probs.max(dim=-1)
+    escalated = conf < threshold
+    pred = torch.where(escalated, slow_probs.argmax(dim=-1), fast_pred)
+    return {"accuracy": (pred == labels).float().mean().item(), "escalation_rate": escalated.float().mean().item()}
+
+# ===============================
+# 4️⃣ Main
+# ===============================
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the sentiment cascade and choose its threshold")
+    parser.add_argument("--fast", default="student_feedback_tinybert_distilled")
+    parser.add_argument("--slow", default=os.path.join("..", "student_feedback_bert"),
+                        help="full model folder; pass ../models/vN when serving from the registry")
+    parser.add_argument("--target-accuracy", type=float, default=None,
+                        help="held-out accuracy the cascade must reach (default: the full model's)")
+    parser.add_argument("--calibration-fraction", type=float, default=0.5,
+                        help="share of the held-out split used to fit temperatures and the threshold")
+    parser.add_argument("--output", default=CONFIG_PATH)
+    args = parser.parse_args()
+
+    calibration, evaluation = split_held_out(len(test_texts), args.calibration_fraction)
+    if not calibration or not evaluation:
+        raise SystemExit("--calibration-fraction must leave texts on both sides of the split")
+    cal_texts, eval_texts = [test_texts[i] for i in calibration], [test_texts[i] for i in evaluation]
+    cal_labels = torch.tensor([test_labels[i] for i in calibration])
+    eval_labels = torch.tensor([test_labels[i] for i in evaluation])
+    fast, fast_tok = load(args.fast)
+    slow, slow_tok = load(args.slow)
+    fast_cal, slow_cal = held_out_logits(fast, fast_tok, cal_texts), held_out_logits(slow, slow_tok, cal_texts)
+    fast_eval, slow_eval = held_out_logits(fast, fast_tok, eval_texts), held_out_logits(slow, slow_tok, eval_texts)
+
+    fast_t, slow_t = fit_temperature(fast_cal, cal_labels), fit_temperature(slow_cal, cal_labels)
+    fast_probs, slow_probs = text_probs(fast_eval, fast_t), text_probs(slow_eval, slow_t)
+    for name, windows, t, probs in [("fast", fast_eval, fast_t, fast_probs), ("slow", slow_eval, slow_t, slow_probs)]:
+        print(f"{name}: T={t:.2f}  ECE {expected_calibration_error(text_probs(windows), eval_labels):.4f}"
+              f" -> {expected_calibration_error(probs, eval_labels):.4f}")
+
+    cal_fast, cal_slow = text_probs(fast_cal, fast_t), text_probs(slow_cal, slow_t)
+    target = args.target_accuracy
+    if target is None:
+        target = (cal_slow.argmax(dim=-1) == cal_labels).float().mean().item()
+    choice = pick_threshold(cal_fast, cal_slow, cal_labels, target)
+    if choice is None:
+        raise SystemExit(f"No threshold reaches accuracy {target:.4f}; the cascade would lose accuracy")
+
+    # Reported numbers come from the evaluation half only
+    slow_accuracy = (slow_probs.argmax(dim=-1) == eval_labels).float().mean().item()
+    result = cascade_metrics(fast_probs, slow_probs, eval_labels, choice["threshold"])
+    fast_ms, slow_ms = latency_ms(fast, fast_tok, eval_texts), latency_ms(slow, slow_tok, eval_texts)
+    cost_ms = fast_ms + result["escalation_rate"] * slow_ms
+    config = {
+        "fast_model": os.path.abspath(args.fast),
+        "fast_temperature": fast_t,
+        "slow_version": os.path.basename(os.path.normpath(args.slow)),
+        "slow_temperature": slow_t,
+        "threshold": choice["threshold"],
+        "held_out": {
+            "calibration_size": len(calibration),
+            "evaluation_size": len(evaluation),
+            "windowed": WINDOWED,
+            "target_accuracy": round(target, 4),
+            "calibration_accuracy": round(choice["accuracy"], 4),
+            "slow_accuracy": round(slow_accuracy, 4),
+            "cascade_accuracy": round(result["accuracy"], 4),
+            "escalation_rate": round(result["escalation_rate"], 4),
+            "fast_ece": round(expected_calibration_error(fast_probs, eval_labels), 4),
+            "slow_ece": round(expected_calibration_error(slow_probs, eval_labels), 4),
+            "fast_p50_ms": round(fast_ms, 2),
+            "slow_p50_ms": round(slow_ms, 2),
+            "expected_speedup": round(slow_ms / cost_ms, 2),
+        },
+    }
+
+    print(f"\nthreshold {choice['threshold']:.3f}: evaluation accuracy {result['accuracy']:.4f} "
+          f"(full model {slow_accuracy:.4f}), {result['escalation_rate']:.1%} escalated")
+    print(f"expected cost {cost_ms:.2f} ms vs {slow_ms:.2f} ms full model ({slow_ms / cost_ms:.1f}x)")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(config, f, indent=2)
+    print(f"✅ Cascade config saved to '{args.output}' (restart workers to pick it up)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# distill.py
+# Knowledge distillation: the fine-tuned bert-base classifier (teacher) trains bert-tiny
+# (student) on soft targets. Run from modules/ like modeltrain.py:
+#
+#   python distill.py --teacher ../student_feedback_bert --epochs 8 --temperature 2.0 --alpha 0.5
+#
+# Teacher logits for the training split are computed once and cached under results/,
+# keyed by the teacher weights and the tokenized data, so re-runs and extra epochs never
+# touch the teacher again. A report compares teacher, directly trained tiny model and the
+# distilled student on accuracy, F1 and CPU latency.
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import torch
+import torch.nn.functional as F
+from transformers import AutoModelForSequenceClassification, Trainer, TrainingArguments
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+
+from studfeedload import train_dataset, test_dataset, test_texts, test_labels, tokenizer
+from tokenization import load_tokenizer, encode_batch
+
+STUDENT_NAME = "prajjwal1/bert-tiny"
+BASELINE_DIR = "student_feedback_tinybert"
+SAVE_DIR = "student_feedback_tinybert_distilled"
+CACHE_DIR = "results"
+
+# ===============================
+# 1️⃣ Teacher Logits (cached)
+# ===============================
+def weights_fingerprint(model_dir):
+    h = hashlib.sha1(os.path.abspath(model_dir).encode())
+    for name in sorted(os.listdir(model_dir)):
+        if name.endswith((".bin", ".safetensors")):
+            stat = os.stat(os.path.join(model_dir, name))
+            h.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return h
+
+def teacher_logits(teacher_dir, dataset, batch_size=64):
+    h = weights_fingerprint(teacher_dir)
+    for ids in dataset.encodings["input_ids"]:
+        h.update(bytes(str(ids), "ascii"))
+    path = os.path.join(CACHE_DIR, f"teacher_logits_{h.hexdigest()[:16]}.pt")
+    if os.path.exists(path):
+        print(f"✅ Reusing cached teacher logits: {path}")
+        return torch.load(path)
+
+    print("⚡ Computing teacher logits (one pass, cached for later runs)...")
+    teacher = AutoModelForSequenceClassification.from_pretrained(teacher_dir)
+    teacher.eval()
+    loader = torch.utils.data.DataLoader(dataset, batch_size=batch_size)
+    logits = []
+    with torch.no_grad():
+        for batch in loader:
+            batch.pop("labels")
+            logits.append(teacher(**batch).logits)
+    logits = torch.cat(logits)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    torch.save(logits, path)
+    print(f"✅ Teacher logits saved: {path}")
+    return logits
+
+class DistillDataset(torch.utils.data.Dataset):
+    def __init__(self, base, logits):
+        self.base, self.logits = base, logits
+
+    def __getitem__(self, idx):
+        item = self.base[idx]
+        item["teacher_logits"] = self.logits[idx]
+        return item
+
+    def __len__(self):
+        return len(self.base)
+
+# ===============================
+# 2️⃣ Soft-Target Trainer
+# ===============================
+class DistillationTrainer(Trainer):
+    def __init__(self, *args, temperature=2.0, alpha=0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature, self.alpha = temperature, alpha
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        teacher = inputs.pop("teacher_logits", None)
+        outputs = model(**inputs)
+        loss = outputs.loss
+        if teacher is not None:
+            # Hinton et al.: KL on temperature-softened distributions, scaled by T^2
+            t = self.temperature
+            soft = F.kl_div(F.log_softmax(outputs.logits / t, dim=-1), F.softmax(teacher / t, dim=-1),
+                            reduction="batchmean") * t * t
+            loss = self.alpha * loss + (1 - self.alpha) * soft
+        return (loss, outputs) if return_outputs else loss
+
+def compute_metrics(pred):
+    labels = pred.label_ids
+    preds = pred.predictions.argmax(axis=-1)
+    precision, recall, f1, _ = precision_recall_fscore_support(labels, preds, average="weighted")
+    return {"accuracy": accuracy_score(labels, preds), "precision": precision, "recall": recall, "f1": f1}
+
+# ===============================
+# 3️⃣ Accuracy / Latency Report
+# ===============================
+def evaluate(model_dir, texts, labels, runs=200):
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    tok = load_tokenizer(model_dir, fallback="bert-base-uncased")
+
+    preds = []
+    with torch.no_grad():
+        for start in range(0, len(texts), 64):
+            inputs = encode_batch(tok, texts[start:start + 64], return_tensors="pt")
+            preds.extend(model(**inputs).logits.argmax(dim=1).tolist())
+    _, _, f1, _ = precision_recall_fscore_support(labels, preds, average="weighted")
+
+    # Single-request latency is what the web path pays per submission
+    timings = []
+    with torch.no_grad():
+        for text in (texts * (runs // max(len(texts), 1) + 1))[:runs]:
+            start = time.perf_counter()
+            model(**encode_batch(tok, [text], return_tensors="pt"))
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "model": model_dir,
+        "parameters": sum(p.numel() for p in model.parameters()),
+        "accuracy": round(accuracy_score(labels, preds), 4),
+        "f1": round(f1, 4),
+        "p50_ms": round(timings[len(timings) // 2], 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+    }
+
+def report(teacher_dir, student_dir, baseline_dir=BASELINE_DIR):
+    rows = [evaluate(d, test_texts, test_labels) for d in (teacher_dir, baseline_dir, student_dir) if os.path.isdir(d)]
+
+    print(f"\n{'model':<42}{'params':>12}{'acc':>8}{'f1':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for r in rows:
+        print(f"{r['model']:<42}{r['parameters']:>12,}{r['accuracy']:>8.3f}{r['f1']:>8.3f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, "distillation_report.json")
+    with open(path, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"✅ Report saved to '{path}'")
+    return rows
+
+# ===============================
+# 4️⃣ Train
+# ===============================
+def main():
+    parser = argparse.ArgumentParser(description="Distil the fine-tuned BERT classifier into bert-tiny")
+    parser.add_argument("--teacher", default=os.path.join("..", "student_feedback_bert"))
+    parser.add_argument("--student", default=STUDENT_NAME)
+    parser.add_argument("--output", default=SAVE_DIR)
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.5, help="weight of the hard-label loss")
+    parser.add_argument("--report-only", action="store_true")
+    args = parser.parse_args()
+
+    if not args.report_only:
+        # Teacher and student must see the same token ids for the cached logits to line up
+        if load_tokenizer(args.teacher, fallback="bert-base-uncased").get_vocab() != tokenizer.get_vocab():
+            raise SystemExit("Teacher tokenizer differs from the dataset tokenizer; re-run studfeedload with it")
+
+        logits = teacher_logits(args.teacher, train_dataset)
+        model = AutoModelForSequenceClassification.from_pretrained(args.student, num_labels=3)
+
+        training_args = TrainingArguments(
+            output_dir=CACHE_DIR,
+            num_train_epochs=args.epochs,
+            per_device_train_batch_size=32,
+            per_device_eval_batch_size=64,
+            learning_rate=5e-5,
+            eval_strategy="epoch",
+            save_strategy="epoch",
+            load_best_model_at_end=True,
+            metric_for_best_model="eval_loss",
+            logging_steps=50,
+            remove_unused_columns=False,  # keep teacher_logits in the batch
+            report_to="none"
+        )
+
+        trainer = DistillationTrainer(
+            model=model,
+            args=training_args,
+            train_dataset=DistillDataset(train_dataset, logits),
+            eval_dataset=test_dataset,
+            compute_metrics=compute_metrics,
+            temperature=args.temperature,
+            alpha=args.alpha,
+        )
+        trainer.train()
+
+        model.save_pretrained(args.output)
+        load_tokenizer(args.student).save_pretrained(args.output)
+        print(f"✅ Distilled student saved to '{args.output}'")
+
+    report(args.teacher, args.output)
+
+if __name__ == "__main__":
+    main()
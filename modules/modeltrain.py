@@ -1,25 +1,42 @@
+# modeltrain.py
+# Single process:   python modeltrain.py
+# CPU data-parallel (DDP over gloo, one machine):
+#   TRAIN_THREADS_PER_WORKER=2 torchrun --standalone --nproc_per_node 4 modeltrain.py
+# Each worker trains on its own shard of the data with TRAIN_THREADS_PER_WORKER intra-op
+# threads (default: cores / workers) and gradients are all-reduced every step.
+import os
 import torch
 from transformers import (
     AutoModelForSequenceClassification,
-    AutoTokenizer,
     Trainer,
     TrainingArguments
 )
 from studfeedload import train_dataset, test_dataset
+from tokenization import load_tokenizer
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support
 
 # ===============================
 # 1️⃣ Device Selection
 # ===============================
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"🚀 Training on device: {device}")
+
+# torchrun sets WORLD_SIZE/RANK; without it this is a plain single-process run
+WORLD_SIZE = int(os.environ.get("WORLD_SIZE", "1"))
+RANK = int(os.environ.get("RANK", "0"))
+THREADS_PER_WORKER = int(os.environ.get("TRAIN_THREADS_PER_WORKER", str(max(1, (os.cpu_count() or 1) // WORLD_SIZE))))
+if device.type == "cpu":
+    # Oversubscribed cores make every worker slower; give each one its slice
+    torch.set_num_threads(THREADS_PER_WORKER)
+
+if RANK == 0:
+    print(f"🚀 Training on device: {device} ({WORLD_SIZE} worker(s) x {torch.get_num_threads()} thread(s))")
 
 # ===============================
 # 2️⃣ Model & Tokenizer (TINY BERT)
 # ===============================
 MODEL_NAME = "prajjwal1/bert-tiny"
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+tokenizer = load_tokenizer(MODEL_NAME)
 
 model = AutoModelForSequenceClassification.from_pretrained(
     MODEL_NAME,
@@ -34,7 +51,7 @@ model.to(device)
 training_args = TrainingArguments(
     output_dir="results",
     num_train_epochs=6,                 # Slightly more epochs for tiny model
-    per_device_train_batch_size=16,     # Can increase because model is small
+    per_device_train_batch_size=int(os.environ.get("TRAIN_BATCH_SIZE", "16")),  # per worker; global = x WORLD_SIZE
     per_device_eval_batch_size=32,
     learning_rate=3e-5,                 # Slightly higher LR works well for tiny
     eval_strategy="epoch",
@@ -44,6 +61,8 @@ training_args = TrainingArguments(
     load_best_model_at_end=True,
     metric_for_best_model="eval_loss",
     logging_steps=50,
+    ddp_backend="gloo" if device.type == "cpu" and WORLD_SIZE > 1 else None,
+    dataloader_num_workers=0,
     report_to="none"
 )
 
@@ -87,8 +106,9 @@ trainer.train()
 # ===============================
 SAVE_DIR = "student_feedback_tinybert"
 
-model.save_pretrained(SAVE_DIR)
-tokenizer.save_pretrained(SAVE_DIR)
+if trainer.is_world_process_zero():
+    model.save_pretrained(SAVE_DIR)
+    tokenizer.save_pretrained(SAVE_DIR)
 
-print("✅ TinyBERT training complete")
-print(f"✅ Model saved to '{SAVE_DIR}'")
\ No newline at end of file
+    print("✅ TinyBERT training complete")
+    print(f"✅ Model saved to '{SAVE_DIR}'")
\ No newline at end of file
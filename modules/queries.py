@@ -0,0 +1,139 @@
+# queries.py
+# Shared, cached data access for the Streamlit consoles. Streamlit reruns the whole script on
+# every widget click, so reads go through st.cache_data (keyed by teacher / college / page)
+# and each screen is served by one aggregated query rather than one query per row. Code that
+# writes clears the cached readers it affects.
+#
+#   CONSOLE_CACHE_TTL   seconds a cached read may be served (default 60)
+#   CONSOLE_PAGE_SIZE   rows per table page (default 25)
+import os
+import pandas as pd
+import streamlit as st
+from db import get_connection
+
+CACHE_TTL = int(os.environ.get("CONSOLE_CACHE_TTL", "60"))
+PAGE_SIZE = int(os.environ.get("CONSOLE_PAGE_SIZE", "25"))
+
+def read_frame(sql, params=(), columns=None, college_code=None):
+    conn = get_connection(college_code)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame([tuple(r) for r in rows], columns=columns)
+
+def read_page(sql, params, columns, page, college_code=None, page_size=PAGE_SIZE):
+    """One page of `sql` plus the total row count, in a single query (COUNT(*) OVER ())."""
+    frame = read_frame(f"SELECT *, COUNT(*) OVER () AS total_rows FROM ({sql}) AS page_rows LIMIT ? OFFSET ?",
+                       (*params, page_size, page * page_size), columns + ["total_rows"], college_code)
+    if not len(frame) and page > 0:
+        # Past the end (rows removed, filter changed): serve the last page instead
+        _, total = read_page(sql, params, columns, 0, college_code, page_size)
+        return read_page(sql, params, columns, max(0, (total - 1) // page_size), college_code, page_size)
+    total = int(frame["total_rows"].iloc[0]) if len(frame) else 0
+    return frame.drop(columns="total_rows"), total
+
+def write(statements, college_code=None):
+    """Run (sql, params) pairs in one transaction."""
+    conn = get_connection(college_code)
+    try:
+        for sql, params in statements:
+            conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+# --- TEACHER CONSOLE ---
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def teacher_forms(teacher_id, college_code=None):
+    # Response and sentiment counts for every form at once
+    return read_frame("""
+        SELECT f.id, f.title, f.created_at,
+               COUNT(r.id) AS responses,
+               COUNT(CASE WHEN r.sentiment = 'Positive' THEN 1 END) AS positive,
+               COUNT(CASE WHEN r.sentiment = 'Neutral' THEN 1 END) AS neutral,
+               COUNT(CASE WHEN r.sentiment = 'Negative' THEN 1 END) AS negative
+        FROM feedback_forms f
+        LEFT JOIN feedback_responses r ON r.form_id = f.id
+        WHERE f.teacher_id = ?
+        GROUP BY f.id, f.title, f.created_at
+        ORDER BY f.created_at DESC, f.id
+    """, (teacher_id,), ["id", "title", "created_at", "responses", "positive", "neutral", "negative"], college_code)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def form_responses(form_id, page, college_code=None):
+    return read_page("SELECT feedback, sentiment, submitted_at FROM feedback_responses WHERE form_id = ? ORDER BY id DESC",
+                     (form_id,), ["Feedback", "Sentiment", "Submitted"], page, college_code)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def pending_students_page(college_code, page):
+    return read_page("""
+        SELECT users.id, students.full_name, students.prn_number
+        FROM users
+        JOIN students ON students.user_id = users.id
+        WHERE users.status = 'pending' AND users.role = 'student' AND (? IS NULL OR users.college_code = ?)
+        ORDER BY users.id
+    """, (college_code, college_code), ["user_id", "name", "prn"], page, college_code)
+
+# --- ADMIN CONSOLE ---
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def teachers_page(college_code, page):
+    return read_page("""
+        SELECT users.id, teachers.full_name, users.email, users.status
+        FROM users
+        JOIN teachers ON teachers.user_id = users.id
+        WHERE users.role = 'teacher' AND (? IS NULL OR users.college_code = ?)
+        ORDER BY users.status = 'approved', teachers.full_name, users.id
+    """, (college_code, college_code), ["user_id", "name", "email", "status"], page, college_code)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def students_page(college_code, page, search=""):
+    return read_page("""
+        SELECT students.full_name, students.prn_number, users.status
+        FROM students
+        JOIN users ON users.id = students.user_id
+        WHERE (? IS NULL OR users.college_code = ?)
+          AND (students.full_name LIKE ? OR students.prn_number LIKE ?)
+        ORDER BY students.full_name
+    """, (college_code, college_code, f"%{search}%", f"%{search}%"), ["Name", "PRN", "Status"], page, college_code)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def sentiment_counts(college_code=None):
+    frame = read_frame("""
+        SELECT COALESCE(sentiment, 'Pending'), COUNT(*) FROM feedback_responses
+        WHERE (? IS NULL OR college_code = ?)
+        GROUP BY sentiment
+    """, (college_code, college_code), ["Sentiment", "Count"], college_code)
+    return frame.set_index("Sentiment")["Count"]
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def feedback_page(college_code, page):
+    return read_page("""
+        SELECT feedback_forms.title, feedback_responses.feedback, feedback_responses.sentiment
+        FROM feedback_responses
+        JOIN feedback_forms ON feedback_forms.id = feedback_responses.form_id
+        WHERE (? IS NULL OR feedback_responses.college_code = ?)
+        ORDER BY feedback_responses.id DESC
+    """, (college_code, college_code), ["Feedback Title", "Feedback", "Sentiment"], page, college_code)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def approval_logs_page(college_code, page):
+    return read_page("""
+        SELECT acted_by_user_id, target_user_id, action, role, action_date
+        FROM approval_logs
+        WHERE (? IS NULL OR college_code = ?)
+        ORDER BY id DESC
+    """, (college_code, college_code), ["By User ID", "Target User ID", "Action", "Role", "Date"], page, college_code)
+
+# --- WIDGETS ---
+def current_page(key):
+    # Zero-based page the paginator with this key selected on the previous run
+    return int(st.session_state.get(key, 1)) - 1
+
+def paginator(total, key, page_size=PAGE_SIZE):
+    """Page picker drawn under a table of `total` rows; read it back with current_page(key)."""
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    if pages > 1:
+        st.number_input(f"Page (of {pages}, {total} rows)", min_value=1, max_value=pages, step=1, key=key)
\ No newline at end of file
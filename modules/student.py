@@ -1,8 +1,10 @@
 import streamlit as st
 from datetime import datetime
 import torch
-from transformers import BertTokenizer, BertForSequenceClassification
-from db import get_connection
+from transformers import BertForSequenceClassification
+from db import get_connection, wallclock_ts
+from tokenization import load_tokenizer
+from modules import queries
 
 # ---------------- LOAD MODEL ----------------
 # ---------------- LOAD MODEL ----------------
@@ -12,7 +14,7 @@ def load_model():
     # If that fails, fallback to base, but the model MUST be the saved one.
     try:
         model_path = "student_feedback_bert" # Folder created by modeltrain.py
-        tokenizer = BertTokenizer.from_pretrained(model_path)
+        tokenizer = load_tokenizer(model_path, fallback=None)
         model = BertForSequenceClassification.from_pretrained(
             model_path,
             num_labels=3
@@ -20,7 +22,7 @@ def load_model():
     except OSError:
         st.error("⚠️ Model not found! Please run 'modeltrain.py' first.")
         # Fallback to base just to prevent crash (optional)
-        tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
+        tokenizer = load_tokenizer("bert-base-uncased")
         model = BertForSequenceClassification.from_pretrained("bert-base-uncased", num_labels=3)
     
     model.eval()
@@ -82,6 +84,8 @@ def student_registration():
             ))
 
             conn.commit()
+            queries.pending_students_page.clear()
+            queries.students_page.clear()
             st.success("Registration successful! Await teacher approval.")
 
         except Exception:
@@ -102,7 +106,7 @@ def student_login():
         cur = conn.cursor()
 
         cur.execute("""
-            SELECT users.status, students.id
+            SELECT users.status, students.id, users.college_code
             FROM users
             JOIN students ON students.user_id = users.id
             WHERE users.email=? AND users.password=? AND users.role='student'
@@ -115,7 +119,7 @@ def student_login():
             st.error("Invalid credentials")
             return
 
-        status, student_id = row
+        status, student_id, college_code = row
 
         if status != "approved":
             st.warning(f"Account status: {status.upper()}")
@@ -123,6 +127,7 @@ def student_login():
 
         st.session_state.student_logged_in = True
         st.session_state.student_id = student_id
+        st.session_state.student_college_code = college_code
         st.success("Login successful")
         st.rerun()
 
@@ -130,13 +135,15 @@ def student_login():
 def student_dashboard():
     st.header("🧑‍🎓 Student Dashboard")
 
-    conn = get_connection()
+    college_code = st.session_state.get("student_college_code")
+    conn = get_connection(college_code)
     cur = conn.cursor()
 
     cur.execute("""
         SELECT id, title, created_at
         FROM feedback_forms
-    """)
+        WHERE college_code = ?
+    """, (college_code,))
     forms = cur.fetchall()
 
     if not forms:
@@ -164,21 +171,27 @@ def student_dashboard():
 
     if st.button("Submit Feedback", key="submit_feedback_btn"):
         sentiment = predict_sentiment(feedback)
+        now = datetime.now()
 
+        # submitted_ts and college_code feed the rollup triggers and the trend charts
         cur.execute("""
             INSERT INTO feedback_responses
-            (form_id, student_id, feedback, sentiment, submitted_at)
-            VALUES (?, ?, ?, ?, ?)
+            (form_id, student_id, college_code, feedback, sentiment, submitted_at, submitted_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
             form_id,
             st.session_state.student_id,
+            college_code,
             feedback,
             sentiment,
-            datetime.now().strftime("%d %b %Y %H:%M")
+            now.strftime("%d %b %Y %H:%M"),
+            wallclock_ts(now)
         ))
 
         conn.commit()
         conn.close()
+        for reader in (queries.teacher_forms, queries.form_responses, queries.sentiment_counts, queries.feedback_page):
+            reader.clear()
 
         st.success("Feedback submitted successfully")
         st.info(f"Sentiment detected: **{sentiment}**")
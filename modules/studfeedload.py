@@ -1,9 +1,9 @@
 # studfeedload.py
 import pandas as pd
 import re
+import sys
 import torch
 from sklearn.model_selection import train_test_split
-from transformers import BertTokenizer
 
 # ===============================
 # 1️⃣ Load Dataset
@@ -15,6 +15,8 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(BASE_DIR, "..", "data", "student_feedback_2000.csv")
 CSV_PATH = os.path.abspath(CSV_PATH)
+sys.path.insert(0, os.path.abspath(os.path.join(BASE_DIR, "..")))
+from tokenization import load_tokenizer, encode_batch
 df = pd.read_csv(CSV_PATH)
 
 # Basic validation
@@ -65,21 +67,10 @@ train_texts, test_texts, train_labels, test_labels = train_test_split(
 # ===============================
 # 5️⃣ Tokenization
 # ===============================
-tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
+tokenizer = load_tokenizer("bert-base-uncased")
 
-train_encodings = tokenizer(
-    train_texts,
-    truncation=True,
-    padding=True,
-    max_length=128
-)
-
-test_encodings = tokenizer(
-    test_texts,
-    truncation=True,
-    padding=True,
-    max_length=128
-)
+train_encodings = encode_batch(tokenizer, train_texts, max_length=128)
+test_encodings = encode_batch(tokenizer, test_texts, max_length=128)
 
 # ===============================
 # 6️⃣ PyTorch Dataset Class
@@ -106,9 +97,11 @@ test_dataset = FeedbackDataset(test_encodings, test_labels)
 # ===============================
 # 8️⃣ Save Datasets (Optional)
 # ===============================
-torch.save(train_dataset, "train_dataset.pt")
-torch.save(test_dataset, "test_dataset.pt")
+# Under torchrun every worker imports this module; only rank 0 writes the files
+if int(os.environ.get("RANK", "0")) == 0:
+    torch.save(train_dataset, "train_dataset.pt")
+    torch.save(test_dataset, "test_dataset.pt")
 
-print("✅ Dataset preparation completed")
-print(f"Train size: {len(train_dataset)}")
-print(f"Test size: {len(test_dataset)}")
\ No newline at end of file
+    print("✅ Dataset preparation completed")
+    print(f"Train size: {len(train_dataset)}")
+    print(f"Test size: {len(test_dataset)}")
\ No newline at end of file
@@ -3,6 +3,7 @@ from datetime import datetime
 import uuid
 import pandas as pd
 from db import get_connection
+from modules import queries
 
 # ---------------- TEACHER LOGIN ----------------
 def teacher_login():
@@ -16,7 +17,7 @@ def teacher_login():
         cur = conn.cursor()
 
         cur.execute("""
-            SELECT users.id, users.status, teachers.id
+            SELECT users.id, users.status, teachers.id, users.college_code
             FROM users
             JOIN teachers ON teachers.user_id = users.id
             WHERE users.email=? AND users.password=? AND users.role='teacher'
@@ -29,7 +30,7 @@ def teacher_login():
             st.error("Invalid credentials")
             return
 
-        user_id, status, teacher_id = row
+        user_id, status, teacher_id, college_code = row
 
         if status != "approved":
             st.warning(f"Account status: {status.upper()}")
@@ -38,6 +39,7 @@ def teacher_login():
         st.session_state.teacher_logged_in = True
         st.session_state.teacher_user_id = user_id
         st.session_state.teacher_id = teacher_id
+        st.session_state.teacher_college_code = college_code
         st.success("Login successful")
         st.rerun()
 
@@ -45,60 +47,50 @@ def teacher_login():
 def student_approval_panel():
     st.subheader("🧑‍🎓 Pending Student Approvals")
 
-    conn = get_connection()
-    cur = conn.cursor()
+    college_code = st.session_state.get("teacher_college_code")
+    students, total = queries.pending_students_page(college_code, queries.current_page("pending_students_page"))
 
-    cur.execute("""
-        SELECT users.id, students.full_name, students.prn_number
-        FROM users
-        JOIN students ON students.user_id = users.id
-        WHERE users.status='pending' AND users.role='student'
-    """)
-
-    students = cur.fetchall()
-
-    if not students:
+    if not total:
         st.info("No pending students")
-        conn.close()
         return
 
-    for user_id, name, prn in students:
+    for user_id, name, prn in students.itertuples(index=False):
         with st.expander(f"{name} | PRN: {prn}"):
             col1, col2 = st.columns(2)
 
             with col1:
                 if st.button("✅ Approve", key=f"approve_{prn}"):
-                    cur.execute("UPDATE users SET status='approved' WHERE id=?", (user_id,))
-                    cur.execute("""
-                        INSERT INTO approval_logs
-                        (acted_by_user_id, target_user_id, action, role, action_date)
-                        VALUES (?, ?, 'approved', 'student', ?)
-                    """, (
-                        st.session_state.teacher_user_id,
-                        user_id,
-                        datetime.now().strftime("%d %b %Y %H:%M")
-                    ))
-                    conn.commit()
+                    set_student_status(int(user_id), "approved", college_code)
                     st.success("Student approved")
                     st.rerun()
 
             with col2:
                 if st.button("❌ Reject", key=f"reject_{prn}"):
-                    cur.execute("UPDATE users SET status='rejected' WHERE id=?", (user_id,))
-                    cur.execute("""
-                        INSERT INTO approval_logs
-                        (acted_by_user_id, target_user_id, action, role, action_date)
-                        VALUES (?, ?, 'rejected', 'student', ?)
-                    """, (
-                        st.session_state.teacher_user_id,
-                        user_id,
-                        datetime.now().strftime("%d %b %Y %H:%M")
-                    ))
-                    conn.commit()
+                    set_student_status(int(user_id), "rejected", college_code)
                     st.error("Student rejected")
                     st.rerun()
 
-    conn.close()
+    queries.paginator(total, "pending_students_page")
+
+def set_student_status(user_id, status, college_code):
+    queries.write([
+        ("UPDATE users SET status=? WHERE id=?", (status, user_id)),
+        ("""
+            INSERT INTO approval_logs
+            (acted_by_user_id, target_user_id, college_code, action, role, action_date)
+            VALUES (?, ?, ?, ?, 'student', ?)
+        """, (
+            st.session_state.teacher_user_id,
+            user_id,
+            college_code,
+            status,
+            datetime.now().strftime("%d %b %Y %H:%M")
+        )),
+    ], college_code)
+    # Every cached reader that shows this student's status or the audit log
+    queries.pending_students_page.clear()
+    queries.students_page.clear()
+    queries.approval_logs_page.clear()
 
 # ---------------- CREATE FEEDBACK FORM ----------------
 def create_feedback_form():
@@ -111,23 +103,20 @@ def create_feedback_form():
             st.warning("Title cannot be empty")
             return
 
-        conn = get_connection()
-        cur = conn.cursor()
-
+        college_code = st.session_state.get("teacher_college_code")
         form_id = str(uuid.uuid4())[:8]
 
-        cur.execute("""
-            INSERT INTO feedback_forms (id, title, created_at, teacher_id)
-            VALUES (?, ?, ?, ?)
+        queries.write([("""
+            INSERT INTO feedback_forms (id, title, college_code, created_at, teacher_id)
+            VALUES (?, ?, ?, ?, ?)
         """, (
             form_id,
             title,
+            college_code,
             datetime.now().strftime("%d %b %Y"),
             st.session_state.teacher_id
-        ))
-
-        conn.commit()
-        conn.close()
+        ))], college_code)
+        queries.teacher_forms.clear()
 
         st.success("Feedback form created successfully")
 
@@ -135,42 +124,33 @@ def create_feedback_form():
 def view_feedback_analytics():
     st.subheader("📊 Feedback Analytics")
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT id, title, created_at
-        FROM feedback_forms
-        WHERE teacher_id=?
-    """, (st.session_state.teacher_id,))
+    # One aggregated query for all forms; response text is only fetched for opened forms
+    college_code = st.session_state.get("teacher_college_code")
+    forms = queries.teacher_forms(st.session_state.teacher_id, college_code)
 
-    forms = cur.fetchall()
-
-    if not forms:
+    if forms.empty:
         st.info("No feedback forms created yet")
-        conn.close()
         return
 
-    for form_id, title, date in forms:
-        with st.expander(f"{title} | {date}"):
-            cur.execute("""
-                SELECT feedback, sentiment
-                FROM feedback_responses
-                WHERE form_id=?
-            """, (form_id,))
-
-            rows = cur.fetchall()
+    st.bar_chart(forms[["positive", "neutral", "negative"]].sum().rename(str.capitalize))
 
-            if not rows:
+    page = queries.current_page("teacher_forms_page")
+    start = page * queries.PAGE_SIZE
+    for form in forms.iloc[start:start + queries.PAGE_SIZE].itertuples(index=False):
+        with st.expander(f"{form.title} | {form.created_at} | {form.responses} response(s)"):
+            if not form.responses:
                 st.info("No feedback submitted yet")
                 continue
 
-            df = pd.DataFrame(rows, columns=["Feedback", "Sentiment"])
-            st.dataframe(df, use_container_width=True)
+            st.bar_chart(pd.Series({"Positive": form.positive, "Neutral": form.neutral, "Negative": form.negative}))
 
-            st.bar_chart(df["Sentiment"].value_counts())
+            if st.toggle("Show responses", key=f"show_responses_{form.id}"):
+                key = f"responses_page_{form.id}"
+                rows, total = queries.form_responses(form.id, queries.current_page(key), college_code)
+                st.dataframe(rows, use_container_width=True)
+                queries.paginator(total, key)
 
-    conn.close()
+    queries.paginator(len(forms), "teacher_forms_page")
 
 # ---------------- DASHBOARD ----------------
 def teacher_dashboard():
@@ -0,0 +1,87 @@
+# passwords.py
+# Password hashing with a configurable scheme and transparent rehash-on-login.
+#
+#   PASSWORD_HASH_METHOD   any werkzeug method ("scrypt:16384:8:1", "pbkdf2:sha256:600000", ...)
+#                          or "argon2" (needs argon2-cffi; tune with ARGON2_TIME_COST,
+#                          ARGON2_MEMORY_COST in KiB and ARGON2_PARALLELISM)
+#   PASSWORD_WORKERS       concurrent verifications allowed (default: CPU count)
+#   PASSWORD_QUEUE         verifications allowed to wait for a worker; beyond that a login fails at once
+#   PASSWORD_WAIT_SECONDS  how long an admitted login waits for its result before giving up
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:16384:8:1")
+PASSWORD_WORKERS = int(os.environ.get("PASSWORD_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_QUEUE = int(os.environ.get("PASSWORD_QUEUE", str(PASSWORD_WORKERS)))
+PASSWORD_WAIT_SECONDS = float(os.environ.get("PASSWORD_WAIT_SECONDS", "3"))
+
+_argon2 = None
+if HASH_METHOD == "argon2":
+    from argon2 import PasswordHasher
+    _argon2 = PasswordHasher(
+        time_cost=int(os.environ.get("ARGON2_TIME_COST", "2")),
+        memory_cost=int(os.environ.get("ARGON2_MEMORY_COST", "19456")),
+        parallelism=int(os.environ.get("ARGON2_PARALLELISM", "1")),
+    )
+    CURRENT_PREFIX = None
+else:
+    # Normalised "method:params" werkzeug writes for the configured scheme
+    CURRENT_PREFIX = generate_password_hash("", HASH_METHOD).split("$", 1)[0]
+
+# hashlib and argon2-cffi release the GIL, so a small pool bounds CPU use without serializing
+_pool = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+# The executor's own queue is unbounded; a slot per running or queued verification bounds it
+_slots = threading.BoundedSemaphore(PASSWORD_WORKERS + PASSWORD_QUEUE)
+
+class PasswordBusy(Exception):
+    pass
+
+def hash_password(password):
+    if _argon2:
+        return _argon2.hash(password)
+    return generate_password_hash(password, HASH_METHOD)
+
+def needs_rehash(stored):
+    if _argon2:
+        return not stored.startswith("$argon2") or _argon2.check_needs_rehash(stored)
+    return stored.split("$", 1)[0] != CURRENT_PREFIX
+
+def _verify(stored, password):
+    if stored.startswith("$argon2"):
+        if _argon2 is None:
+            from argon2 import PasswordHasher
+            hasher = PasswordHasher()
+        else:
+            hasher = _argon2
+        try:
+            return hasher.verify(stored, password)
+        except Exception:
+            return False
+    return check_password_hash(stored, password)
+
+def _verify_in_slot(stored, password):
+    # The slot is freed when the hash is done, not when its caller stops waiting for it
+    try:
+        return _verify(stored, password)
+    finally:
+        _slots.release()
+
+def verify_password(stored, password):
+    """Check a password on the bounded pool. Returns (ok, needs_rehash); raises PasswordBusy when saturated."""
+    if not _slots.acquire(blocking=False):
+        raise PasswordBusy()
+    try:
+        future = _pool.submit(_verify_in_slot, stored, password)
+    except BaseException:
+        _slots.release()
+        raise
+    try:
+        ok = future.result(timeout=PASSWORD_WAIT_SECONDS)
+    except TimeoutError:
+        # Still queued: it will never run, so its slot is freed here
+        if future.cancel():
+            _slots.release()
+        raise PasswordBusy()
+    return ok, ok and needs_rehash(stored)
@@ -0,0 +1,282 @@
+# roster.py
+# Bulk onboarding of a college roster from CSV:
+#
+#   python roster.py AIFB001 intake_2026.csv [--role student] [--batch-size 1000] [--workers 8]
+#
+# Columns (header row, case-insensitive): role, name, email, password, prn, department,
+# plus optional mobile, class, year for students and position, class_year, division for
+# teachers. `role` may be omitted when --role is given. Imported accounts are approved.
+#
+# Initial passwords are hashed across a process pool while rows are inserted in batched
+# transactions. Email/PRN conflicts, both with existing accounts and within the file,
+# are reported and skipped without aborting the batch.
+#
+# Uploads from the admin dashboard never import inside the web worker: queue_job() stores
+# the CSV under ROSTER_JOB_DIR and starts this script in its own process with --job, which
+# records queued/running/done/failed (plus the report) in <job_id>.json for job_status().
+import os
+import io
+import re
+import csv
+import sys
+import json
+import uuid
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from db import get_connection, init_db, bulk_insert, IntegrityError, PROFILE_COMPLETION_SQL
+from passwords import hash_password
+
+BATCH_SIZE = int(os.environ.get("ROSTER_BATCH_SIZE", "1000"))
+WORKERS = int(os.environ.get("ROSTER_WORKERS", str(os.cpu_count() or 2)))
+ID_CHUNK = 500  # stays under SQLite's bound-parameter limit
+JOB_DIR = os.environ.get("ROSTER_JOB_DIR", os.path.join("data", "roster_jobs"))
+JOB_ID = re.compile(r"[0-9a-f]{12}")
+REPORT_ISSUES = 50  # duplicates/errors kept in a job's status file
+
+ALIASES = {
+    "full_name": "name", "student_id": "prn", "prn_number": "prn", "mobile_no": "mobile",
+    "class_name": "class", "academic_year": "year", "dept": "department",
+}
+
+USER_COLUMNS = ["email", "password", "role", "status", "college_code", "created_at", "is_verified"]
+STUDENT_COLUMNS = ["user_id", "full_name", "prn_number", "college_code", "mobile_no", "department", "class_name",
+                   "academic_year"]
+TEACHER_COLUMNS = ["user_id", "full_name", "college_code", "department", "position", "class_year", "division"]
+
+def insert_sql(table, columns):
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+USER_INSERT = insert_sql("users", USER_COLUMNS)
+STUDENT_INSERT = insert_sql("students", STUDENT_COLUMNS)
+TEACHER_INSERT = insert_sql("teachers", TEACHER_COLUMNS)
+
+def read_rows(stream, default_role=None):
+    """Yield (line_no, row) with normalised keys from a CSV text or binary stream."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(stream)
+    for row in reader:
+        clean = {}
+        for key, value in row.items():
+            if key is None:
+                continue
+            key = key.strip().lower().replace(" ", "_")
+            clean[ALIASES.get(key, key)] = (value or "").strip()
+        clean["role"] = (clean.get("role") or default_role or "").lower()
+        clean.setdefault("email", "")
+        yield reader.line_num, clean
+
+def batches(rows, size):
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def existing_values(conn, sql, values):
+    found = set()
+    values = list(values)
+    for start in range(0, len(values), ID_CHUNK):
+        chunk = values[start:start + ID_CHUNK]
+        found.update(r[0] for r in conn.execute(sql.format(", ".join("?" * len(chunk))), chunk).fetchall())
+    return found
+
+def profile_params(user_id, row, college_code):
+    if row["role"] == "student":
+        return (user_id, row.get("name"), row.get("prn"), college_code, row.get("mobile"),
+                row.get("department"), row.get("class"), row.get("year"))
+    return (user_id, row.get("name"), college_code, row.get("department"),
+            row.get("position"), row.get("class_year"), row.get("division"))
+
+class RosterImport:
+    def __init__(self, college_code, pool, batch_size=BATCH_SIZE):
+        self.college_code = college_code
+        self.pool = pool
+        self.batch_size = batch_size
+        self.seen_emails, self.seen_prns = set(), set()
+        self.report = {"created": 0, "duplicates": [], "errors": []}
+
+    def run(self, rows):
+        for batch in batches(rows, self.batch_size):
+            self.import_batch(batch)
+        return self.report
+
+    def validate(self, batch, conn):
+        emails = existing_values(conn, "SELECT email FROM users WHERE email IN ({})",
+                                 {row["email"] for _, row in batch if row["email"]})
+        prns = existing_values(conn, "SELECT prn_number FROM students WHERE prn_number IN ({})",
+                               {row["prn"] for _, row in batch if row.get("prn")})
+        accepted = []
+        for line, row in batch:
+            if row["role"] not in ("student", "teacher"):
+                self.report["errors"].append((line, row["email"], f"unknown role '{row['role']}'"))
+            elif not row["email"] or not row.get("password") or not row.get("name"):
+                self.report["errors"].append((line, row["email"], "name, email and password are required"))
+            elif row["email"] in emails or row["email"] in self.seen_emails:
+                self.report["duplicates"].append((line, row["email"], "email"))
+            elif row.get("prn") and (row["prn"] in prns or row["prn"] in self.seen_prns):
+                self.report["duplicates"].append((line, row["email"], f"PRN {row['prn']}"))
+            else:
+                self.seen_emails.add(row["email"])
+                if row.get("prn"):
+                    self.seen_prns.add(row["prn"])
+                accepted.append((line, row))
+        return accepted
+
+    def import_batch(self, batch):
+        conn = get_connection(self.college_code)
+        try:
+            accepted = self.validate(batch, conn)
+            if not accepted:
+                return
+            hashes = list(self.pool.map(hash_password, [row["password"] for _, row in accepted],
+                                        chunksize=max(1, len(accepted) // (WORKERS * 4))))
+            try:
+                self.insert(conn, accepted, hashes)
+            except IntegrityError:
+                # Something registered concurrently: fall back to row-by-row for this batch
+                conn.rollback()
+                self.insert_one_by_one(conn, accepted, hashes)
+        finally:
+            conn.close()
+
+    def insert(self, conn, accepted, hashes):
+        # COPY on Postgres, executemany on SQLite
+        now = datetime.now().strftime("%Y-%m-%d %H:%M")
+        bulk_insert(conn, "users", USER_COLUMNS, [(row["email"], pw, row["role"], "approved", self.college_code, now, 1)
+                                                  for (_, row), pw in zip(accepted, hashes)])
+        ids = {}
+        emails = [row["email"] for _, row in accepted]
+        for start in range(0, len(emails), ID_CHUNK):
+            chunk = emails[start:start + ID_CHUNK]
+            ids.update(conn.execute(f"SELECT email, id FROM users WHERE email IN ({', '.join('?' * len(chunk))})",
+                                    chunk).fetchall())
+
+        students = [profile_params(ids[row["email"]], row, self.college_code) for _, row in accepted if row["role"] == "student"]
+        teachers = [profile_params(ids[row["email"]], row, self.college_code) for _, row in accepted if row["role"] == "teacher"]
+        if students:
+            bulk_insert(conn, "students", STUDENT_COLUMNS, students)
+            self.refresh_completion(conn, [s[0] for s in students])
+        if teachers:
+            bulk_insert(conn, "teachers", TEACHER_COLUMNS, teachers)
+        conn.commit()
+        self.report["created"] += len(accepted)
+
+    def insert_one_by_one(self, conn, accepted, hashes):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M")
+        for (line, row), pw in zip(accepted, hashes):
+            try:
+                cur = conn.cursor()
+                cur.execute(USER_INSERT, (row["email"], pw, row["role"], "approved", self.college_code, now, 1))
+                params = profile_params(cur.lastrowid, row, self.college_code)
+                cur.execute(STUDENT_INSERT if row["role"] == "student" else TEACHER_INSERT, params)
+                if row["role"] == "student":
+                    self.refresh_completion(conn, [params[0]])
+                conn.commit()
+                self.report["created"] += 1
+            except IntegrityError:
+                conn.rollback()
+                self.report["duplicates"].append((line, row["email"], "email or PRN"))
+
+    def refresh_completion(self, conn, user_ids):
+        for start in range(0, len(user_ids), ID_CHUNK):
+            chunk = user_ids[start:start + ID_CHUNK]
+            conn.execute(f"UPDATE students SET profile_completion = {PROFILE_COMPLETION_SQL} "
+                         f"WHERE user_id IN ({', '.join('?' * len(chunk))})", chunk)
+
+def import_roster(stream, college_code, default_role=None, batch_size=BATCH_SIZE, workers=WORKERS):
+    """Import a roster CSV into one college. Returns {"created", "duplicates", "errors"}."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return RosterImport(college_code, pool, batch_size).run(read_rows(stream, default_role))
+
+# --- BACKGROUND JOBS ---
+def job_path(job_id, ext):
+    return os.path.join(JOB_DIR, f"{job_id}.{ext}")
+
+def write_status(job_id, **status):
+    tmp = job_path(job_id, f"{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp, job_path(job_id, "json"))
+
+def job_status(job_id):
+    """The job's status dict, or None for unknown ids."""
+    if not JOB_ID.fullmatch(job_id or ""):
+        return None
+    try:
+        with open(job_path(job_id, "json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def queue_job(stream, college_code, default_role=None):
+    """Store an uploaded roster and import it in a separate process. Returns the job id."""
+    os.makedirs(JOB_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex[:12]
+    # Plain-text initial passwords: owner-only until the job deletes the file
+    with open(os.open(job_path(job_id, "csv"), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+        data = stream.read()
+        f.write(data.encode("utf-8") if isinstance(data, str) else data)
+    write_status(job_id, status="queued", college_code=college_code, queued_at=datetime.now().strftime("%Y-%m-%d %H:%M"))
+
+    command = [sys.executable, os.path.abspath(__file__), college_code, job_path(job_id, "csv"), "--job", job_id]
+    if default_role:
+        command += ["--role", default_role]
+    with open(job_path(job_id, "log"), "wb") as log:
+        # Own session: the import survives a web worker restart and never shares its process
+        subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True)
+    return job_id
+
+def run_job(args):
+    status = job_status(args.job) or {"college_code": args.college_code}
+    write_status(args.job, **dict(status, status="running", started_at=datetime.now().strftime("%Y-%m-%d %H:%M")))
+    try:
+        init_db()
+        with open(args.csv_path, newline="", encoding="utf-8-sig") as f:
+            report = import_roster(f, args.college_code, args.role, args.batch_size, args.workers)
+    except Exception as e:
+        write_status(args.job, **dict(status, status="failed", error=str(e)))
+        raise
+    finally:
+        os.remove(args.csv_path)
+    write_status(args.job, **dict(status, status="done", finished_at=datetime.now().strftime("%Y-%m-%d %H:%M"),
+                                  created=report["created"], duplicate_count=len(report["duplicates"]),
+                                  error_count=len(report["errors"]), duplicates=report["duplicates"][:REPORT_ISSUES],
+                                  errors=report["errors"][:REPORT_ISSUES]))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import students and teachers from a CSV roster")
+    parser.add_argument("college_code")
+    parser.add_argument("csv_path")
+    parser.add_argument("--role", choices=["student", "teacher"], help="role for rows without a role column")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="password hashing processes")
+    parser.add_argument("--job", help="job id from queue_job(); progress goes to its status file")
+    args = parser.parse_args()
+
+    start = datetime.now()
+    if args.job:
+        report = run_job(args)
+    else:
+        init_db()
+        with open(args.csv_path, newline="", encoding="utf-8-sig") as f:
+            report = import_roster(f, args.college_code, args.role, args.batch_size, args.workers)
+
+    for line, email, reason in report["duplicates"]:
+        print(f"⚠️ line {line}: duplicate {reason} ({email})")
+    for line, email, reason in report["errors"]:
+        print(f"❌ line {line}: {reason} ({email})")
+    print(f"✅ Imported {report['created']} account(s) into {args.college_code} in "
+          f"{(datetime.now() - start).total_seconds():.1f}s; {len(report['duplicates'])} duplicate(s), "
+          f"{len(report['errors'])} error(s)")
+    sys.exit(1 if report["errors"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# scheduler.py
+# Off-peak precomputation of AI summaries, meant to be run from cron, e.g.
+#
+#   30 1 * * *  cd /srv/StudentFeedbackAnalysis && python scheduler.py --budget-minutes 240 --threads 4
+#
+# Forms whose responses changed since their last summary are regenerated, busiest first,
+# until the time budget is spent. Every run is recorded in the summary_runs table.
+import os
+import time
+import argparse
+from datetime import datetime
+
+from db import get_connection, init_db, save_form_summary, list_shards, iter_rows, wallclock_ts
+from summarizer import generate_final_summary
+
+def find_stale_forms(conn, min_new=1, active_days=30):
+    # Activity = responses received since the last summary, weighted toward recent ones
+    since = wallclock_ts() - active_days * 86400
+    return conn.execute("""
+        SELECT f.id, f.college_code,
+               COUNT(r.id) AS total,
+               SUM(CASE WHEN r.id > COALESCE(f.summary_last_response_id, 0) THEN 1 ELSE 0 END) AS new_responses,
+               SUM(CASE WHEN r.submitted_ts >= ? THEN 1 ELSE 0 END) AS recent,
+               MAX(r.id) AS last_response_id
+        FROM feedback_forms f JOIN feedback_responses r ON r.form_id = f.id
+        GROUP BY f.id
+        HAVING SUM(CASE WHEN r.id > COALESCE(f.summary_last_response_id, 0) THEN 1 ELSE 0 END) >= ?
+            OR f.ai_summary IS NULL
+    """, (since, min_new)).fetchall()
+
+def in_window(window):
+    # "01:00-06:00" style off-peak window; windows may wrap past midnight
+    if not window:
+        return True
+    start, end = window.split("-")
+    now = datetime.now().strftime("%H:%M")
+    return start <= now < end if start <= end else (now >= start or now < end)
+
+def limit_cpu(threads, niceness):
+    if niceness:
+        try:
+            os.nice(niceness)
+        except (AttributeError, OSError):
+            pass
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+def run(budget_minutes=240, max_forms=None, min_new=1, window=None, dry_run=False):
+    # Gather candidates from every college shard, then work through them busiest first
+    forms = []
+    for shard in list_shards():
+        conn = get_connection(shard)
+        forms.extend((shard, f) for f in find_stale_forms(conn, min_new))
+        conn.close()
+    forms.sort(key=lambda item: (item[1]["new_responses"], item[1]["recent"], item[1]["total"]), reverse=True)
+    print(f"⚡ {len(forms)} form(s) need a fresh summary")
+
+    if dry_run:
+        for _, f in forms:
+            print(f"  {f['id']} [{f['college_code']}] new={f['new_responses']} recent={f['recent']} total={f['total']}")
+        return []
+
+    deadline = time.monotonic() + budget_minutes * 60
+    durations, results = [], []
+
+    for shard, f in forms[:max_forms]:
+        # Stop before a form that would likely overrun the budget or the off-peak window
+        expected = sum(durations) / len(durations) if durations else 0
+        if time.monotonic() + expected > deadline or not in_window(window):
+            print("⏸️ Budget exhausted, remaining forms deferred to the next run")
+            break
+
+        conn = get_connection(shard)
+        feedback_list = [r["feedback"] for r in iter_rows(
+            conn,
+            "SELECT feedback FROM feedback_responses WHERE form_id = ? AND id <= ? ORDER BY id",
+            (f["id"], f["last_response_id"])
+        )]
+
+        stats = {}
+        started_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        start = time.perf_counter()
+        summary = generate_final_summary(feedback_list, college_code=f["college_code"], stats=stats)
+        duration = time.perf_counter() - start
+        durations.append(duration)
+
+        save_form_summary(conn, f["id"], summary, f["last_response_id"])
+        conn.execute("""
+            INSERT INTO summary_runs (form_id, backend, responses, chunks, input_tokens, output_tokens, duration_s, started_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (f["id"], stats.get("backend"), len(feedback_list), stats.get("chunks", 0),
+              stats.get("input_tokens", 0), stats.get("output_tokens", 0), duration, started_at))
+        conn.commit()
+        conn.close()
+
+        results.append((f["id"], duration, stats))
+        print(f"✅ {f['id']}: {len(feedback_list)} responses, {stats.get('input_tokens', 0)} in / "
+              f"{stats.get('output_tokens', 0)} out tokens, {duration:.1f}s")
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute AI summaries for forms with new responses")
+    parser.add_argument("--budget-minutes", type=float, default=float(os.environ.get("SUMMARY_BUDGET_MINUTES", "240")))
+    parser.add_argument("--max-forms", type=int, default=None)
+    parser.add_argument("--min-new", type=int, default=1, help="minimum new responses before a form is regenerated")
+    parser.add_argument("--window", default=os.environ.get("SUMMARY_WINDOW"), help="off-peak window, e.g. 01:00-06:00")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("SUMMARY_THREADS", "0")), help="torch CPU threads")
+    parser.add_argument("--nice", type=int, default=10, help="process niceness increment")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if not in_window(args.window):
+        print(f"⏸️ Outside off-peak window {args.window}, nothing to do")
+        return
+
+    init_db()
+    limit_cpu(args.threads, args.nice)
+    run(args.budget_minutes, args.max_forms, args.min_new, args.window, args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,56 @@
 # summarizer.py
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
 from utils import chunk_list, clean_text
+from summary_backends import get_backend, select_backend_name
 
-# Loading the model
-MODEL_NAME = "Qwen/Qwen2.5-1.5B-Instruct"
-
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForCausalLM.from_pretrained(
-    MODEL_NAME,
-    torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-    device_map="auto"
-)
-model.eval()
-
-def summarize_chunk(feedback_text: str) -> str:
-    # 1. First, we define the prompt string
-    prompt_content = f"""
-You are an AI assistant summarizing student feedback for college administration.
-Summarize the following feedbacks into 4–5 concise lines.
-Focus on common opinions, major concerns, and overall experience.
-Do NOT mention individual students.
-
-Feedbacks:
-{feedback_text}
-"""
-    # 2. Format it for the Qwen Chat Template
-    messages = [{"role": "user", "content": prompt_content}]
-    formatted_text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-    
-    # 3. Now we tokenize the formatted text
-    inputs = tokenizer(formatted_text, return_tensors="pt").to(model.device)
-
-    with torch.no_grad():
-        output = model.generate(
-            **inputs,
-            max_new_tokens=200,
-            temperature=0.3,
-            do_sample=False,
-            pad_token_id=tokenizer.eos_token_id
-        )
-
-    # 4. Decode only the new generated tokens (the summary)
-    response = tokenizer.decode(output[0][inputs.input_ids.shape[1]:], skip_special_tokens=True)
-    return response.strip()
-
-def generate_final_summary(feedback_list: list) -> str:
+def summarize_chunk(feedback_text: str, backend=None, stats: dict = None) -> str:
+    backend = backend or get_backend()
+    summary = backend.summarize(feedback_text)
+    if stats is not None:
+        # Token accounting for the scheduler's per-form run log
+        stats["input_tokens"] = stats.get("input_tokens", 0) + backend.count_tokens(feedback_text)
+        stats["output_tokens"] = stats.get("output_tokens", 0) + backend.count_tokens(summary)
+        stats["calls"] = stats.get("calls", 0) + 1
+    return summary
+
+def stream_chunk(feedback_text: str, backend=None):
+    """Yield decoded text pieces as the backend produces them."""
+    yield from (backend or get_backend()).stream(feedback_text)
+
+def prepare_chunks(feedback_list: list) -> list:
+    # Clean feedback text and split into manageable chunks
+    cleaned_list = [clean_text(fb) for fb in feedback_list if fb and fb.strip()]
+    return chunk_list(cleaned_list, chunk_size=20) if cleaned_list else []
+
+def resolve_backend(feedback_list: list, college_code: str = None, backend_name: str = None):
+    return get_backend(backend_name or select_backend_name(college_code, len(feedback_list)))
+
+def generate_final_summary(feedback_list: list, college_code: str = None, backend_name: str = None,
+                           stats: dict = None) -> str:
     if not feedback_list:
         return "No feedback available for summarization."
 
-    # Clean feedback text
-    cleaned_list = [clean_text(fb) for fb in feedback_list if fb.strip()]
-    
-    if not cleaned_list:
+    # Hierarchical Summarization: Split into manageable chunks
+    chunks = prepare_chunks(feedback_list)
+
+    if not chunks:
         return "No valid text signals detected."
 
-    # Hierarchical Summarization: Split into manageable chunks
-    chunks = chunk_list(cleaned_list, chunk_size=20)
+    backend = resolve_backend(feedback_list, college_code, backend_name)
+    if stats is not None:
+        stats["backend"] = backend.name
+        stats["chunks"] = len(chunks)
+
+    # Non-generative backends handle the whole form in one pass
+    if not backend.hierarchical:
+        return summarize_chunk("\n".join(line for chunk in chunks for line in chunk), backend, stats)
+
     chunk_summaries = []
 
-    print(f"--- AI is processing {len(chunks)} chunk(s) ---")
+    print(f"--- AI is processing {len(chunks)} chunk(s) with '{backend.name}' ---")
 
     for i, chunk in enumerate(chunks):
         joined_text = "\n".join(chunk)
-        summary = summarize_chunk(joined_text)
+        summary = summarize_chunk(joined_text, backend, stats)
         chunk_summaries.append(summary)
         print(f"Processed chunk {i+1}/{len(chunks)}")
 
@@ -73,4 +60,45 @@ def generate_final_summary(feedback_list: list) -> str:
 
     # If multiple chunks, summarize the summaries into one final result
     final_input = "\n".join(chunk_summaries)
-    return summarize_chunk(final_input)
\ No newline at end of file
+    return summarize_chunk(final_input, backend, stats)
+
+def stream_final_summary(feedback_list: list, college_code: str = None, backend_name: str = None):
+    """
+    Streaming variant of generate_final_summary.
+    Yields (event, data) tuples: "progress" while the map stage runs,
+    "token" for each piece of the final summary and a closing "done"
+    carrying the complete text.
+    """
+    chunks = prepare_chunks(feedback_list) if feedback_list else []
+
+    if not chunks:
+        message = "No valid text signals detected." if feedback_list else "No feedback available for summarization."
+        yield "done", message
+        return
+
+    backend = resolve_backend(feedback_list, college_code, backend_name)
+    total = len(chunks)
+
+    if not backend.hierarchical:
+        yield "progress", f"{backend.name} selection"
+        yield "done", backend.summarize("\n".join(line for chunk in chunks for line in chunk))
+        return
+
+    # Map stage: per-chunk summaries are intermediate, only progress is pushed
+    if total == 1:
+        final_input = "\n".join(chunks[0])
+    else:
+        chunk_summaries = []
+        for i, chunk in enumerate(chunks):
+            yield "progress", f"chunk {i+1}/{total}"
+            chunk_summaries.append(summarize_chunk("\n".join(chunk), backend))
+        final_input = "\n".join(chunk_summaries)
+
+    # Reduce stage: stream tokens as they are generated
+    yield "progress", "final summary" if total > 1 else f"chunk 1/{total}"
+    pieces = []
+    for piece in stream_chunk(final_input, backend):
+        pieces.append(piece)
+        yield "token", piece
+
+    yield "done", "".join(pieces).strip()
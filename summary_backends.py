@@ -0,0 +1,284 @@
+# summary_backends.py
+import os
+import re
+import copy
+from threading import Event, Thread, Lock
+
+# --- CONFIGURATION ---
+# SUMMARY_BACKEND            default backend for every college
+# SUMMARY_BACKEND_OVERRIDES  per-college overrides, e.g. "AIFB001:extractive,XYZ002:llamacpp"
+# SUMMARY_LARGE_FORM_SIZE    forms with more responses than this use SUMMARY_LARGE_FORM_BACKEND
+DEFAULT_BACKEND = os.environ.get("SUMMARY_BACKEND", "transformers")
+BACKEND_OVERRIDES = dict(
+    item.split(":", 1) for item in os.environ.get("SUMMARY_BACKEND_OVERRIDES", "").split(",") if ":" in item
+)
+LARGE_FORM_SIZE = int(os.environ.get("SUMMARY_LARGE_FORM_SIZE", "0"))
+LARGE_FORM_BACKEND = os.environ.get("SUMMARY_LARGE_FORM_BACKEND", "extractive")
+# Reuse the key/value cache of the fixed instruction preamble across chunks and forms
+PREFIX_CACHE = os.environ.get("SUMMARY_PREFIX_CACHE", "1") == "1"
+
+MAX_NEW_TOKENS = 200
+
+def build_prompt(feedback_text: str) -> str:
+    return f"""
+You are an AI assistant summarizing student feedback for college administration.
+Summarize the following feedbacks into 4–5 concise lines.
+Focus on common opinions, major concerns, and overall experience.
+Do NOT mention individual students.
+
+Feedbacks:
+{feedback_text}
+"""
+
+# --- BACKEND INTERFACE ---
+class SummaryBackend:
+    name = "base"
+    # Hierarchical backends get chunked map/reduce input; the others see every line at once
+    hierarchical = True
+
+    def summarize(self, feedback_text: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, feedback_text: str):
+        yield self.summarize(feedback_text)
+
+    def count_tokens(self, text: str) -> int:
+        return len(text.split())
+
+# --- 1. TRANSFORMERS (Qwen on torch) ---
+class TransformersBackend(SummaryBackend):
+    name = "transformers"
+    MODEL_NAME = os.environ.get("SUMMARY_HF_MODEL", "Qwen/Qwen2.5-1.5B-Instruct")
+
+    def __init__(self):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM
+
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(self.MODEL_NAME)
+        self.model = AutoModelForCausalLM.from_pretrained(
+            self.MODEL_NAME,
+            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+            device_map="auto"
+        )
+        self.model.eval()
+        self.generation_kwargs = {
+            "max_new_tokens": MAX_NEW_TOKENS,
+            "temperature": 0.3,
+            "do_sample": False,
+            "pad_token_id": self.tokenizer.eos_token_id,
+        }
+        self.prefix_cache = None
+        if PREFIX_CACHE:
+            self.warm_prefix_cache()
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False).input_ids)
+
+    def format_prompt(self, feedback_text: str) -> str:
+        # Format the prompt for the Qwen Chat Template
+        messages = [{"role": "user", "content": build_prompt(feedback_text)}]
+        return self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+
+    def warm_prefix_cache(self):
+        # Everything before the feedback text is identical for every call:
+        # run it through the model once and keep its key/value cache.
+        from transformers import DynamicCache
+
+        marker = "<<FEEDBACK>>"
+        prefix, self.prompt_tail = self.format_prompt(marker).split(marker)
+        self.prefix_ids = self.tokenizer(prefix, return_tensors="pt", add_special_tokens=False).input_ids.to(self.model.device)
+        with self.torch.no_grad():
+            self.prefix_cache = self.model(
+                input_ids=self.prefix_ids, past_key_values=DynamicCache(), use_cache=True
+            ).past_key_values
+        print(f"✅ Summary prompt prefix cached ({self.prefix_ids.shape[1]} tokens)")
+
+    def build_inputs(self, feedback_text: str):
+        if self.prefix_cache is None:
+            return dict(self.tokenizer(self.format_prompt(feedback_text), return_tensors="pt").to(self.model.device))
+
+        # Prefix ids must match the cached ones exactly, so only the variable part is tokenized here
+        suffix_ids = self.tokenizer(feedback_text + self.prompt_tail, return_tensors="pt",
+                                    add_special_tokens=False).input_ids.to(self.model.device)
+        input_ids = self.torch.cat([self.prefix_ids, suffix_ids], dim=1)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": self.torch.ones_like(input_ids),
+            # generate() extends the cache in place, so every call works on its own copy
+            "past_key_values": copy.deepcopy(self.prefix_cache),
+        }
+
+    def summarize(self, feedback_text: str) -> str:
+        inputs = self.build_inputs(feedback_text)
+
+        with self.torch.no_grad():
+            output = self.model.generate(**inputs, **self.generation_kwargs)
+
+        # Decode only the new generated tokens (the summary)
+        response = self.tokenizer.decode(output[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+        return response.strip()
+
+    def stream(self, feedback_text: str):
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+        inputs = self.build_inputs(feedback_text)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        cancelled = Event()
+        torch = self.torch
+
+        class StopWhenCancelled(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return torch.full((input_ids.shape[0],), cancelled.is_set(), dtype=torch.bool, device=input_ids.device)
+
+        def _run():
+            with torch.no_grad():
+                self.model.generate(**inputs, **self.generation_kwargs, streamer=streamer,
+                                    stopping_criteria=StoppingCriteriaList([StopWhenCancelled()]))
+
+        worker = Thread(target=_run, daemon=True)
+        worker.start()
+        try:
+            for piece in streamer:
+                if piece:
+                    yield piece
+        finally:
+            # A closed stream (client gone) stops generate() at the next token instead of running to
+            # MAX_NEW_TOKENS; returning only once it has stopped keeps the caller's model slot honest
+            cancelled.set()
+            worker.join()
+
+# --- 2. LLAMA.CPP (quantized GGUF) ---
+class LlamaCppBackend(SummaryBackend):
+    name = "llamacpp"
+    MODEL_PATH = os.environ.get("SUMMARY_GGUF_PATH", os.path.join("models", "qwen2.5-1.5b-instruct-q4_k_m.gguf"))
+
+    def __init__(self):
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise RuntimeError("llamacpp backend requires 'llama-cpp-python' (pip install llama-cpp-python)") from e
+
+        self.llm = Llama(
+            model_path=self.MODEL_PATH,
+            n_ctx=int(os.environ.get("SUMMARY_GGUF_CTX", "4096")),
+            n_threads=int(os.environ.get("SUMMARY_GGUF_THREADS", str(os.cpu_count() or 4))),
+            verbose=False
+        )
+        if PREFIX_CACHE:
+            # llama.cpp keeps evaluated prompt state and reuses the longest matching prefix
+            from llama_cpp import LlamaRAMCache
+            self.llm.set_cache(LlamaRAMCache())
+        # llama.cpp contexts are not re-entrant
+        self.lock = Lock()
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+    def _completion(self, feedback_text: str, stream: bool):
+        return self.llm.create_chat_completion(
+            messages=[{"role": "user", "content": build_prompt(feedback_text)}],
+            max_tokens=MAX_NEW_TOKENS,
+            temperature=0.0,
+            stream=stream
+        )
+
+    def summarize(self, feedback_text: str) -> str:
+        with self.lock:
+            result = self._completion(feedback_text, stream=False)
+        return result["choices"][0]["message"]["content"].strip()
+
+    def stream(self, feedback_text: str):
+        with self.lock:
+            for part in self._completion(feedback_text, stream=True):
+                piece = part["choices"][0]["delta"].get("content")
+                if piece:
+                    yield piece
+
+# --- 3. EXTRACTIVE (embeddings + centroid/MMR, no generation) ---
+class ExtractiveBackend(SummaryBackend):
+    name = "extractive"
+    hierarchical = False
+    EMBED_MODEL = os.environ.get("SUMMARY_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    NUM_SENTENCES = int(os.environ.get("SUMMARY_EXTRACTIVE_SENTENCES", "5"))
+    MMR_LAMBDA = 0.7
+
+    def __init__(self):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(self.EMBED_MODEL)
+        self.model = AutoModel.from_pretrained(self.EMBED_MODEL)
+        self.model.eval()
+
+    def embed(self, sentences, batch_size=64):
+        torch = self.torch
+        vectors = []
+        for i in range(0, len(sentences), batch_size):
+            batch = self.tokenizer(sentences[i:i + batch_size], padding=True, truncation=True,
+                                   max_length=128, return_tensors="pt")
+            with torch.no_grad():
+                hidden = self.model(**batch).last_hidden_state
+            # Mean pooling over real tokens, then L2 normalise
+            mask = batch["attention_mask"].unsqueeze(-1).float()
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            vectors.append(torch.nn.functional.normalize(pooled, dim=1))
+        return torch.cat(vectors)
+
+    def summarize(self, feedback_text: str) -> str:
+        sentences = split_sentences(feedback_text)
+        if len(sentences) <= self.NUM_SENTENCES:
+            return " ".join(sentences)
+
+        vectors = self.embed(sentences)
+        centroid = self.torch.nn.functional.normalize(vectors.mean(0), dim=0)
+        relevance = vectors @ centroid
+        similarity = vectors @ vectors.T
+
+        # Maximal Marginal Relevance: close to the centroid, far from what is already picked
+        selected = [int(relevance.argmax())]
+        while len(selected) < self.NUM_SENTENCES:
+            redundancy = similarity[:, selected].max(dim=1).values
+            scores = self.MMR_LAMBDA * relevance - (1 - self.MMR_LAMBDA) * redundancy
+            scores[selected] = float("-inf")
+            selected.append(int(scores.argmax()))
+
+        return " ".join(sentences[i] for i in selected)
+
+def split_sentences(text: str) -> list:
+    # Feedback lines are short; split on newlines and sentence punctuation, drop duplicates
+    seen, sentences = set(), []
+    for part in re.split(r"(?<=[.!?])\s+|\n+", text):
+        part = part.strip()
+        key = part.lower()
+        if part and key not in seen:
+            seen.add(key)
+            sentences.append(part)
+    return sentences
+
+# --- REGISTRY ---
+BACKENDS = {
+    TransformersBackend.name: TransformersBackend,
+    LlamaCppBackend.name: LlamaCppBackend,
+    ExtractiveBackend.name: ExtractiveBackend,
+}
+
+_instances = {}
+_instances_lock = Lock()
+
+def get_backend(name: str = None) -> SummaryBackend:
+    # Backends are loaded lazily, once per process
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown summary backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    with _instances_lock:
+        if name not in _instances:
+            print(f"⚡ Loading summary backend: {name}")
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
+
+def select_backend_name(college_code: str = None, num_responses: int = 0) -> str:
+    if LARGE_FORM_SIZE and num_responses > LARGE_FORM_SIZE:
+        return LARGE_FORM_BACKEND
+    return BACKEND_OVERRIDES.get(college_code, DEFAULT_BACKEND)
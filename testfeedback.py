@@ -1,15 +1,16 @@
-from transformers import BertTokenizer, BertForSequenceClassification
+from transformers import BertForSequenceClassification
+from tokenization import load_tokenizer, encode_batch
 import torch
 
 # Load saved model and tokenizer
 model_path = r"D:\Projects\StudentFeedbackAnalysis\student_feedback_bert"
-tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
+tokenizer = load_tokenizer("bert-base-uncased")
 model = BertForSequenceClassification.from_pretrained(model_path)
 model.eval()
 
 # Example feedback
 text = "The teacher explained concepts very clearly and was supportive."
-inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+inputs = encode_batch(tokenizer, [text], return_tensors="pt")
 with torch.no_grad():
     outputs = model(**inputs)
     pred = torch.argmax(outputs.logits, dim=1).item()
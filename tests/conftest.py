@@ -0,0 +1,134 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# Settings the modules read at import time: cheap password hashes, no background threads,
+# and a scratch working directory for the relative data/ paths until a test picks its own
+os.environ.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+os.environ.setdefault("BACKLOG_INTERVAL_SECONDS", "0")
+os.environ.setdefault("MODEL_POLL_SECONDS", "0")
+os.environ.setdefault("SUMMARY_BACKEND", "echo")
+os.chdir(tempfile.mkdtemp(prefix="feedback-tests-"))
+
+import db  # noqa: E402
+import db_postgres  # noqa: E402
+import summary_backends  # noqa: E402
+
+ADMIN = ("admin@college.com", "admin123")
+COLLEGE = "AIFB001"
+
+class EchoBackend(summary_backends.SummaryBackend):
+    """Summary backend without a model: the 'summary' is the first line, streamed word by word."""
+    name = "echo"
+
+    def summarize(self, feedback_text):
+        return feedback_text.splitlines()[0]
+
+    def stream(self, feedback_text):
+        for word in self.summarize(feedback_text).split():
+            yield word + " "
+
+summary_backends.BACKENDS[EchoBackend.name] = EchoBackend
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Every test gets its own data/ folder, so SQLite files and shards never leak between tests
+    monkeypatch.chdir(tmp_path)
+    db._ready_shards.clear()
+    return tmp_path
+
+@pytest.fixture(scope="session")
+def postgres_url(tmp_path_factory):
+    """DATABASE_URL when set, otherwise a throwaway server started with pgserver (requirements-dev.txt)."""
+    if db_postgres.psycopg is None:
+        pytest.skip("install psycopg to run the PostgreSQL tests")
+    if os.environ.get("DATABASE_URL"):
+        yield os.environ["DATABASE_URL"]
+        return
+    pgserver = pytest.importorskip("pgserver", reason="set DATABASE_URL or install pgserver to run the PostgreSQL tests")
+    server = pgserver.get_server(tmp_path_factory.mktemp("pgdata"), cleanup_mode="stop")
+    yield server.get_uri()
+    if db_postgres._pool is not None:
+        db_postgres._pool.close()
+        db_postgres._pool = None
+    server.cleanup()
+
+@pytest.fixture
+def db_backend(request, monkeypatch):
+    """SQLite by default; parametrize with indirect=True to also run against PostgreSQL."""
+    backend = getattr(request, "param", "sqlite")
+    if backend == "postgres":
+        url = request.getfixturevalue("postgres_url")
+        monkeypatch.setattr(db, "DB_BACKEND", "postgres")
+        monkeypatch.setattr(db_postgres, "DATABASE_URL", url)
+        conn = db_postgres.get_connection()
+        conn.execute("DROP SCHEMA public CASCADE")
+        conn.execute("CREATE SCHEMA public")
+        conn.commit()
+        conn.close()
+    return backend
+
+@pytest.fixture
+def app_module(workdir, db_backend):
+    import app as app_module
+    app_module.app.testing = True
+    app_module.lookup_profile_id.cache_clear()
+    db.init_db()
+    return app_module
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+def login(client, email, password, role):
+    return client.post("/login", data={"email": email, "password": password, "role": role})
+
+def query(sql, params=(), college_code=COLLEGE):
+    conn = db.get_connection(college_code)
+    try:
+        return [tuple(r) for r in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
+@pytest.fixture
+def college(app_module):
+    """An approved teacher with one form and an approved student, created through the routes."""
+    admin = app_module.app.test_client()
+    login(admin, *ADMIN, "admin")
+    admin.post("/admin/add_teacher", data={"email": "teacher@college.com", "password": "teach123",
+                                           "name": "Asha Rao", "department": "CSE"})
+
+    guest = app_module.app.test_client()
+    guest.post("/register", data={"name": "Ravi K", "email": "student@college.com", "student_id": "PRN001",
+                                  "password": "stud123", "college_code": COLLEGE, "role": "student"})
+    student_user = query("SELECT id FROM users WHERE email = ?", ("student@college.com",))[0][0]
+    admin.post("/admin/approve_user", data={"user_id": student_user, "action": "approve"})
+
+    teacher = app_module.app.test_client()
+    login(teacher, "teacher@college.com", "teach123", "teacher")
+    teacher.post("/teacher/create_form", data={"title": "Data Structures"})
+    form_id = query("SELECT id FROM feedback_forms")[0][0]
+
+    student = app_module.app.test_client()
+    login(student, "student@college.com", "stud123", "student")
+    return {"admin": admin, "teacher": teacher, "student": student, "form_id": form_id,
+            "student_user_id": student_user}
+
+def enrol(app_module, college, prn):
+    """Register, approve and log in one more student; returns their client."""
+    email = f"{prn.lower()}@college.com"
+    app_module.app.test_client().post("/register", data={"name": prn, "email": email, "student_id": prn,
+                                                         "password": "stud123", "college_code": COLLEGE, "role": "student"})
+    user_id = query("SELECT id FROM users WHERE email = ?", (email,))[0][0]
+    college["admin"].post("/admin/approve_user", data={"user_id": user_id, "action": "approve"})
+    client = app_module.app.test_client()
+    login(client, email, "stud123", "student")
+    return client
+
+def submit(student, form_id, text):
+    return student.post("/student/dashboard", data={"action": "submit_feedback", "form_id": form_id, "feedback": text})
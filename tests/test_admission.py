@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+import backlog
+from admission import Gate, ModelBusy
+from instrumentation import MODEL_ADMISSIONS
+from conftest import query, submit
+
+def outcomes(name):
+    return {outcome: MODEL_ADMISSIONS.series[(name, outcome)]
+            for outcome in ("admitted", "queued", "rejected_full", "rejected_timeout")}
+
+def test_admits_up_to_the_concurrency_limit():
+    gate = Gate("test_limit", concurrency=2, queue_size=0, wait_seconds=0.1)
+    gate.acquire()
+    gate.acquire()
+    assert not gate.has_capacity()
+    with pytest.raises(ModelBusy):
+        gate.acquire()
+    gate.release()
+    assert gate.has_capacity()
+    gate.acquire()
+    assert outcomes("test_limit") == {"admitted": 3, "queued": 0, "rejected_full": 1, "rejected_timeout": 0}
+
+def test_full_queue_rejects_immediately():
+    gate = Gate("test_full", concurrency=1, queue_size=1, wait_seconds=5)
+    gate.acquire()
+    waiter = threading.Thread(target=gate.acquire, args=(5,))
+    waiter.start()
+    while not gate.waiting:
+        time.sleep(0.01)
+    start = time.perf_counter()
+    with pytest.raises(ModelBusy):
+        gate.acquire()
+    assert time.perf_counter() - start < 1  # no wait for a queue that is already full
+    gate.release()
+    waiter.join(5)
+    assert gate.active == 1 and gate.waiting == 0
+
+def test_queued_caller_times_out():
+    gate = Gate("test_timeout", concurrency=1, queue_size=4, wait_seconds=0.05)
+    gate.acquire()
+    with pytest.raises(ModelBusy):
+        gate.acquire()
+    assert gate.waiting == 0
+    assert outcomes("test_timeout")["rejected_timeout"] == 1
+
+def test_queued_caller_gets_the_released_slot():
+    gate = Gate("test_handoff", concurrency=1, queue_size=4, wait_seconds=5)
+    gate.acquire()
+    threading.Timer(0.05, gate.release).start()
+    gate.acquire()  # admitted once the first caller releases
+    assert gate.active == 1
+    assert outcomes("test_handoff")["queued"] == 1
+
+def test_guard_releases_the_slot_when_the_call_fails():
+    gate = Gate("test_guard", concurrency=1, queue_size=0, wait_seconds=0)
+
+    @gate.guard
+    def broken(text):
+        raise RuntimeError(text)
+
+    with pytest.raises(RuntimeError):
+        broken("boom")
+    assert gate.active == 0
+    assert gate.guard(len)("abc") == 3
+
+def test_saturated_sentiment_is_stored_and_scored_by_the_backlog(college, app_module, monkeypatch):
+    gate = app_module.SENTIMENT_GATE
+    monkeypatch.setattr(gate, "wait_seconds", 0)
+    monkeypatch.setattr(gate, "active", gate.concurrency)  # every slot taken by other requests
+
+    submit(college["student"], college["form_id"], "Labs were fine.")
+    assert query("SELECT sentiment FROM feedback_responses") == [(None,)]
+
+    # The backlog's scorer must not take the gate itself: the backlog already holds the slot
+    monkeypatch.setattr(gate, "active", gate.concurrency - 1)
+    assert backlog.drain(app_module.backlog_classify) == 1
+    assert query("SELECT sentiment FROM feedback_responses") == [("Neutral",)]
+    assert gate.active == gate.concurrency - 1
@@ -0,0 +1,62 @@
+from conftest import ADMIN, COLLEGE, login, query
+
+def register(client, email, role="student", college_code=COLLEGE):
+    client.post("/register", data={"name": email.split("@")[0], "email": email, "student_id": email, "password": "pw",
+                                   "college_code": college_code, "role": role})
+    return query("SELECT id FROM users WHERE email = ?", (email,))[0][0]
+
+def statuses(*ids):
+    return [query("SELECT status FROM users WHERE id = ?", (i,))[0][0] for i in ids]
+
+def test_form_post_approves_selected(college, client):
+    ids = [register(client, f"s{i}@x.com") for i in range(3)]
+    response = college["admin"].post("/admin/approve_users", data={"action": "approve", "user_ids": ids[:2]},
+                                     follow_redirects=True)
+    assert b"2 nodes approved" in response.data
+    assert statuses(*ids) == ["approved", "approved", "pending"]
+
+def test_teacher_only_acts_on_students(college, client):
+    student = register(client, "s@x.com")
+    teacher = register(client, "t@x.com", role="teacher")
+    response = college["teacher"].post("/approve_students", json={"action": "approve", "user_ids": [student, teacher]})
+    assert response.get_json() == {"status": "approved", "count": 1}
+    assert statuses(student, teacher) == ["approved", "pending"]
+    logs = query("SELECT acted_by_user_id, role FROM approval_logs WHERE target_user_id = ?", (student,))
+    assert logs == [(query("SELECT id FROM users WHERE email = 'teacher@college.com'")[0][0], "student")]
+
+def test_scope_all_respects_filter(college, client):
+    ravi, asha = register(client, "ravi@x.com"), register(client, "asha@x.com")
+    response = college["admin"].post("/admin/approve_users", json={"action": "reject", "scope": "all", "q": "ravi"})
+    assert response.get_json()["count"] == 1
+    assert statuses(ravi, asha) == ["rejected", "pending"]
+
+def test_other_colleges_are_untouched(college, client, app_module):
+    superadmin = app_module.app.test_client()
+    login(superadmin, "omdhage.dev@gmail.com", "dhage04", "superadmin")
+    superadmin.post("/superadmin/add_admin", data={"email": "admin@xyz.com", "password": "pw", "college_code": "XYZ002"})
+    outsider = register(client, "o@x.com", college_code="XYZ002")
+    response = college["admin"].post("/admin/approve_users", json={"action": "approve", "user_ids": [outsider]})
+    assert response.get_json()["count"] == 0
+    assert statuses(outsider) == ["pending"]
+
+def test_already_decided_users_are_skipped(college, client):
+    user = register(client, "s@x.com")
+    college["admin"].post("/admin/approve_users", json={"action": "approve", "user_ids": [user]})
+    response = college["admin"].post("/admin/approve_users", json={"action": "reject", "user_ids": [user]})
+    assert response.get_json()["count"] == 0
+    assert statuses(user) == ["approved"]
+    assert query("SELECT action FROM approval_logs WHERE target_user_id = ?", (user,)) == [("approved",)]
+
+def test_pending_list_pages_and_searches(college, client, monkeypatch, app_module):
+    monkeypatch.setattr(app_module, "PENDING_PAGE_SIZE", 2)
+    for i in range(5):
+        register(client, f"s{i}@x.com")
+    page = college["admin"].get("/admin/dashboard?page=3").data
+    assert b"s4@x.com" in page and b"s0@x.com" not in page
+    found = college["admin"].get("/admin/dashboard?q=s2@").data
+    assert b"s2@x.com" in found and b"s3@x.com" not in found
+
+def test_requires_login(client):
+    assert client.post("/admin/approve_users", json={"action": "approve", "scope": "all"}).status_code == 302
+    login(client, *ADMIN, "admin")
+    assert client.post("/approve_students", json={"action": "approve", "scope": "all"}).status_code == 302
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("asgiref")
+from asgiref.testing import ApplicationCommunicator
+
+from conftest import query, submit
+
+@pytest.fixture
+def asgi(app_module):
+    import asgi
+    return asgi
+
+def http_scope(path, cookie=None, method="GET", headers=()):
+    headers = [(b"host", b"testserver"), *headers]
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    return {"type": "http", "http_version": "1.1", "method": method, "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "", "scheme": "http", "headers": headers,
+            "server": ("testserver", 80), "client": ("127.0.0.1", 1234)}
+
+async def call(application, scope, body=b""):
+    communicator = ApplicationCommunicator(application, scope)
+    await communicator.send_input({"type": "http.request", "body": body, "more_body": False})
+    start = await communicator.receive_output(5)
+    body = b""
+    while True:
+        message = await communicator.receive_output(5)
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    await communicator.wait(5)
+    return start["status"], dict(start["headers"]), body
+
+def session_cookie(app_module, client):
+    name = app_module.app.config["SESSION_COOKIE_NAME"]
+    return f"{name}={client.get_cookie(name).value}"
+
+def test_wsgi_requests_run_concurrently_off_the_loop(asgi, monkeypatch):
+    # Both requests must be inside the view at the same time, each on a thread of its own
+    both_in = threading.Barrier(2, timeout=5)
+    original = asgi.app.wsgi_app
+    monkeypatch.setattr(asgi.app, "wsgi_app", lambda *a: both_in.wait() is None or original(*a))
+
+    async def run():
+        return await asyncio.gather(*(call(asgi.application, http_scope("/login")) for _ in range(2)))
+    for status, _, body in asyncio.run(run()):
+        assert status == 200 and b"<form" in body
+
+def test_submission_is_scored_on_the_inference_pool(asgi, college, app_module, monkeypatch):
+    threads = []
+
+    def score(text):
+        threads.append(threading.current_thread().name)
+        return "Positive", 0.9, "v1"
+
+    def blocking(text):
+        raise AssertionError("the view must not call the model under asgi")
+    monkeypatch.setattr(asgi.inference, "score_sentiment", score)
+    monkeypatch.setattr(app_module, "predict_sentiment_scored", blocking)
+
+    body = f"action=submit_feedback&form_id={college['form_id']}&feedback=Clear+lectures.".encode()
+    scope = http_scope("/student/dashboard", session_cookie(app_module, college["student"]), "POST",
+                       [(b"content-type", b"application/x-www-form-urlencoded"),
+                        (b"content-length", str(len(body)).encode())])
+    status, _, _ = asyncio.run(call(asgi.application, scope, body))
+    assert status == 200
+    assert threads == ["inference_0"]
+    assert query("SELECT feedback, sentiment, model_version FROM feedback_responses") == [
+        ("Clear lectures.", "Positive", "v1")]
+
+def test_closing_the_summary_stream_stops_the_producer(asgi, monkeypatch):
+    closed = threading.Event()
+
+    def endless(feedback_list, college_code=None):
+        try:
+            while True:
+                yield "token", "word "
+        finally:
+            closed.set()
+    monkeypatch.setattr(asgi.inference, "stream_final_summary", endless)
+
+    async def first_token():
+        events = asgi.inference.stream_summary(["Good."])
+        item = await events.__anext__()
+        await events.aclose()
+        return item
+    assert asyncio.run(first_token()) == ("token", "word ")
+    assert closed.is_set()  # before aclose() returned
+
+def test_stream_requires_session(asgi):
+    status, headers, _ = asyncio.run(call(asgi.application, http_scope("/analytics/abc/stream")))
+    assert status == 302 and headers[b"location"] == b"/login"
+
+def test_native_stream(asgi, college, app_module):
+    submit(college["student"], college["form_id"], "Clear lectures and good notes.")
+    cookie = session_cookie(app_module, college["teacher"])
+    status, headers, body = asyncio.run(call(asgi.application, http_scope(f"/analytics/{college['form_id']}/stream", cookie)))
+    assert status == 200 and headers[b"content-type"].startswith(b"text/event-stream")
+    text = body.decode()
+    assert "event: token" in text and text.rstrip().splitlines()[-2] == "event: done"
+
+    missing = asyncio.run(call(asgi.application, http_scope("/analytics/nope/stream", cookie)))
+    assert missing[0] == 404
+
+def test_lifespan(asgi):
+    async def run():
+        communicator = ApplicationCommunicator(asgi.application, {"type": "lifespan"})
+        await communicator.send_input({"type": "lifespan.startup"})
+        assert (await communicator.receive_output(1))["type"] == "lifespan.startup.complete"
+    asyncio.run(run())
+
+def test_disconnect_cancels_the_native_stream_before_freeing_the_slot(asgi, college, app_module, monkeypatch):
+    held_at_close = []
+
+    def endless(feedback_list, college_code=None):
+        try:
+            while True:
+                time.sleep(0.01)
+                yield "token", "word "
+        finally:
+            held_at_close.append(asgi.SUMMARY_GATE.active)
+    monkeypatch.setattr(asgi.inference, "stream_final_summary", endless)
+    submit(college["student"], college["form_id"], "Clear lectures and good notes.")
+    scope = http_scope(f"/analytics/{college['form_id']}/stream", session_cookie(app_module, college["teacher"]))
+
+    async def run():
+        communicator = ApplicationCommunicator(asgi.application, scope)
+        await communicator.send_input({"type": "http.request", "body": b"", "more_body": False})
+        assert (await communicator.receive_output(5))["status"] == 200
+        assert (await communicator.receive_output(5))["body"].startswith(b"event: token")
+        await communicator.send_input({"type": "http.disconnect"})
+        # The handler notices by itself; nothing cancels it from outside
+        await asyncio.wait([communicator.future], timeout=5)
+        assert communicator.future.done() and not communicator.future.cancelled()
+        assert communicator.output_queue.empty()  # no closing body for a client that left
+    asyncio.run(run())
+    assert held_at_close == [1] and asgi.SUMMARY_GATE.active == 0
@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+import re
+
+import pytest
+from flask import Flask, Response
+from werkzeug.datastructures import Accept
+
+import assets
+from conftest import ROOT
+
+@pytest.fixture
+def static_dir(tmp_path):
+    folder = tmp_path / "static"
+    (folder / "css").mkdir(parents=True)
+    (folder / "css" / "site.css").write_text("body { color: #222; }\n" * 200)
+    (folder / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 4)
+    (folder / ".hidden").write_text("skip me")
+    return folder
+
+def test_fingerprint_follows_the_content():
+    first = assets.fingerprint("css/site.css", b"a")
+    assert re.fullmatch(r"css/site\.[0-9a-f]{12}\.css", first)
+    assert assets.fingerprint("css/site.css", b"a") == first
+    assert assets.fingerprint("css/site.css", b"b") != first
+
+def test_build_writes_fingerprinted_and_precompressed_copies(static_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "_brotli", lambda: None)
+    build_dir = tmp_path / "build"
+    manifest, encodings = assets.build(str(static_dir), str(build_dir))
+
+    assert set(manifest) == {"css/site.css", "logo.png"}
+    css, png = manifest["css/site.css"], manifest["logo.png"]
+    assert (build_dir / css).read_bytes() == (static_dir / "css" / "site.css").read_bytes()
+    assert gzip.decompress((build_dir / (css + ".gz")).read_bytes()) == (build_dir / css).read_bytes()
+    assert encodings == {css: ["gzip"], png: []}  # images are not recompressed
+    assert json.loads((build_dir / "manifest.json").read_text()) == {"files": manifest, "encodings": encodings}
+
+    # A changed file gets a new name; the old one stays for pages rendered before the deploy
+    (static_dir / "css" / "site.css").write_text("body { color: #000; }\n" * 200)
+    manifest2, _ = assets.build(str(static_dir), str(build_dir))
+    assert manifest2["css/site.css"] != css
+    assert (build_dir / css).exists() and (build_dir / manifest2["css/site.css"]).exists()
+
+def test_best_encoding_prefers_brotli_only_when_installed(monkeypatch):
+    accepted = Accept([("gzip", 1), ("br", 1)])
+    monkeypatch.setattr(assets, "_brotli", lambda: None)
+    assert assets.best_encoding(accepted) == "gzip"
+    monkeypatch.setattr(assets, "_brotli", lambda: object())
+    assert assets.best_encoding(accepted) == "br"
+    assert assets.best_encoding(Accept([("identity", 1)])) is None
+
+@pytest.mark.parametrize("response, compressed", [
+    (Response("x" * 4096, mimetype="text/html"), True),
+    (Response("x" * 100, mimetype="text/html"), False),  # below COMPRESS_MIN_BYTES
+    (Response(b"\x00" * 4096, mimetype="image/png"), False),
+    (Response(iter(["x" * 4096]), mimetype="text/event-stream"), False),  # streamed (SSE)
+    (Response("x" * 4096, status=404, mimetype="text/html"), False),
+])
+def test_compress_response(response, compressed, monkeypatch):
+    monkeypatch.setattr(assets, "_brotli", lambda: None)
+    if not response.is_streamed:
+        response.set_etag("abc")
+    with Flask(__name__).test_request_context(headers={"Accept-Encoding": "gzip, br"}):
+        out = assets.compress_response(response)
+    assert (out.headers.get("Content-Encoding") == "gzip") is compressed
+    if compressed:
+        assert gzip.decompress(out.get_data()) == b"x" * 4096
+        assert out.get_etag() == ("abc", True)  # strong validator downgraded
+        assert "Accept-Encoding" in out.vary
+
+def test_asset_route_serves_the_stored_encoding_immutably(client):
+    page = client.get("/login").get_data(as_text=True)
+    url = re.search(r'/assets/css/login\.[0-9a-f]{12}\.css', page).group(0)
+    with open(os.path.join(ROOT, "static", "css", "login.css"), "rb") as f:
+        source = f.read()
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200 and response.mimetype == "text/css"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == source
+    assert response.cache_control.immutable and response.cache_control.max_age == assets.MAX_AGE
+    assert "Accept-Encoding" in response.vary
+
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers and plain.data == source
+    assert client.get("/assets/css/login.000000000000.css").status_code == 404
+
+def test_pages_revalidate_with_a_weak_etag(client):
+    first = client.get("/login")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.cache_control.no_cache and not first.cache_control.no_store
+    again = client.get("/login", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and not again.data
+
+    gzipped = client.get("/login", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert gzipped.status_code == 304
+
+def test_logged_in_html_is_not_stored(college):
+    response = college["student"].get("/student/dashboard")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache, no-store, must-revalidate"
+    assert "ETag" not in response.headers
+
+    api = college["teacher"].get(f"/api/trends?scope=form&id={college['form_id']}")
+    assert api.cache_control.private and api.cache_control.no_cache
+    assert college["teacher"].get(f"/api/trends?scope=form&id={college['form_id']}",
+                                  headers={"If-None-Match": api.headers["ETag"]}).status_code == 304
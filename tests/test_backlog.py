@@ -0,0 +1,85 @@
+import pytest
+
+import backlog
+import db
+import topics
+from admission import ModelBusy
+from conftest import COLLEGE, enrol, query, submit
+
+pytestmark = pytest.mark.parametrize("db_backend", ["sqlite", "postgres"], indirect=True)
+
+def defer_sentiment(app_module, monkeypatch):
+    def busy(text):
+        raise ModelBusy("sentiment")
+    monkeypatch.setattr(app_module, "predict_sentiment_scored", busy)
+
+@pytest.fixture
+def deferred(college, app_module, monkeypatch):
+    """Three responses stored while the sentiment model was saturated; the second cannot be scored."""
+    defer_sentiment(app_module, monkeypatch)
+    students = [college["student"], enrol(app_module, college, "PRN002"), enrol(app_module, college, "PRN003")]
+    for student, text in zip(students, ["Labs were fine.", "POISON", "The library is great."]):
+        submit(student, college["form_id"], text)
+    assert query("SELECT COUNT(*) FROM feedback_responses WHERE sentiment IS NULL") == [(3,)]
+    return college
+
+def classifier(calls):
+    def classify(texts):
+        calls.append(list(texts))
+        if "POISON" in texts:
+            raise ValueError("cannot score")
+        return [("Positive", 0.9, "v1") for _ in texts]
+    return classify
+
+def test_drain_scores_deferred_responses(deferred):
+    assert backlog.drain(classifier([]), yield_to_live=False) == 2
+    rows = query("SELECT feedback, sentiment, sentiment_confidence, model_version, sentiment_attempts "
+                 "FROM feedback_responses ORDER BY id")
+    assert rows == [("Labs were fine.", "Positive", 0.9, "v1", 0), ("POISON", None, None, None, 1),
+                    ("The library is great.", "Positive", 0.9, "v1", 0)]
+
+def test_one_failing_text_does_not_block_the_batch(deferred):
+    calls = []
+    conn = db.get_connection(COLLEGE)
+    try:
+        assert backlog.score_pending(conn, classifier(calls)) == (2, 1)
+    finally:
+        conn.close()
+    # One batch call, then one call per row once the batch failed
+    assert calls == [["Labs were fine.", "POISON", "The library is great."],
+                     ["Labs were fine."], ["POISON"], ["The library is great."]]
+
+def test_failing_rows_are_given_up_after_the_attempt_limit(deferred):
+    for attempt in range(1, db.SENTIMENT_MAX_ATTEMPTS + 1):
+        backlog.drain(classifier([]), yield_to_live=False)
+        assert query("SELECT sentiment_attempts FROM feedback_responses WHERE feedback = 'POISON'") == [(attempt,)]
+
+    calls = []
+    assert backlog.drain(classifier(calls), yield_to_live=False) == 0
+    assert calls == []  # no longer picked up
+    assert query(f"SELECT COUNT(*) FROM feedback_responses WHERE {db.awaiting_sentiment()}") == [(0,)]
+
+def test_failed_rows_are_retried_on_the_next_run_not_the_same_one(deferred):
+    backlog.drain(classifier([]), yield_to_live=False, batch_size=1)
+    # The first row scored, the second failed once, and the run stopped there
+    assert query("SELECT sentiment, sentiment_attempts FROM feedback_responses ORDER BY id") == [
+        ("Positive", 0), (None, 1), (None, 0)]
+
+def test_busy_model_does_not_count_as_an_attempt(deferred, app_module, monkeypatch):
+    monkeypatch.setattr(backlog.SENTIMENT_GATE, "active", backlog.SENTIMENT_GATE.concurrency)
+    monkeypatch.setattr(backlog.SENTIMENT_GATE, "wait_seconds", 0)
+    conn = db.get_connection(COLLEGE)
+    try:
+        with pytest.raises(ModelBusy):
+            backlog.score_pending(conn, classifier([]))
+    finally:
+        conn.close()
+    assert query("SELECT SUM(sentiment_attempts) FROM feedback_responses") == [(0,)]
+
+def test_given_up_rows_stop_holding_back_topics(deferred):
+    assert topics.run(use_embeddings=False) == 0
+    for _ in range(db.SENTIMENT_MAX_ATTEMPTS):
+        backlog.drain(classifier([]), yield_to_live=False)
+    assert topics.run(use_embeddings=False) == 3
+    # The unlabelled row counts towards the total only
+    assert query("SELECT topic, positive, total FROM form_topics WHERE topic = 'labs'") == [("labs", 1, 1)]
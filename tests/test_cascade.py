@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("sklearn")
+pytest.importorskip("pandas")
+
+from conftest import ROOT
+
+@pytest.fixture(scope="module")
+def cascade():
+    sys.path.insert(0, os.path.join(ROOT, "modules"))
+    try:
+        import cascade
+    except (OSError, ValueError) as e:  # studfeedload needs the bert-base-uncased tokenizer
+        pytest.skip(f"dataset tokenizer unavailable: {e}")
+    return cascade
+
+def probs_for(preds, confidence):
+    probs = torch.full((len(preds), 3), 0.0)
+    for row, (pred, conf) in enumerate(zip(preds, confidence)):
+        probs[row] = (1 - conf) / 2
+        probs[row, pred] = conf
+    return probs
+
+def test_fit_temperature_recovers_the_scale(cascade):
+    torch.manual_seed(0)
+    labels = torch.randint(0, 3, (2000,))
+    true_logits = torch.randn(2000, 3) + 2 * torch.nn.functional.one_hot(labels, 3)
+    # Labels drawn from softmax(true_logits), then the logits are reported 3x overconfident
+    labels = torch.multinomial(torch.softmax(true_logits, dim=-1), 1).squeeze(1)
+    assert cascade.fit_temperature(true_logits * 3, labels) == pytest.approx(3.0, abs=0.3)
+    assert cascade.fit_temperature(true_logits, labels) == pytest.approx(1.0, abs=0.15)
+
+def test_expected_calibration_error(cascade):
+    labels = torch.tensor([0, 1, 2, 0])
+    # Always 90% sure and right 2 of 4 times: off by 0.4
+    probs = probs_for([0, 1, 0, 1], [0.9] * 4)
+    assert cascade.expected_calibration_error(probs, labels) == pytest.approx(0.4)
+    # Always 90% sure and always right: off by 0.1
+    assert cascade.expected_calibration_error(probs_for([0, 1, 2, 0], [0.9] * 4), labels) == pytest.approx(0.1)
+
+def test_pick_threshold_escalates_only_the_uncertain_texts(cascade):
+    labels = torch.tensor([0, 1, 2, 0])
+    # The fast model is right when confident and wrong on its two least confident texts
+    fast = probs_for([0, 1, 0, 1], [0.99, 0.95, 0.6, 0.5])
+    slow = probs_for([0, 1, 2, 0], [0.9] * 4)
+    choice = cascade.pick_threshold(fast, slow, labels, target=1.0)
+    assert choice["threshold"] == pytest.approx(0.95)
+    assert choice["accuracy"] == 1.0 and choice["escalation_rate"] == 0.5
+
+def test_pick_threshold_trades_accuracy_for_escalations_down_to_the_target(cascade):
+    labels = torch.tensor([0, 1, 2, 0])
+    fast = probs_for([0, 1, 0, 1], [0.99, 0.95, 0.6, 0.5])
+    slow = probs_for([0, 1, 2, 0], [0.9] * 4)
+    choice = cascade.pick_threshold(fast, slow, labels, target=0.75)
+    assert choice["threshold"] == pytest.approx(0.6) and choice["escalation_rate"] == 0.25
+
+def test_pick_threshold_never_cuts_between_equal_confidences(cascade):
+    labels = torch.tensor([0, 1, 2])
+    fast = probs_for([0, 0, 2], [0.8, 0.8, 0.4])  # the tied pair has one wrong answer
+    slow = probs_for([0, 1, 2], [0.9] * 3)
+    choice = cascade.pick_threshold(fast, slow, labels, target=1.0)
+    assert choice["escalation_rate"] == 1.0  # only escalating everything keeps accuracy
+
+def test_pick_threshold_returns_none_when_the_target_is_unreachable(cascade):
+    labels = torch.tensor([0, 1])
+    probs = probs_for([1, 0], [0.9, 0.9])
+    assert cascade.pick_threshold(probs, probs, labels, target=0.5) is None
+
+def test_text_probs_average_windows_like_serving(cascade):
+    # Text 0 has two windows (3 and 1 real tokens), text 1 has one
+    logits = torch.tensor([[2.0, 0.0, 0.0], [0.0, 2.0, 0.0], [0.0, 0.0, 1.0]])
+    windows = (logits, torch.tensor([0, 0, 1]), torch.tensor([3.0, 1.0, 4.0]))
+    soft = torch.softmax(logits / 2, dim=-1)
+    probs = cascade.text_probs(windows, temperature=2)
+    assert torch.allclose(probs[0], (3 * soft[0] + soft[1]) / 4)
+    assert torch.allclose(probs[1], soft[2])
+    # One window per text is plain softmax
+    assert torch.allclose(cascade.text_probs((logits, torch.arange(3), torch.ones(3)), 2), soft)
+    assert torch.allclose(cascade.text_probs(logits, 2), soft)
+
+def test_split_held_out_is_disjoint_and_stable(cascade):
+    calibration, evaluation = cascade.split_held_out(10)
+    assert len(calibration) == 5 and sorted(calibration + evaluation) == list(range(10))
+    assert cascade.split_held_out(10) == (calibration, evaluation)
+
+def test_cascade_metrics_route_like_classify(cascade):
+    labels = torch.tensor([0, 1, 2, 0])
+    fast = probs_for([0, 1, 0, 1], [0.99, 0.95, 0.6, 0.5])
+    slow = probs_for([0, 1, 2, 1], [0.9] * 4)
+    # Confidence equal to the threshold stays on the fast model
+    assert cascade.cascade_metrics(fast, slow, labels, 0.95) == {"accuracy": 0.75, "escalation_rate": 0.5}
+    assert cascade.cascade_metrics(fast, slow, labels, 1.01)["accuracy"] == 0.75
@@ -0,0 +1,47 @@
+import argparse
+import csv
+import os
+import re
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import ddp_scaling_bench  # noqa: E402
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """A randomly initialised bert-tiny-sized classifier with a vocab built from the dataset, saved locally."""
+    if not torch.distributed.is_available():
+        pytest.skip("torch built without torch.distributed")
+    path = tmp_path_factory.mktemp("tiny_model")
+    with open(ddp_scaling_bench.CSV_PATH, newline="", encoding="utf-8") as f:
+        words = {w for row in csv.DictReader(f) for w in re.findall(r"\w+|[^\w\s]", row["feedback"].lower())}
+    (path / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(words)) + "\n")
+    transformers.BertTokenizer(str(path / "vocab.txt")).save_pretrained(str(path))
+    config = transformers.BertConfig(vocab_size=len(words) + 5, hidden_size=32, num_hidden_layers=2,
+                                     num_attention_heads=2, intermediate_size=64, num_labels=3)
+    transformers.BertForSequenceClassification(config).save_pretrained(str(path))
+    return str(path)
+
+def run(tiny_model, workers):
+    args = argparse.Namespace(steps=3, warmup=1, batch_size=8, model=tiny_model)
+    return ddp_scaling_bench.launch(workers, 1, args)
+
+def test_single_worker_run(tiny_model):
+    result = run(tiny_model, 1)
+    assert result is not None, "torchrun worker failed (stderr printed above)"
+    assert result["workers"] == 1 and result["threads"] == 1
+    assert result["samples_per_s"] > 0
+
+def test_two_workers_all_reduce_over_gloo(tiny_model):
+    # Both ranks must join the gloo process group and step together, or rank 0 never reports
+    result = run(tiny_model, 2)
+    assert result is not None, "torchrun workers failed (stderr printed above)"
+    assert result["workers"] == 2
+    assert result["samples_per_s"] > 0
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("sklearn")
+pytest.importorskip("pandas")
+
+from transformers.modeling_outputs import SequenceClassifierOutput
+from conftest import ROOT
+
+@pytest.fixture(scope="module")
+def distill():
+    sys.path.insert(0, os.path.join(ROOT, "modules"))
+    try:
+        import distill
+    except (OSError, ValueError) as e:  # studfeedload needs the bert-base-uncased tokenizer
+        pytest.skip(f"dataset tokenizer unavailable: {e}")
+    return distill
+
+class FixedLogits(torch.nn.Module):
+    """Stands in for the student: the same logits for every row, with the usual hard-label loss."""
+    def __init__(self, logits):
+        super().__init__()
+        self.logits = torch.tensor(logits)
+
+    def forward(self, input_ids, labels):
+        logits = self.logits.expand(len(input_ids), -1)
+        return SequenceClassifierOutput(loss=torch.nn.functional.cross_entropy(logits, labels), logits=logits)
+
+def trainer(distill, temperature=2.0, alpha=0.5):
+    # compute_loss only reads the two settings; skip Trainer's model/args setup
+    t = distill.DistillationTrainer.__new__(distill.DistillationTrainer)
+    t.temperature, t.alpha = temperature, alpha
+    return t
+
+def batch(teacher=None):
+    inputs = {"input_ids": torch.zeros(2, 4, dtype=torch.long), "labels": torch.tensor([2, 0])}
+    if teacher is not None:
+        inputs["teacher_logits"] = torch.tensor([teacher, teacher])
+    return inputs
+
+def test_without_teacher_logits_the_loss_is_the_hard_loss(distill):
+    model = FixedLogits([0.1, 0.2, 1.5])
+    hard = model(**batch()).loss
+    assert torch.allclose(trainer(distill).compute_loss(model, batch()), hard)
+    # alpha=1 ignores the teacher entirely
+    assert torch.allclose(trainer(distill, alpha=1.0).compute_loss(model, batch([3.0, 0.0, -3.0])), hard)
+
+def test_soft_loss_is_zero_when_student_matches_teacher(distill):
+    model = FixedLogits([0.1, 0.2, 1.5])
+    loss = trainer(distill, alpha=0.0).compute_loss(model, batch([0.1, 0.2, 1.5]))
+    assert loss.item() == pytest.approx(0.0, abs=1e-6)
+
+def test_soft_loss_is_scaled_by_temperature_squared(distill):
+    model = FixedLogits([0.0, 0.0, 0.0])
+    teacher = [2.0, 0.0, -2.0]
+    t = 4.0
+    loss, outputs = trainer(distill, temperature=t, alpha=0.0).compute_loss(model, batch(teacher), return_outputs=True)
+    p = torch.softmax(torch.tensor(teacher) / t, dim=-1)
+    kl = (p * (p.log() - torch.log(torch.full((3,), 1 / 3)))).sum()
+    assert loss.item() == pytest.approx((kl * t * t).item(), rel=1e-5)
+    assert outputs.logits.shape == (2, 3)
+
+def test_distill_dataset_adds_teacher_logits(distill):
+    base = [{"input_ids": torch.tensor([1, 2]), "labels": torch.tensor(0)}]
+    item = distill.DistillDataset(base, torch.tensor([[1.0, 2.0, 3.0]]))[0]
+    assert torch.equal(item["teacher_logits"], torch.tensor([1.0, 2.0, 3.0]))
+    assert len(distill.DistillDataset(base, None)) == 1
+
+def test_weights_fingerprint_tracks_weight_files_only(distill, tmp_path):
+    (tmp_path / "model.safetensors").write_bytes(b"v1")
+    before = distill.weights_fingerprint(str(tmp_path)).hexdigest()
+    (tmp_path / "config.json").write_text("{}")
+    assert distill.weights_fingerprint(str(tmp_path)).hexdigest() == before
+    (tmp_path / "model.safetensors").write_bytes(b"v2-longer")
+    assert distill.weights_fingerprint(str(tmp_path)).hexdigest() != before
+
+def test_teacher_logits_are_computed_once_and_cached(distill, tmp_path, monkeypatch):
+    # A randomly initialised one-layer BERT saved locally, so no download is needed
+    config = transformers.BertConfig(vocab_size=64, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+                                     intermediate_size=32, num_labels=3)
+    teacher_dir = str(tmp_path / "teacher")
+    transformers.BertForSequenceClassification(config).save_pretrained(teacher_dir)
+    encodings = {"input_ids": [[1, 5, 2, 0], [1, 7, 9, 2]], "attention_mask": [[1, 1, 1, 0], [1, 1, 1, 1]]}
+    from studfeedload import FeedbackDataset
+    dataset = FeedbackDataset(encodings, [0, 2])
+    monkeypatch.setattr(distill, "CACHE_DIR", str(tmp_path / "results"))
+
+    logits = distill.teacher_logits(teacher_dir, dataset)
+    assert logits.shape == (2, 3)
+    assert len(os.listdir(tmp_path / "results")) == 1
+
+    def no_teacher(*args, **kwargs):
+        raise AssertionError("teacher loaded despite cached logits")
+    monkeypatch.setattr(distill.AutoModelForSequenceClassification, "from_pretrained", no_teacher)
+    assert torch.equal(distill.teacher_logits(teacher_dir, dataset), logits)
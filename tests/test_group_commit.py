@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+
+import pytest
+
+import group_commit
+from group_commit import CommitPending, GroupCommitWriter
+
+INSERT = "INSERT INTO t (v) VALUES (?)"
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "gc.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v INTEGER UNIQUE)")
+    conn.commit()
+    conn.close()
+
+    def connect(college_code=None):
+        return sqlite3.connect(path, check_same_thread=False, timeout=30)
+
+    def rows():
+        conn = connect()
+        try:
+            return sorted(r[0] for r in conn.execute("SELECT v FROM t"))
+        finally:
+            conn.close()
+    return connect, rows
+
+def test_concurrent_submissions_share_transactions(database):
+    connect, rows = database
+    writer = GroupCommitWriter(window_ms=50, connect=connect)
+    threads = [threading.Thread(target=writer.submit, args=(None, INSERT, (i,))) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.stop()
+    assert rows() == list(range(20))
+    assert writer.stats["rows"] == 20 and writer.stats["batches"] < 20
+
+def test_bad_row_fails_alone(database):
+    connect, rows = database
+    writer = GroupCommitWriter(window_ms=50, connect=connect)
+    errors = {}
+
+    def submit(value):
+        try:
+            writer.submit(None, INSERT, (value,))
+        except sqlite3.IntegrityError as e:
+            errors[value] = e
+
+    threads = [threading.Thread(target=submit, args=(v,)) for v in (1, 2, 2, 3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.stop()
+    assert rows() == [1, 2, 3]
+    assert list(errors) == [2]
+
+def test_unbatched_mode(database, monkeypatch):
+    connect, rows = database
+    monkeypatch.setattr(group_commit, "GROUP_COMMIT", False)
+    writer = GroupCommitWriter(connect=connect)
+    writer.submit(None, INSERT, (1,))
+    assert rows() == [1] and writer.thread is None
+    with pytest.raises(sqlite3.IntegrityError):
+        writer.submit(None, INSERT, (1,))
+
+def test_slow_commit_is_reported_as_queued(database, monkeypatch):
+    connect, rows = database
+    release = threading.Event()
+
+    def slow_connect(college_code=None):
+        release.wait(5)
+        return connect(college_code)
+
+    monkeypatch.setattr(group_commit, "ACK_TIMEOUT", 0.05)
+    writer = GroupCommitWriter(window_ms=1, connect=slow_connect)
+    with pytest.raises(CommitPending):
+        writer.submit(None, INSERT, (1,))
+    # Still queued, not dropped: it lands once the writer gets through
+    release.set()
+    writer.queue.put(None)
+    writer.thread.join(5)
+    assert rows() == [1]
+
+def test_submit_route_reports_queued(college, monkeypatch, app_module):
+    def pending(*args):
+        raise CommitPending("still queued")
+    monkeypatch.setattr(app_module, "submit_response", pending)
+    response = college["student"].post("/student/dashboard", data={
+        "action": "submit_feedback", "form_id": college["form_id"], "feedback": "Good."})
+    assert b"queued for storage" in response.data
+
+class BrokenRollback:
+    """A connection whose transaction cannot be rolled back after a failed commit."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def executemany(self, *args):
+        return self.conn.executemany(*args)
+
+    def commit(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    def rollback(self):
+        raise sqlite3.OperationalError("cannot rollback")
+
+    def close(self):
+        self.conn.close()
+
+def test_failed_rollback_fails_the_batch_and_keeps_the_writer(database):
+    connect, rows = database
+    broken = [True]
+
+    def flaky_connect(college_code=None):
+        conn = connect(college_code)
+        return BrokenRollback(conn) if broken.pop() else conn
+
+    writer = GroupCommitWriter(window_ms=1, connect=flaky_connect)
+    with pytest.raises(sqlite3.OperationalError, match="cannot rollback"):
+        writer.submit(None, INSERT, (1,))
+    broken.append(False)
+    writer.submit(None, INSERT, (2,))  # same writer thread, still running
+    writer.stop()
+    assert rows() == [2]
+
+def test_locked_database_is_not_replayed_row_by_row(database):
+    connect, rows = database
+    statements = []
+
+    class Locked(BrokenRollback):
+        def executemany(self, sql, params):
+            statements.append(sql)
+            raise sqlite3.OperationalError("database is locked")
+
+        def execute(self, sql, params):
+            statements.append(sql)
+
+        def rollback(self):
+            self.conn.rollback()
+
+    writer = GroupCommitWriter(window_ms=1, connect=lambda college_code=None: Locked(connect()))
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        writer.submit(None, INSERT, (1,))
+    writer.stop()
+    assert statements == [INSERT]
+
+def test_exit_hook_is_registered_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(group_commit.atexit, "register", registered.append)
+    writer = GroupCommitWriter()
+    for _ in range(3):
+        writer.start()
+        writer.stop()
+    assert registered == [writer.stop]
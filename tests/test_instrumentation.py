@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from flask import Flask, Response, stream_with_context
+
+import instrumentation
+from instrumentation import Counter, Histogram, timed
+from conftest import ADMIN, login
+
+def series(metric, *labels):
+    return metric.series.get(labels)
+
+def test_histogram_buckets_and_render():
+    h = Histogram("t_seconds", "test", ("route",))
+    h.observe(0.003, "a")
+    h.observe(0.2, "a")
+    buckets, total, count = h.series[("a",)]
+    assert count == 2 and total == pytest.approx(0.203)
+    assert buckets[0] == 1 and buckets[-1] == 2
+    text = "\n".join(h.render())
+    assert 't_seconds_bucket{route="a",le="+Inf"} 2' in text
+    assert 't_seconds_count{route="a"} 2' in text
+
+def test_counter_render():
+    c = Counter("t_total", "test", ("route",))
+    c.inc("a")
+    c.inc("a", amount=2)
+    assert c.render()[-1] == 't_total{route="a"} 3'
+
+def test_timed_generator_only_counts_iteration(monkeypatch):
+    charged = []
+    monkeypatch.setattr(instrumentation, "record", lambda component, seconds: charged.append((component, seconds)))
+
+    @timed("summary")
+    def produce():
+        yield 1
+        yield 2
+
+    it = produce()
+    time.sleep(0.02)
+    assert list(it) == [1, 2]
+    assert [c for c, _ in charged] == ["summary"] * 3
+    assert sum(s for _, s in charged) < 0.02
+
+def test_server_timing_header_needs_the_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", "s3cret")
+    login(client, *ADMIN, "admin")
+    assert "Server-Timing" not in client.get("/admin/dashboard").headers
+    assert "Server-Timing" not in client.get("/admin/dashboard", headers={"Authorization": "Bearer wrong"}).headers
+    response = client.get("/admin/dashboard", headers={"Authorization": "Bearer s3cret"})
+    assert "db;dur=" in response.headers["Server-Timing"]
+
+def test_server_timing_debug_flag(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "SERVER_TIMING", True)
+    assert "Server-Timing" in client.get("/login").headers
+
+@pytest.fixture
+def stream_app():
+    app = Flask(__name__)
+    instrumentation.init_instrumentation(app)
+    slow = timed("summary")(lambda: time.sleep(0.05) or "token")
+
+    @app.route("/stream")
+    def stream():
+        def generate():
+            yield slow()
+            yield slow()
+        return Response(stream_with_context(generate()), mimetype="text/event-stream")
+    return app
+
+def test_streamed_request_is_observed_on_close(stream_app):
+    route = ("stream", "summary")
+    before = series(instrumentation.COMPONENT_SECONDS, *route)
+    response = stream_app.test_client().get("/stream")
+    assert response.get_data() == b"tokentoken"
+    # Nothing is recorded while the body is still open...
+    assert series(instrumentation.COMPONENT_SECONDS, *route) == before
+    response.close()
+    # ...and the time spent producing it is charged once the server closes it
+    _, total, count = series(instrumentation.COMPONENT_SECONDS, *route)
+    assert total >= 0.1 and count == (before[2] if before else 0) + 1
+    _, request_total, _ = series(instrumentation.REQUEST_SECONDS, "stream", "GET", "200")
+    assert request_total >= 0.1
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+
+def test_metrics_requires_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", "s3cret")
+    # A same-host reverse proxy makes every request look local; that alone is not enough
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "127.0.0.1"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "# TYPE app_request_seconds histogram" in response.get_data(as_text=True)
@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+
+import pytest
+
+import model_registry
+
+@pytest.fixture
+def saved_model(tmp_path):
+    def save(name, weights=b"weights"):
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / "config.json").write_text('{"num_labels": 3}')
+        (folder / "model.safetensors").write_bytes(weights)
+        return str(folder)
+    return save
+
+def test_register_copies_the_model_and_writes_a_manifest(saved_model):
+    source = saved_model("trained")
+    assert model_registry.register(source, metrics={"f1": 0.91}, notes="first") == "v1"
+    manifest = model_registry.read_manifest("v1")
+    assert manifest["version"] == "v1" and manifest["source"] == os.path.abspath(source)
+    assert manifest["metrics"] == {"f1": 0.91} and manifest["notes"] == "first"
+    assert manifest["sha256"] == model_registry.checksum(source)
+    assert model_registry.verify("v1")
+    assert not os.path.exists(model_registry.version_path("v1") + ".tmp")
+
+def test_versions_are_numbered_in_registration_order(saved_model):
+    assert model_registry.register(saved_model("a")) == "v1"
+    assert model_registry.register(saved_model("b")) == "v2"
+    assert model_registry.register(saved_model("c"), version="canary") == "canary"
+    assert model_registry.list_versions() == ["v1", "v2", "canary"]
+    with pytest.raises(ValueError, match="already exists"):
+        model_registry.register(saved_model("d"), version="v2")
+
+def test_list_versions_ignores_folders_without_a_manifest(saved_model):
+    assert model_registry.list_versions() == []
+    model_registry.register(saved_model("a"))
+    os.makedirs(model_registry.version_path("v2.tmp"))  # an interrupted registration
+    assert model_registry.list_versions() == ["v1"]
+
+def test_activate_and_rollback(saved_model):
+    assert model_registry.current_version() is None
+    model_registry.register(saved_model("a"))
+    model_registry.register(saved_model("b"))
+    model_registry.activate("v2")
+    assert model_registry.current_version() == "v2"
+    assert model_registry.previous_version() == "v1"
+    model_registry.activate("v1")
+    assert model_registry.previous_version() is None
+
+def test_activate_rejects_unknown_and_tampered_versions(saved_model):
+    model_registry.register(saved_model("a"))
+    with pytest.raises(ValueError, match="Unknown"):
+        model_registry.activate("v9")
+    with open(os.path.join(model_registry.version_path("v1"), "model.safetensors"), "wb") as f:
+        f.write(b"corrupted")
+    assert not model_registry.verify("v1")
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        model_registry.activate("v1")
+    assert model_registry.current_version() is None
+
+def test_checksum_covers_file_names_and_contents(saved_model):
+    a, b = saved_model("a"), saved_model("b", weights=b"other")
+    assert model_registry.checksum(a) != model_registry.checksum(b)
+    os.rename(os.path.join(a, "config.json"), os.path.join(a, "config2.json"))
+    assert model_registry.checksum(a) != model_registry.checksum(saved_model("c"))
+
+def test_load_metrics_picks_the_row_for_the_model(saved_model, tmp_path):
+    source = saved_model("distilled")
+    report = tmp_path / "report.json"
+    report.write_text(json.dumps([{"model": "teacher", "f1": 0.95}, {"model": source, "f1": 0.9},
+                                  {"model": "baseline", "f1": 0.8}]))
+    assert model_registry.load_metrics(str(report), source)["f1"] == 0.9
+    report.write_text(json.dumps({"f1": 0.7}))
+    assert model_registry.load_metrics(str(report), source) == {"f1": 0.7}
+
+def test_cli_register_activate_and_rollback(saved_model, monkeypatch, capsys):
+    def cli(*args):
+        monkeypatch.setattr(sys, "argv", ["model_registry.py", *args])
+        model_registry.main()
+        return capsys.readouterr().out
+
+    assert "Registered v1" in cli("register", saved_model("a"), "--activate")
+    assert "Activated v2" in cli("register", saved_model("b"), "--activate")
+    assert "Rolled back to v1" in cli("rollback")
+    assert [line.split()[:2] for line in cli("list").splitlines()][0] == ["*", "v1"]
+    with pytest.raises(SystemExit, match="Nothing to roll back"):
+        cli("rollback")
+
+def test_current_stamp_changes_on_every_activation(saved_model):
+    assert model_registry.current_stamp() is None
+    model_registry.register(saved_model("a"))
+    model_registry.activate("v1")
+    first = model_registry.current_stamp()
+    assert first is not None and model_registry.current_stamp() == first
+    # Re-activating the same version (say, after repairing its files) is a new write the workers retry
+    model_registry.activate("v1")
+    assert model_registry.current_stamp() != first
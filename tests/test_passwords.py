@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import db
+import passwords
+from conftest import ADMIN, login, query
+
+def test_hash_and_verify():
+    stored = passwords.hash_password("s3cret")
+    assert stored.startswith(passwords.CURRENT_PREFIX + "$")
+    assert passwords.verify_password(stored, "s3cret") == (True, False)
+    assert passwords.verify_password(stored, "wrong") == (False, False)
+
+def test_other_schemes_verify_and_need_rehash():
+    legacy = generate_password_hash("s3cret", "pbkdf2:sha256:2000")
+    assert passwords.needs_rehash(legacy)
+    assert passwords.verify_password(legacy, "s3cret") == (True, True)
+    # A failed login never triggers a rehash
+    assert passwords.verify_password(legacy, "wrong") == (False, False)
+
+def test_busy_pool_raises(monkeypatch):
+    release = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=1)
+    pool.submit(release.wait, 5)
+    monkeypatch.setattr(passwords, "_pool", pool)
+    monkeypatch.setattr(passwords, "PASSWORD_WAIT_SECONDS", 0.05)
+    try:
+        with pytest.raises(passwords.PasswordBusy):
+            passwords.verify_password(passwords.hash_password("x"), "x")
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_full_queue_fails_fast(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()  # one verification running or queued already
+    monkeypatch.setattr(passwords, "_slots", slots)
+    monkeypatch.setattr(passwords, "_pool", None)  # never reached
+    with pytest.raises(passwords.PasswordBusy):
+        passwords.verify_password(passwords.hash_password("x"), "x")
+
+def test_slot_is_freed_when_the_hash_finishes(monkeypatch):
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    stored = passwords.hash_password("x")
+    for _ in range(3):
+        assert passwords.verify_password(stored, "x") == (True, False)
+
+def test_login_upgrades_stale_hash(client):
+    legacy = generate_password_hash(ADMIN[1], "pbkdf2:sha256:2000")
+    conn = db.get_connection()
+    conn.execute("UPDATE users SET password = ? WHERE email = ?", (legacy, ADMIN[0]))
+    conn.commit()
+    conn.close()
+
+    assert login(client, *ADMIN, "admin").location.endswith("/admin/dashboard")
+    stored = query("SELECT password FROM users WHERE email = ?", (ADMIN[0],))[0][0]
+    assert stored != legacy and not passwords.needs_rehash(stored)
+
+def test_login_when_busy(client, monkeypatch, app_module):
+    def busy(stored, password):
+        raise passwords.PasswordBusy()
+    monkeypatch.setattr(app_module, "verify_password", busy)
+    response = login(client, *ADMIN, "admin")
+    assert response.location.endswith("/login")
+    assert b"busy" in client.get("/login").data
+
+def test_profile_id_lookup_is_cached(college, app_module):
+    user_id = college["student_user_id"]
+    app_module.lookup_profile_id.cache_clear()
+    first = app_module.lookup_profile_id(user_id, "student", "AIFB001")
+    assert app_module.lookup_profile_id(user_id, "student", "AIFB001") == first
+    assert app_module.lookup_profile_id.cache_info().hits == 1
@@ -0,0 +1,96 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import db
+import db_postgres
+import roster
+import topics
+from conftest import COLLEGE, query, submit
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params):
+        self.statements.append(sql)
+
+    def fetchone(self):
+        return (7,)
+
+@pytest.mark.parametrize("sql, returning", [
+    ("INSERT INTO users (email) VALUES (?)", True),
+    ("insert into approval_logs (action) values (?)", True),
+    ("INSERT INTO feedback_forms (id, title) VALUES (?, ?)", False),
+    ("INSERT INTO sentiment_rollups (granularity) VALUES (?)", False),
+    ("INSERT INTO form_topics (form_id, topic) SELECT form_id, topic FROM response_topics", False),
+    ("INSERT INTO response_topics (response_id) VALUES (?) ON CONFLICT (response_id, topic) DO NOTHING", False),
+    ("INSERT INTO users (email) VALUES (?) RETURNING id", False),
+    ("UPDATE users SET status = ?", False),
+])
+def test_lastrowid_only_for_tables_with_an_id(sql, returning):
+    inner = FakeCursor()
+    cur = db_postgres.PgCursor(inner).execute(sql, ("x",))
+    assert inner.statements[0] == db_postgres.translate(sql) + (" RETURNING id" if returning else "")
+    assert cur.lastrowid == (7 if returning else None)
+
+def test_bulk_insert_dispatches_on_connection(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db_postgres, "copy_rows", lambda conn, *args: calls.append(args))
+
+    class PgLike:
+        backend = "postgres"
+    db.bulk_insert(PgLike(), "users", ["email"], [("a@x.com",)])
+    assert calls == [("users", ["email"], [("a@x.com",)])]
+
+@pytest.fixture
+def postgres(monkeypatch, postgres_url):
+    url = postgres_url
+
+    def switch():
+        monkeypatch.setattr(db, "DB_BACKEND", "postgres")
+        monkeypatch.setattr(db_postgres, "DATABASE_URL", url)
+        conn = db_postgres.get_connection()
+        conn.execute("DROP SCHEMA public CASCADE")
+        conn.execute("CREATE SCHEMA public")
+        conn.commit()
+        conn.close()
+    return switch
+
+def test_import_sqlite_with_rollups_and_topics(college, postgres):
+    submit(college["student"], college["form_id"], "The lectures were clear but the lab was crowded.")
+    topics.run(use_embeddings=False)
+    expected_topics = query("SELECT form_id, topic, total FROM form_topics ORDER BY topic")
+    expected_rollups = query("SELECT granularity, total FROM sentiment_rollups ORDER BY granularity")
+    assert expected_topics and expected_rollups
+
+    postgres()
+    db_postgres.import_sqlite(db.DB_PATH)
+    assert query("SELECT COUNT(*) FROM users") == [(4,)]
+    assert query("SELECT form_id, topic, total FROM form_topics ORDER BY topic") == expected_topics
+    assert query("SELECT granularity, total FROM sentiment_rollups ORDER BY granularity") == expected_rollups
+
+    # Inserts into tables without an id column work, and sequences continue after the copied ids
+    topics.rebuild_aggregates(db.get_connection())
+    assert query("SELECT form_id, topic, total FROM form_topics ORDER BY topic") == expected_topics
+    conn = db.get_connection()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (email, password, role, college_code) VALUES (?, ?, 'student', ?)",
+                ("new@x.com", "x", COLLEGE))
+    assert cur.lastrowid > max(r[0] for r in query("SELECT id FROM users WHERE email <> 'new@x.com'"))
+    conn.rollback()
+    conn.close()
+
+def test_roster_import_uses_copy(postgres, monkeypatch, workdir):
+    postgres()
+    db.init_db()
+    copied = []
+    copy_rows = db_postgres.copy_rows
+    monkeypatch.setattr(db_postgres, "copy_rows", lambda conn, table, *args: copied.append(table) or copy_rows(conn, table, *args))
+    csv = io.StringIO("role,name,email,password,prn\nstudent,A,a@x.com,pw,P1\nteacher,B,b@x.com,pw,\n")
+    with ThreadPoolExecutor(2) as pool:
+        report = roster.RosterImport(COLLEGE, pool).run(roster.read_rows(csv))
+    assert report["created"] == 2
+    assert copied == ["users", "students", "teachers"]
+    assert query("SELECT u.email, s.prn_number FROM users u JOIN students s ON s.user_id = u.id") == [("a@x.com", "P1")]
@@ -0,0 +1,41 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+import summary_backends
+
+@pytest.fixture(scope="module")
+def backend():
+    try:
+        return summary_backends.TransformersBackend()
+    except Exception as e:  # no weights cached locally and no network
+        pytest.skip(f"summary model unavailable: {e}")
+
+def test_cached_prefix_matches_full_prompt(backend):
+    if backend.prefix_cache is None:
+        pytest.skip("SUMMARY_PREFIX_CACHE is off")
+    text = "Lectures were clear.\nLabs started late."
+    cached = backend.build_inputs(text)["input_ids"]
+    full = backend.tokenizer(backend.format_prompt(text), return_tensors="pt").input_ids.to(cached.device)
+    assert torch.equal(cached, full)
+
+def test_cached_generation_matches_uncached(backend):
+    if backend.prefix_cache is None:
+        pytest.skip("SUMMARY_PREFIX_CACHE is off")
+    text = "Lectures were clear.\nLabs started late."
+    with_cache = backend.summarize(text)
+    cache, backend.prefix_cache = backend.prefix_cache, None
+    try:
+        assert backend.summarize(text) == with_cache
+    finally:
+        backend.prefix_cache = cache
+
+def test_closing_the_stream_stops_generation(backend):
+    import threading
+
+    before = threading.active_count()
+    pieces = backend.stream("Lectures were clear.\nLabs started late.")
+    assert next(pieces)
+    pieces.close()  # the client went away after the first token
+    assert threading.active_count() == before
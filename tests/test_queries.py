@@ -0,0 +1,85 @@
+import pytest
+
+st = pytest.importorskip("streamlit")
+pytest.importorskip("pandas")
+
+from modules import queries
+from conftest import COLLEGE, enrol, query, submit
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    # Every test has its own database; cached frames from another test would be stale
+    st.cache_data.clear()
+    yield
+    st.cache_data.clear()
+
+def teacher_id():
+    return query("SELECT id FROM teachers")[0][0]
+
+def test_teacher_forms_counts_every_form_in_one_query(college, app_module):
+    college["teacher"].post("/teacher/create_form", data={"title": "Operating Systems"})
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    submit(enrol(app_module, college, "PRN002"), college["form_id"], "Fine.")
+
+    forms = queries.teacher_forms(teacher_id(), COLLEGE)
+    counts = {row.title: (row.responses, row.positive, row.neutral, row.negative) for row in forms.itertuples()}
+    assert counts == {"Data Structures": (2, 0, 2, 0), "Operating Systems": (0, 0, 0, 0)}
+
+def test_cached_reads_are_served_until_cleared(college):
+    assert queries.teacher_forms(teacher_id(), COLLEGE)["responses"].tolist() == [0]
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    assert queries.teacher_forms(teacher_id(), COLLEGE)["responses"].tolist() == [0]
+    queries.teacher_forms.clear()
+    assert queries.teacher_forms(teacher_id(), COLLEGE)["responses"].tolist() == [1]
+
+def test_read_page_returns_rows_and_total_in_one_query(college, app_module):
+    for n in range(2, 7):
+        enrol(app_module, college, f"PRN00{n}")
+    sql = "SELECT students.prn_number FROM students ORDER BY students.prn_number"
+    frame, total = queries.read_page(sql, (), ["PRN"], 1, COLLEGE, page_size=2)
+    assert total == 6
+    assert frame["PRN"].tolist() == ["PRN003", "PRN004"]
+    # Past the end: the last page is served instead of an empty table
+    frame, total = queries.read_page(sql, (), ["PRN"], 9, COLLEGE, page_size=2)
+    assert frame["PRN"].tolist() == ["PRN005", "PRN006"] and total == 6
+    frame, total = queries.read_page(sql + " LIMIT 0", (), ["PRN"], 0, COLLEGE, page_size=2)
+    assert frame.empty and total == 0
+
+def test_students_page_search_and_college_scope(college, app_module):
+    enrol(app_module, college, "PRN002")
+    frame, total = queries.students_page(COLLEGE, 0, "PRN002")
+    assert total == 1 and frame["PRN"].tolist() == ["PRN002"]
+    assert queries.students_page(COLLEGE, 0)[1] == 2
+    assert queries.students_page("OTHER01", 0)[1] == 0
+
+def test_sentiment_counts_show_deferred_rows_as_pending(college, app_module, monkeypatch):
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    monkeypatch.setattr(app_module, "predict_sentiment_scored", lambda text: (None, None, None))
+    submit(enrol(app_module, college, "PRN002"), college["form_id"], "Later.")
+    assert queries.sentiment_counts(COLLEGE).to_dict() == {"Neutral": 1, "Pending": 1}
+
+def test_pending_students_and_approval_logs(college, app_module):
+    app_module.app.test_client().post("/register", data={
+        "name": "Meera", "email": "meera@college.com", "student_id": "PRN009", "password": "stud123",
+        "college_code": COLLEGE, "role": "student"})
+    pending, total = queries.pending_students_page(COLLEGE, 0)
+    assert total == 1 and pending["prn"].tolist() == ["PRN009"]
+    logs, total = queries.approval_logs_page(COLLEGE, 0)
+    assert total == 1 and logs["Action"].tolist() == ["approved"]  # the fixture student's approval
+
+def test_write_is_one_transaction(college):
+    user_id = college["student_user_id"]
+    with pytest.raises(Exception):
+        queries.write([("UPDATE users SET status = 'rejected' WHERE id = ?", (user_id,)),
+                       ("UPDATE no_such_table SET x = 1", ())], COLLEGE)
+    assert query("SELECT status FROM users WHERE id = ?", (user_id,)) == [("approved",)]
+    queries.write([("UPDATE users SET status = 'rejected' WHERE id = ?", (user_id,))], COLLEGE)
+    assert query("SELECT status FROM users WHERE id = ?", (user_id,)) == [("rejected",)]
+
+def test_teachers_page_lists_pending_teachers_first(college, app_module):
+    app_module.app.test_client().post("/register", data={
+        "name": "Zara", "email": "zara@college.com", "password": "teach123",
+        "college_code": COLLEGE, "role": "teacher"})
+    frame, total = queries.teachers_page(COLLEGE, 0)
+    assert total == 2 and frame["status"].tolist() == ["pending", "approved"]
+    assert queries.teachers_page("OTHER01", 0)[1] == 0
@@ -0,0 +1,93 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import roster
+from conftest import ADMIN, COLLEGE, login, query
+
+CSV = """Role,Full Name,Email,Password,PRN,Dept
+student,Ravi K,ravi@x.com,pw1,P1,CSE
+student,Ravi Again,ravi@x.com,pw2,P2,CSE
+student,Same PRN,other@x.com,pw3,P1,CSE
+teacher,Asha Rao,asha@x.com,pw4,,IT
+alien,Who,who@x.com,pw5,,IT
+student,No Password,nopw@x.com,,P9,IT
+"""
+
+def run_import(text, default_role=None, batch_size=1000):
+    with ThreadPoolExecutor(2) as pool:
+        return roster.RosterImport(COLLEGE, pool, batch_size).run(roster.read_rows(io.StringIO(text), default_role))
+
+def test_read_rows_normalises_headers():
+    rows = list(roster.read_rows(io.BytesIO("﻿Full Name,E-mail,student_id\nA,a@x.com,P1\n".encode()), "Student"))
+    assert rows == [(2, {"name": "A", "e-mail": "a@x.com", "prn": "P1", "role": "student", "email": ""})]
+
+def test_import_reports_duplicates_and_errors(app_module):
+    report = run_import(CSV, batch_size=2)
+    assert report["created"] == 2
+    assert report["duplicates"] == [(3, "ravi@x.com", "email"), (4, "other@x.com", "PRN P1")]
+    assert [(line, reason) for line, _, reason in report["errors"]] == [
+        (6, "unknown role 'alien'"), (7, "name, email and password are required")]
+    assert query("SELECT u.status, s.prn_number, s.department FROM users u JOIN students s ON s.user_id = u.id") == [
+        ("approved", "P1", "CSE")]
+    assert query("SELECT full_name FROM teachers WHERE full_name = 'Asha Rao'") == [("Asha Rao",)]
+
+    # Rerunning the file only reports duplicates
+    again = run_import(CSV)
+    assert again["created"] == 0 and len(again["duplicates"]) == 4
+
+def test_imported_accounts_can_log_in(app_module, client):
+    run_import(CSV)
+    assert login(client, "ravi@x.com", "pw1", "student").location.endswith("/student/dashboard")
+
+def test_profile_completion_is_filled(app_module):
+    run_import("name,email,password,prn,department,mobile,class,year\nA,a@x.com,pw,P1,CSE,99,TE,2026\n", "student")
+    assert query("SELECT profile_completion FROM students") == [(66,)]
+
+def test_concurrent_registration_falls_back_to_row_by_row(app_module, monkeypatch):
+    # Validation saw nothing, but the email exists by insert time
+    monkeypatch.setattr(roster, "existing_values", lambda *args: set())
+    run_import("role,name,email,password,prn\nstudent,A,a@x.com,pw,P1\n")
+    report = run_import("role,name,email,password,prn\nstudent,A,a@x.com,pw,P1\nstudent,B,b@x.com,pw,P2\n")
+    assert report["created"] == 1 and report["duplicates"] == [(2, "a@x.com", "email or PRN")]
+
+def wait_for(client, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/admin/import_roster/{job_id}").get_json()
+        if status["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.2)
+    pytest.fail(f"roster job {job_id} did not finish")
+
+def test_upload_is_queued_as_background_job(client):
+    login(client, *ADMIN, "admin")
+    response = client.post("/admin/import_roster", headers={"Accept": "application/json"},
+                           data={"role": "", "roster": (io.BytesIO(CSV.encode()), "roster.csv")})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job["status"] == "queued" and job["status_url"].endswith(job["job_id"])
+
+    status = wait_for(client, job["job_id"])
+    assert status["status"] == "done", open(roster.job_path(job["job_id"], "log")).read()
+    assert (status["created"], status["duplicate_count"], status["error_count"]) == (2, 2, 2)
+    assert query("SELECT COUNT(*) FROM users WHERE email IN ('ravi@x.com', 'asha@x.com')") == [(2,)]
+    # The uploaded file (plain-text passwords) is gone once the job has run
+    assert not os.path.exists(roster.job_path(job["job_id"], "csv"))
+
+def test_form_upload_flashes_job_id(client):
+    login(client, *ADMIN, "admin")
+    response = client.post("/admin/import_roster", follow_redirects=True,
+                           data={"role": "teacher", "roster": (io.BytesIO(b"name,email,password\nT,t@x.com,pw\n"), "r.csv")})
+    assert b"Roster import queued as job" in response.data
+
+def test_job_status_is_scoped_to_the_college(client, app_module):
+    os.makedirs(roster.JOB_DIR, exist_ok=True)
+    roster.write_status("abcdef123456", status="done", college_code="XYZ002")
+    login(client, *ADMIN, "admin")
+    assert client.get("/admin/import_roster/abcdef123456").status_code == 404
+    assert client.get("/admin/import_roster/..%2F..%2Fdb").status_code == 404
+    assert roster.job_status("../../etc/passwd") is None
@@ -0,0 +1,83 @@
+import pytest
+
+import warehouse
+from conftest import ADMIN, COLLEGE, login, query, submit
+
+# Every test here runs on SQLite and on PostgreSQL
+pytestmark = pytest.mark.parametrize("db_backend", ["sqlite", "postgres"], indirect=True)
+
+def register(client, email, role="student", prn=None, college_code=COLLEGE):
+    return client.post("/register", data={"name": "New User", "email": email, "student_id": prn or email,
+                                          "password": "pw123", "college_code": college_code, "role": role})
+
+def test_register_and_login(client):
+    assert register(client, "s@x.com").location.endswith("/login")
+    assert register(client, "t@x.com", role="teacher").location.endswith("/login")
+    # Duplicate email is reported, not a 500
+    assert register(client, "s@x.com", prn="other").location.endswith("/signup")
+    assert query("SELECT role, status FROM users WHERE email LIKE '%@x.com' ORDER BY email") == [
+        ("student", "pending"), ("teacher", "pending")]
+
+    response = login(client, "s@x.com", "pw123", "student")
+    assert response.location.endswith("/login")
+    with client.session_transaction() as session:
+        assert "user_id" not in session
+
+def test_login_roles(client):
+    assert login(client, *ADMIN, "admin").location.endswith("/admin/dashboard")
+    assert client.get("/admin/dashboard").status_code == 200
+    client.get("/logout")
+    assert login(client, *ADMIN, "teacher").location.endswith("/login")
+    assert login(client, ADMIN[0], "wrong", "admin").status_code == 200
+
+def test_submit_feedback(college):
+    response = submit(college["student"], college["form_id"], "Lectures were clear and well paced.")
+    assert response.status_code == 200
+    rows = query("SELECT feedback, sentiment, submitted_ts IS NOT NULL FROM feedback_responses")
+    assert rows == [("Lectures were clear and well paced.", "Neutral", True)]
+    # The form is no longer offered to this student
+    assert college["form_id"].encode() not in college["student"].get("/student/dashboard").data
+
+def test_duplicate_submission(college):
+    submit(college["student"], college["form_id"], "First.")
+    response = submit(college["student"], college["form_id"], "Second.")
+    assert b"already submitted" in response.data
+    assert query("SELECT feedback FROM feedback_responses") == [("First.",)]
+
+def test_bulk_approvals(college):
+    guest = college["admin"].application.test_client()
+    for i in range(3):
+        register(guest, f"s{i}@x.com", prn=f"PRN-{i}")
+    ids = [r[0] for r in query("SELECT id FROM users WHERE email LIKE 's_@x.com' ORDER BY id")]
+
+    response = college["admin"].post("/admin/approve_users", json={"action": "approve", "user_ids": ids[:2]})
+    assert response.get_json() == {"status": "approved", "count": 2}
+    response = college["admin"].post("/admin/approve_users", json={"action": "reject", "scope": "all"})
+    assert response.get_json() == {"status": "rejected", "count": 1}
+
+    assert query("SELECT status FROM users WHERE email LIKE 's_@x.com' ORDER BY id") == [
+        ("approved",), ("approved",), ("rejected",)]
+    logs = query("SELECT target_user_id, action, role FROM approval_logs WHERE target_user_id IN (?, ?, ?) ORDER BY id",
+                 tuple(ids))
+    assert logs == [(ids[0], "approved", "student"), (ids[1], "approved", "student"), (ids[2], "rejected", "student")]
+
+def test_trends(college):
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    response = college["teacher"].get(f"/api/trends?scope=form&id={college['form_id']}&granularity=day")
+    series = response.get_json()["series"]
+    assert [(p["neutral"], p["total"]) for p in series] == [(1, 1)]
+    college_wide = college["admin"].get("/api/trends?scope=college&granularity=hour").get_json()["series"]
+    assert sum(p["total"] for p in college_wide) == 1
+    assert college["student"].get("/api/trends").status_code == 403
+    assert college["admin"].get("/api/trends?scope=nope").status_code == 400
+
+def test_reports(college):
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    superadmin = college["admin"].application.test_client()
+    login(superadmin, "omdhage.dev@gmail.com", "dhage04", "superadmin")
+    assert superadmin.get("/api/reports/colleges").status_code == 503
+    warehouse.refresh()
+    rows = superadmin.get("/api/reports/colleges").get_json()["rows"]
+    assert [(r["college_code"], r["responses"]) for r in rows] == [(COLLEGE, 1)]
+    assert superadmin.get("/api/reports/nope").status_code == 404
+    assert college["admin"].get("/api/reports/colleges").status_code == 403
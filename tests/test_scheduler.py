@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pytest
+
+import scheduler
+from conftest import query, submit
+
+class Clock(datetime):
+    now_value = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.now_value
+
+@pytest.mark.parametrize("now, window, expected", [
+    ("03:00", "01:00-06:00", True),
+    ("07:00", "01:00-06:00", False),
+    ("23:30", "22:00-04:00", True),
+    ("01:00", "22:00-04:00", True),
+    ("12:00", "22:00-04:00", False),
+    ("12:00", None, True),
+])
+def test_in_window(monkeypatch, now, window, expected):
+    Clock.now_value = datetime.strptime(f"2026-01-05 {now}", "%Y-%m-%d %H:%M")
+    monkeypatch.setattr(scheduler, "datetime", Clock)
+    assert scheduler.in_window(window) is expected
+
+def test_run_summarizes_stale_forms_and_logs_runs(college):
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    assert scheduler.run(dry_run=True) == []
+
+    results = scheduler.run()
+    assert [form_id for form_id, _, _ in results] == [college["form_id"]]
+    assert query("SELECT ai_summary FROM feedback_forms") == [("Clear lectures.",)]
+    assert query("SELECT form_id, backend, responses FROM summary_runs") == [(college["form_id"], "echo", 1)]
+
+    # Nothing new since the last summary
+    assert scheduler.run() == []
+
+def test_run_respects_budget(college):
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    assert scheduler.run(budget_minutes=0) == []
+    assert query("SELECT COUNT(*) FROM summary_runs") == [(0,)]
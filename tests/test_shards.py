@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import db
+from conftest import COLLEGE, login, query, submit
+
+@pytest.fixture
+def sharded(monkeypatch, app_module):
+    monkeypatch.setattr(db, "DB_SHARDED", True)
+    monkeypatch.setattr(app_module, "DB_SHARDED", True)
+    return app_module
+
+def register(client, email, college_code):
+    return client.post("/register", data={"name": "New Student", "email": email, "student_id": email,
+                                          "password": "pw", "college_code": college_code, "role": "student"})
+
+def test_shard_path(monkeypatch):
+    monkeypatch.setattr(db, "DB_SHARDED", True)
+    assert db.shard_path(None) == db.DB_PATH
+    assert db.shard_path("AIFB001") == os.path.join(db.SHARD_FOLDER, "AIFB001.db")
+    # Codes are never rewritten into file names, so two codes can't share a shard
+    for code in ("AIFB/001", "AIFB 001", "../AIFB001", "x" * 33):
+        with pytest.raises(ValueError):
+            db.shard_path(code)
+
+def test_register_rejects_unknown_college(sharded):
+    client = sharded.app.test_client()
+    for code in ("NOPE999", "AIFB/001", ""):
+        response = register(client, f"{code or 'blank'}@x.com", code)
+        assert response.location.endswith("/signup")
+    assert not os.path.exists(db.SHARD_FOLDER) or os.listdir(db.SHARD_FOLDER) == []
+    assert query("SELECT COUNT(*) FROM users WHERE email LIKE '%@x.com'", college_code=None) == [(0,)]
+
+def test_register_rejects_unknown_college_unsharded(app_module):
+    register(app_module.app.test_client(), "s@x.com", "NOPE999")
+    assert query("SELECT COUNT(*) FROM users WHERE email = 's@x.com'") == [(0,)]
+
+def test_sharded_flow(sharded):
+    client = sharded.app.test_client()
+    assert register(client, "s@x.com", COLLEGE).location.endswith("/login")
+    assert os.listdir(db.SHARD_FOLDER) == [f"{COLLEGE}.db"]
+    # Users live in the catalog, profiles in the shard
+    user_id = query("SELECT id FROM users WHERE email = 's@x.com'", college_code=None)[0][0]
+    assert query("SELECT user_id FROM main.students", college_code=COLLEGE) == [(user_id,)]
+    assert db.list_shards() == [COLLEGE]
+
+def test_feedback_lands_in_college_shard(monkeypatch, college):
+    # Seeded unsharded, then migrated: the shard holds the college's rows
+    submit(college["student"], college["form_id"], "Great labs.")
+    monkeypatch.setattr(db, "DB_SHARDED", True)
+    db.migrate_to_shards()
+    assert query("SELECT feedback FROM main.feedback_responses", college_code=COLLEGE) == [("Great labs.",)]
+
+def test_superadmin_rejects_unsafe_college_code(app_module):
+    client = app_module.app.test_client()
+    login(client, "omdhage.dev@gmail.com", "dhage04", "superadmin")
+    client.post("/superadmin/add_admin", data={"email": "a@x.com", "password": "pw", "college_code": "X/Y"})
+    client.post("/superadmin/add_admin", data={"email": "b@x.com", "password": "pw", "college_code": "XYZ002"})
+    assert query("SELECT email FROM users WHERE email LIKE '%@x.com'", college_code=None) == [("b@x.com",)]
+    assert db.college_exists("XYZ002") and not db.college_exists("X/Y")
+
+def test_trends_reject_unknown_colleges_without_creating_shards(sharded):
+    superadmin = sharded.app.test_client()
+    login(superadmin, "omdhage.dev@gmail.com", "dhage04", "superadmin")
+    assert superadmin.get("/api/trends?scope=college&college=AIFB/001").status_code == 400
+    assert superadmin.get("/api/trends?scope=college").status_code == 400
+    assert superadmin.get("/api/trends?scope=college&college=NOPE999").status_code == 404
+    assert not os.path.exists(db.shard_path("NOPE999"))
+    assert superadmin.get(f"/api/trends?scope=college&college={COLLEGE}").status_code == 200
@@ -0,0 +1,67 @@
+import json
+
+from admission import SUMMARY_GATE
+from instrumentation import timed
+from conftest import query, submit
+
+def events(body):
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+def test_analytics_page_defers_summary_to_stream(college):
+    submit(college["student"], college["form_id"], "Clear lectures and good notes.")
+    page = college["teacher"].get(f"/analytics/{college['form_id']}")
+    assert page.status_code == 200
+    assert f"/analytics/{college['form_id']}/stream".encode() in page.data
+
+def test_stream_yields_tokens_and_caches_summary(college):
+    submit(college["student"], college["form_id"], "Clear lectures and good notes.")
+    response = college["teacher"].get(f"/analytics/{college['form_id']}/stream")
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["X-Accel-Buffering"] == "no"
+
+    parsed = events(response.get_data(as_text=True))
+    assert parsed[0][0] == "progress"
+    assert [e for e, _ in parsed if e == "token"]
+    assert parsed[-1][0] == "done"
+    summary = parsed[-1][1]
+    assert query("SELECT ai_summary FROM feedback_forms WHERE id = ?", (college["form_id"],)) == [(summary,)]
+
+    # The next request is served from the cache in a single event
+    cached = events(college["teacher"].get(f"/analytics/{college['form_id']}/stream").get_data(as_text=True))
+    assert cached == [("done", summary)]
+
+def test_stream_without_feedback(college):
+    parsed = events(college["teacher"].get(f"/analytics/{college['form_id']}/stream").get_data(as_text=True))
+    assert parsed == [("done", "Insufficient feedback signals to generate intelligence summary.")]
+
+def test_stream_requires_login_and_known_form(college, client):
+    assert client.get(f"/analytics/{college['form_id']}/stream").status_code == 302
+    assert college["teacher"].get("/analytics/missing/stream").status_code == 404
+
+def test_disconnect_stops_the_model_before_its_slot_is_freed(college, app_module, monkeypatch):
+    held_at_close = []
+
+    def endless(feedback_list, college_code=None):
+        try:
+            while True:
+                yield "token", "word "
+        finally:
+            held_at_close.append(SUMMARY_GATE.active)
+
+    opened = []
+
+    def summary(*args, **kwargs):
+        # Held elsewhere too (as a debugger or a traceback would), so only an explicit close() stops it
+        opened.append(timed("summary")(endless)(*args, **kwargs))
+        return opened[-1]
+    monkeypatch.setattr(app_module, "stream_final_summary", summary)
+
+    submit(college["student"], college["form_id"], "Clear lectures and good notes.")
+    response = college["teacher"].get(f"/analytics/{college['form_id']}/stream", buffered=False)
+    assert next(iter(response.response)).startswith(b"event: token")
+    response.close()  # what the server does when the client goes away
+    assert held_at_close == [1] and SUMMARY_GATE.active == 0
@@ -0,0 +1,84 @@
+import pytest
+
+import db
+from conftest import query, submit
+
+PROFILE = {"mobile": "9999999999", "dept": "CSE", "class": "TE", "year": "2026", "teacher": "", "hod": ""}
+
+def update_profile(student, **fields):
+    return student.post("/student/dashboard", data={"action": "update_profile", **fields})
+
+def test_profile_completion_is_stored(college, app_module):
+    response = update_profile(college["student"], **PROFILE)
+    assert b"66%" in response.data
+    assert query("SELECT profile_completion FROM students") == [(app_module.profile_completion(PROFILE.values()),)]
+    update_profile(college["student"], **dict(PROFILE, teacher="Asha Rao", hod="Dr. Kulkarni"))
+    assert query("SELECT profile_completion FROM students") == [(100,)]
+
+@pytest.mark.parametrize("values", [
+    ("", "", "", "", "", ""),
+    ("1", "  ", "x", None, "y", ""),
+    ("1", "2", "3", "4", "5", "6"),
+])
+def test_sql_completion_matches_python(app_module, values):
+    # The backfill (SQL) and the profile form (Python) must agree on the same row
+    conn = db.get_connection("AIFB001")
+    value = conn.execute(f"SELECT {db.PROFILE_COMPLETION_SQL} FROM (SELECT ? AS mobile_no, ? AS department, "
+                         "? AS class_name, ? AS academic_year, ? AS teacher_name, ? AS hod_name)", values).fetchone()[0]
+    conn.close()
+    assert value == app_module.profile_completion(values)
+
+def test_dashboard_lists_only_unanswered_forms(college):
+    college["teacher"].post("/teacher/create_form", data={"title": "Operating Systems"})
+    page = college["student"].get("/student/dashboard").data
+    assert b"Data Structures" in page and b"Operating Systems" in page and b"0 transmitted" in page
+
+    response = submit(college["student"], college["form_id"], "Good pace.")
+    assert b"Data Structures" not in response.data
+    assert b"Operating Systems" in response.data and b"1 transmitted" in response.data
+
+def test_duplicate_submission_skips_inference(college, app_module, monkeypatch):
+    submit(college["student"], college["form_id"], "First.")
+    calls = []
+    monkeypatch.setattr(app_module, "predict_sentiment_scored", lambda text: calls.append(text))
+    response = submit(college["student"], college["form_id"], "Second.")
+    assert b"already submitted" in response.data
+    assert calls == []
+
+def test_duplicate_race_is_settled_by_the_unique_index(college, app_module, monkeypatch):
+    submit(college["student"], college["form_id"], "First.")
+    # Pretend the cheap pre-check missed the earlier row (two tabs submitting at once)
+    real = app_module.get_connection
+
+    class Blind:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def cursor(self):
+            cur = self.conn.cursor()
+            execute = cur.execute
+            cur.execute = lambda sql, *a: execute("SELECT 1 WHERE 0", ()) if sql.startswith("SELECT 1 FROM feedback_responses") else execute(sql, *a)
+            return cur
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+    monkeypatch.setattr(app_module, "get_connection", lambda *a: Blind(real(*a)))
+    response = submit(college["student"], college["form_id"], "Second.")
+    assert b"already submitted" in response.data
+    assert query("SELECT feedback FROM feedback_responses") == [("First.",)]
+
+def test_duplicates_from_before_the_index_are_archived(college):
+    submit(college["student"], college["form_id"], "First.")
+    conn = db.get_connection("AIFB001")
+    conn.execute("DROP INDEX idx_responses_unique")
+    conn.execute("INSERT INTO feedback_responses (form_id, student_id, college_code, feedback) "
+                 "SELECT form_id, student_id, college_code, 'Again.' FROM feedback_responses")
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    assert query("SELECT feedback FROM feedback_responses") == [("First.",)]
+    archived = query("SELECT feedback, archived_at FROM feedback_responses_duplicates")
+    assert [row[0] for row in archived] == ["Again."] and archived[0][1]
+    assert query("SELECT 1 FROM sqlite_master WHERE name = 'idx_responses_unique'") == [(1,)]
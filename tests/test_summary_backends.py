@@ -0,0 +1,65 @@
+import pytest
+
+import summarizer
+import summary_backends
+from summary_backends import SummaryBackend, get_backend, select_backend_name, split_sentences
+
+class RecordingBackend(SummaryBackend):
+    name = "recording"
+
+    def __init__(self):
+        self.calls = []
+
+    def summarize(self, feedback_text):
+        self.calls.append(feedback_text)
+        return f"summary of {len(feedback_text.splitlines())} line(s)"
+
+class FlatBackend(RecordingBackend):
+    name = "flat"
+    hierarchical = False
+
+@pytest.fixture
+def backends(monkeypatch):
+    monkeypatch.setitem(summary_backends.BACKENDS, "recording", RecordingBackend)
+    monkeypatch.setitem(summary_backends.BACKENDS, "flat", FlatBackend)
+    monkeypatch.setattr(summary_backends, "_instances", {})
+    return summary_backends
+
+def test_unknown_backend_is_rejected(backends):
+    with pytest.raises(ValueError, match="Unknown summary backend 'gpt'"):
+        get_backend("gpt")
+
+def test_backends_load_once(backends):
+    assert get_backend("recording") is get_backend("recording")
+
+def test_select_backend_name(backends, monkeypatch):
+    monkeypatch.setattr(summary_backends, "DEFAULT_BACKEND", "recording")
+    monkeypatch.setattr(summary_backends, "BACKEND_OVERRIDES", {"XYZ002": "flat"})
+    monkeypatch.setattr(summary_backends, "LARGE_FORM_SIZE", 100)
+    monkeypatch.setattr(summary_backends, "LARGE_FORM_BACKEND", "extractive")
+    assert select_backend_name("AIFB001", 10) == "recording"
+    assert select_backend_name("XYZ002", 10) == "flat"
+    assert select_backend_name("XYZ002", 101) == "extractive"
+
+def test_hierarchical_backend_maps_then_reduces(backends):
+    stats = {}
+    feedback = [f"Feedback number {i}." for i in range(45)]
+    summary = summarizer.generate_final_summary(feedback, backend_name="recording", stats=stats)
+    backend = get_backend("recording")
+    # 45 lines in chunks of 20 -> three chunk summaries, then one reduce call over them
+    assert len(backend.calls) == 4
+    assert summary == "summary of 3 line(s)"
+    assert stats["backend"] == "recording" and stats["chunks"] == 3 and stats["calls"] == 4
+
+def test_flat_backend_sees_whole_form_once(backends):
+    feedback = [f"Feedback number {i}." for i in range(45)]
+    assert summarizer.generate_final_summary(feedback, backend_name="flat") == "summary of 45 line(s)"
+    assert len(get_backend("flat").calls) == 1
+
+def test_empty_feedback(backends):
+    assert summarizer.generate_final_summary([], backend_name="recording") == "No feedback available for summarization."
+    assert summarizer.generate_final_summary(["   "], backend_name="recording") == "No valid text signals detected."
+
+def test_split_sentences_drops_duplicates():
+    text = "Great lectures. Too fast!\nGreat lectures.\n\nNotes were late?"
+    assert split_sentences(text) == ["Great lectures.", "Too fast!", "Notes were late?"]
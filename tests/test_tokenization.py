@@ -0,0 +1,89 @@
+import csv
+import os
+
+import pytest
+
+pytest.importorskip("transformers")
+
+from tokenization import encode_batch, encode_windows, load_tokenizer, MAX_LENGTH
+from conftest import ROOT
+
+DATASET = os.path.join(ROOT, "data", "student_feedback_2000.csv")
+
+@pytest.fixture(scope="module")
+def tokenizers():
+    try:
+        slow = load_tokenizer("bert-base-uncased", use_fast=False)
+        fast = load_tokenizer("bert-base-uncased", use_fast=True)
+    except (OSError, ValueError) as e:  # not cached locally and no network
+        pytest.skip(f"bert-base-uncased tokenizer unavailable: {e}")
+    if not fast.is_fast:
+        pytest.skip("no fast tokenizer available")
+    return slow, fast
+
+def test_fast_and_slow_tokenizers_agree_on_the_dataset(tokenizers):
+    slow, fast = tokenizers
+    with open(DATASET, newline="", encoding="utf-8") as f:
+        texts = [row["feedback"] for row in csv.DictReader(f)]
+    # Unpadded ids per text, so padding differences cannot hide a tokenization difference
+    slow_ids = encode_batch(slow, texts, padding=False)["input_ids"]
+    fast_ids = encode_batch(fast, texts, padding=False)["input_ids"]
+    mismatches = [(i + 2, texts[i]) for i, (a, b) in enumerate(zip(slow_ids, fast_ids)) if a != b]
+    assert not mismatches, mismatches[:5]
+
+def test_encode_batch(tokenizers):
+    _, fast = tokenizers
+    enc = encode_batch(fast, ["short", None, "word " * 500])
+    lengths = {len(ids) for ids in enc["input_ids"]}
+    assert lengths == {MAX_LENGTH}  # padded to the longest, which is truncated
+    assert enc["input_ids"][1] == fast("")["input_ids"] + [fast.pad_token_id] * (MAX_LENGTH - 2)
+
+WORDS = [f"w{i}" for i in range(60)]
+
+@pytest.fixture(scope="module")
+def word_tokenizer(tmp_path_factory):
+    """One token per word w0..w59, from a local vocab so no download is needed."""
+    import transformers
+    path = tmp_path_factory.mktemp("vocab")
+    (path / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS) + "\n")
+    transformers.BertTokenizer(str(path / "vocab.txt")).save_pretrained(str(path))
+    return str(path)
+
+def content(tokenizer, ids):
+    return [t for t in tokenizer.convert_ids_to_tokens(list(ids)) if t not in ("[CLS]", "[SEP]", "[PAD]")]
+
+def test_short_texts_get_one_window_identical_to_encode_batch(word_tokenizer):
+    tok = load_tokenizer(word_tokenizer)
+    texts = ["w1 w2", "w3"]
+    enc, owners = encode_windows(tok, texts, max_length=16, stride=4, return_tensors="np")
+    assert owners == [0, 1]
+    assert enc["input_ids"].tolist() == encode_batch(tok, texts, max_length=16, return_tensors="np")["input_ids"].tolist()
+
+def test_long_texts_are_split_into_overlapping_windows(word_tokenizer):
+    tok = load_tokenizer(word_tokenizer)
+    text = " ".join(WORDS[:40])
+    enc, owners = encode_windows(tok, ["w1", text], max_length=16, stride=4, return_tensors="np")
+    assert owners == [0, 1, 1, 1, 1]
+    windows = [content(tok, ids) for ids in enc["input_ids"][1:]]
+    assert all(len(w) <= 14 for w in windows)
+    for previous, window in zip(windows, windows[1:]):
+        assert previous[-4:] == window[:4]  # consecutive windows share `stride` tokens
+    # Nothing is dropped: the windows cover the text end to end
+    covered = windows[0] + [t for w in windows[1:] for t in w[4:]]
+    assert covered == WORDS[:40]
+
+def test_windows_per_text_are_capped(word_tokenizer):
+    tok = load_tokenizer(word_tokenizer)
+    texts = [" ".join(WORDS), "w5", " ".join(WORDS[:40])]
+    enc, owners = encode_windows(tok, texts, max_length=16, stride=4, max_windows=2, return_tensors="np")
+    assert owners == [0, 0, 1, 2, 2]
+    assert len(enc["input_ids"]) == len(enc["attention_mask"]) == 5
+    assert content(tok, enc["input_ids"][1])[-1] == "w23"  # the first two windows of text 0 are kept
+
+def test_slow_tokenizer_falls_back_to_truncation(word_tokenizer):
+    tok = load_tokenizer(word_tokenizer, use_fast=False)
+    if tok.is_fast:
+        pytest.skip("this transformers version has no slow BERT tokenizer")
+    enc, owners = encode_windows(tok, [" ".join(WORDS), "w1"], max_length=16, return_tensors="np")
+    assert owners == [0, 1]
+    assert content(tok, enc["input_ids"][0]) == WORDS[:14]
@@ -0,0 +1,61 @@
+import pytest
+
+import db
+import topics
+from conftest import COLLEGE, query, submit
+
+def tag(text):
+    return [topic for topic, _ in topics.TopicTagger(use_embeddings=False).tag([text])[0]]
+
+@pytest.mark.parametrize("text", [
+    "I feel the course was fantastic, for example the notes.",
+    "The business talk was great, eventually.",
+    "Please label the diagrams; the testimony of seniors helped.",
+    "Feedback: overall a pleasant semester.",
+])
+def test_no_matches_inside_longer_words(text):
+    found = tag(text)
+    for wrong in ("infrastructure", "exams", "campus_life", "administration", "labs"):
+        assert wrong not in found, (text, found)
+
+@pytest.mark.parametrize("text, topic", [
+    ("The fans in room 4 don't work", "infrastructure"),
+    ("Examinations were scheduled too close together", "exams"),
+    ("Two buses for 900 students is not enough", "campus_life"),
+    ("Fees were refunded late", "administration"),
+    ("Labs need more computers", "labs"),
+    ("The READING ROOM closes early", "library"),
+    ("Wi-Fi keeps dropping", "infrastructure"),
+])
+def test_inflections_match(text, topic):
+    assert topic in tag(text)
+
+def test_untagged_text_falls_back_to_general():
+    assert topics.TopicTagger(use_embeddings=False).tag(["Nothing to say."]) == [[(topics.FALLBACK_TOPIC, 0.0)]]
+
+def test_every_seed_word_is_a_keyword():
+    for topic, words in topics.TOPICS.items():
+        assert set(words) <= set(topics.KEYWORDS[topic]), topic
+
+def test_run_aggregates_and_is_incremental(college):
+    submit(college["student"], college["form_id"], "The lab computers are old but the teacher explained well.")
+    assert topics.run(use_embeddings=False) == 1
+    assert query("SELECT topic, neutral, total FROM form_topics ORDER BY topic") == [("faculty", 1, 1), ("labs", 1, 1)]
+    assert topics.run(use_embeddings=False) == 0
+
+    # Recounting from the stored tags gives the same aggregates
+    conn = db.get_connection(COLLEGE)
+    topics.rebuild_aggregates(conn)
+    conn.close()
+    assert query("SELECT topic, neutral, total FROM form_topics ORDER BY topic") == [("faculty", 1, 1), ("labs", 1, 1)]
+
+def test_responses_waiting_for_sentiment_hold_back_their_form(college, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "predict_sentiment_scored", lambda text: (None, None, None))
+    submit(college["student"], college["form_id"], "The lab was crowded.")
+    assert topics.run(use_embeddings=False) == 0
+    conn = db.get_connection(COLLEGE)
+    conn.execute("UPDATE feedback_responses SET sentiment = 'Negative'")
+    conn.commit()
+    conn.close()
+    assert topics.run(use_embeddings=False) == 1
+    assert query("SELECT topic, negative FROM form_topics") == [("labs", 1)]
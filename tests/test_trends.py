@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+
+import db
+from trends import bucket_label, trend_series
+from conftest import COLLEGE
+
+MONDAY = db.wallclock_ts(datetime(2026, 3, 2, 9, 30))
+
+@pytest.fixture
+def responses(college):
+    """Inserts responses straight into the table (the rollup triggers do the rest)."""
+    conn = db.get_connection(COLLEGE)
+    teacher_id = conn.execute("SELECT teacher_id FROM feedback_forms WHERE id = ?", (college["form_id"],)).fetchone()[0]
+
+    def add(sentiment, ts):
+        conn.execute("INSERT INTO students (full_name, college_code) VALUES (?, ?)", ("S", COLLEGE))
+        student_id = conn.execute("SELECT MAX(id) FROM students").fetchone()[0]
+        conn.execute("INSERT INTO feedback_responses (form_id, student_id, college_code, feedback, sentiment, submitted_ts) "
+                     "VALUES (?, ?, ?, 'x', ?, ?)", (college["form_id"], student_id, COLLEGE, sentiment, ts))
+        conn.commit()
+
+    yield conn, add, college["form_id"], teacher_id
+    conn.close()
+
+def counts(series):
+    return [(p["label"], p["positive"], p["neutral"], p["negative"], p["total"]) for p in series]
+
+def test_bucket_label():
+    assert bucket_label(MONDAY - MONDAY % 3600, "hour") == "2026-03-02 09:00"
+    assert bucket_label(MONDAY - MONDAY % 86400, "day") == "2026-03-02"
+
+def test_daily_hourly_and_weekly_series(responses):
+    conn, add, form_id, _ = responses
+    add("Positive", MONDAY)
+    add("Negative", MONDAY + 600)
+    add("Neutral", MONDAY + 86400 * 2)      # Wednesday, same week
+    add("Positive", MONDAY + 86400 * 7)     # next Monday
+
+    assert counts(trend_series(conn, "form", form_id, "day")) == [
+        ("2026-03-02", 1, 0, 1, 2), ("2026-03-04", 0, 1, 0, 1), ("2026-03-09", 1, 0, 0, 1)]
+    assert counts(trend_series(conn, "college", COLLEGE, "hour", since_ts=MONDAY + 86400)) == [
+        ("2026-03-04 09:00", 0, 1, 0, 1), ("2026-03-09 09:00", 1, 0, 0, 1)]
+    # Weeks start on Monday
+    assert counts(trend_series(conn, "form", form_id, "week")) == [
+        ("2026-03-02", 1, 1, 1, 3), ("2026-03-09", 1, 0, 0, 1)]
+
+def test_scopes(responses):
+    conn, add, form_id, teacher_id = responses
+    add("Positive", MONDAY)
+    for scope, scope_id in (("teacher", teacher_id), ("department", "CSE"), ("college", COLLEGE), ("form", form_id)):
+        assert [p["total"] for p in trend_series(conn, scope, scope_id, college_code=COLLEGE)] == [1], scope
+    assert trend_series(conn, "department", "MECH", college_code=COLLEGE) == []
+    assert trend_series(conn, "college", "XYZ002") == []
+    # A teacher pinned to their own forms sees nothing of another teacher's
+    assert trend_series(conn, "college", COLLEGE, teacher_id=teacher_id + 1) == []
+    with pytest.raises(ValueError):
+        trend_series(conn, "planet", "x")
+
+def test_rollups_follow_updates_and_deletes(responses):
+    conn, add, form_id, _ = responses
+    add(None, MONDAY)
+    add("Positive", MONDAY)
+    assert counts(trend_series(conn, "form", form_id)) == [("2026-03-02", 1, 0, 0, 2)]
+
+    # A deferred sentiment arriving moves the count
+    conn.execute("UPDATE feedback_responses SET sentiment = 'Negative' WHERE sentiment IS NULL")
+    conn.commit()
+    assert counts(trend_series(conn, "form", form_id)) == [("2026-03-02", 1, 0, 1, 2)]
+
+    conn.execute("DELETE FROM feedback_responses WHERE sentiment = 'Positive'")
+    conn.commit()
+    incremental = counts(trend_series(conn, "form", form_id))
+    assert incremental == [("2026-03-02", 0, 0, 1, 1)]
+
+    db.rebuild_rollups(conn.cursor())
+    conn.commit()
+    assert counts(trend_series(conn, "form", form_id)) == incremental
+
+def test_deleting_a_form_drops_its_rollups(responses):
+    conn, add, form_id, _ = responses
+    add("Positive", MONDAY)
+    conn.execute("DELETE FROM feedback_forms WHERE id = ?", (form_id,))
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM sentiment_rollups").fetchone()[0] == 0
+
+def test_console_rows_are_backfilled_into_the_rollups(responses):
+    conn, add, form_id, _ = responses
+    # Written by an older Streamlit console: display-format submitted_at, no submitted_ts or college_code
+    conn.execute("INSERT INTO feedback_responses (form_id, student_id, feedback, sentiment, submitted_at) "
+                 "SELECT ?, MIN(id), 'x', 'Positive', '02 Mar 2026 09:30' FROM students", (form_id,))
+    conn.commit()
+    assert trend_series(conn, "form", form_id, college_code=COLLEGE) == []
+
+    db.init_db()
+    db._ready_shards.clear()
+    conn = db.get_connection(COLLEGE)
+    try:
+        assert tuple(conn.execute("SELECT submitted_ts, college_code FROM feedback_responses").fetchone()) == (MONDAY, COLLEGE)
+        assert counts(trend_series(conn, "form", form_id, college_code=COLLEGE)) == [("2026-03-02", 1, 0, 0, 1)]
+    finally:
+        conn.close()
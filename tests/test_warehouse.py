@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+pytest.importorskip("duckdb")
+pq = pytest.importorskip("pyarrow.parquet")
+
+import backlog
+import db
+import warehouse
+from conftest import COLLEGE, enrol, query, submit
+
+def test_write_parquet_writes_one_row_group_per_batch(tmp_path):
+    target = str(tmp_path / "users.parquet")
+    rows = ((i, "student", None, "AIFB001", f"2026-01-{i:02d}") for i in range(1, 8))
+    assert warehouse.write_parquet(rows, warehouse.USER_COLUMNS, target, {"shard": "main"}, batch_size=3) == 7
+
+    parquet = pq.ParquetFile(target)
+    assert parquet.metadata.num_row_groups == 3  # 3 + 3 + 1
+    table = parquet.read()
+    assert [str(t) for t in table.schema.types] == ["int64", "string", "string", "string", "string", "string"]
+    assert table.column("id").to_pylist() == list(range(1, 8))
+    assert set(table.column("shard").to_pylist()) == {"main"}
+    assert not os.path.exists(target + ".tmp")
+
+def test_write_parquet_keeps_the_schema_when_empty(tmp_path):
+    target = str(tmp_path / "responses.parquet")
+    assert warehouse.write_parquet([], warehouse.RESPONSE_COLUMNS, target) == 0
+    schema = pq.read_schema(target)
+    assert schema.names == list(warehouse.RESPONSE_COLUMNS)
+    assert str(schema.field("sentiment_confidence").type) == "double"
+
+@pytest.mark.parametrize("db_backend", ["sqlite", "postgres"], indirect=True)
+def test_refresh_exports_new_responses_incrementally(college, app_module, monkeypatch):
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    counts = warehouse.refresh()
+    assert counts["responses"] == 1 and counts["forms"] == 1
+    assert warehouse.refresh()["responses"] == 0
+
+    submit(enrol(app_module, college, "PRN002"), college["form_id"], "Labs were crowded.")
+    assert warehouse.refresh()["responses"] == 1
+    assert len(warehouse.response_parts(None)) == 2
+
+    # Too many parts are folded into one file
+    monkeypatch.setattr(warehouse, "MAX_PARTS", 1)
+    submit(enrol(app_module, college, "PRN003"), college["form_id"], "Good library.")
+    assert warehouse.refresh()["responses"] == 1
+    assert len(warehouse.response_parts(None)) == 1
+
+    con = warehouse.connect()
+    assert warehouse.overview(con)["total_feedback"] == 3
+    assert [r["responses"] for r in warehouse.college_breakdown(con)] == [3]
+    assert sum(r["total"] for r in warehouse.trend(con)) == 3
+    assert warehouse.top_forms(con, min_responses=1)[0]["responses"] == 3
+
+def test_deleted_responses_trigger_a_rebuild(college):
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    warehouse.refresh()
+    conn = db.get_connection(COLLEGE)
+    conn.execute("DELETE FROM feedback_responses")
+    conn.commit()
+    conn.close()
+    warehouse.refresh()
+    assert warehouse.overview(warehouse.connect())["total_feedback"] == 0
+
+def test_export_waits_for_deferred_sentiment_until_it_is_given_up(college, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "predict_sentiment_scored", lambda text: (None, None, None))
+    submit(college["student"], college["form_id"], "Clear lectures.")
+    assert warehouse.refresh()["responses"] == 0
+
+    def broken(texts):
+        raise RuntimeError("model crashed")
+    for _ in range(db.SENTIMENT_MAX_ATTEMPTS):
+        backlog.drain(broken, yield_to_live=False)
+    assert warehouse.refresh()["responses"] == 1
+    assert query("SELECT sentiment FROM feedback_responses") == [(None,)]
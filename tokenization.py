@@ -0,0 +1,72 @@
+# tokenization.py
+# One place to load BERT-family tokenizers. Loads prefer the Rust-backed "fast" tokenizer,
+# which produces the same input ids as the pure-Python BertTokenizer (checked by
+# tests/test_tokenization.py) at a fraction of the CPU cost, and batch encoding lets it
+# tokenize many texts in one call instead of one Python round trip per text.
+#
+#   TOKENIZER_FAST=0   fall back to the slow Python tokenizers (debugging only)
+#
+# Texts longer than MAX_LENGTH can be split into overlapping windows (encode_windows) instead
+# of being cut off after their opening lines.
+import os
+from functools import lru_cache
+
+MAX_LENGTH = 128
+BATCH_SIZE = int(os.environ.get("TOKENIZER_BATCH_SIZE", "512"))
+USE_FAST = os.environ.get("TOKENIZER_FAST", "1") == "1"
+DEFAULT_TOKENIZER = "bert-base-uncased"
+WINDOW_STRIDE = int(os.environ.get("TOKENIZER_WINDOW_STRIDE", "32"))
+MAX_WINDOWS = int(os.environ.get("TOKENIZER_MAX_WINDOWS", "16"))
+
+@lru_cache(maxsize=None)
+def load_tokenizer(name_or_path=DEFAULT_TOKENIZER, fallback=DEFAULT_TOKENIZER, use_fast=USE_FAST):
+    """Cached tokenizer for a model folder or hub name; `fallback` is tried if it cannot be loaded."""
+    from transformers import AutoTokenizer
+
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(name_or_path, use_fast=use_fast)
+    except (OSError, ValueError):
+        if not fallback or fallback == name_or_path:
+            raise
+        print(f"⚠️ Tokenizer not found at {name_or_path}, using {fallback}")
+        tokenizer = AutoTokenizer.from_pretrained(fallback, use_fast=use_fast)
+
+    if use_fast and not tokenizer.is_fast:
+        print(f"⚠️ No fast tokenizer available for {name_or_path}; tokenization will be slow")
+    return tokenizer
+
+def encode_batch(tokenizer, texts, max_length=MAX_LENGTH, padding=True, return_tensors=None):
+    """Tokenize a list of texts in one call (padding to the longest text in the list)."""
+    texts = ["" if t is None else str(t) for t in texts]
+    return tokenizer(texts, truncation=True, padding=padding, max_length=max_length, return_tensors=return_tensors)
+
+def encode_windows(tokenizer, texts, max_length=MAX_LENGTH, stride=WINDOW_STRIDE, max_windows=MAX_WINDOWS,
+                   return_tensors="pt"):
+    """Tokenize texts into max_length windows overlapping by `stride` tokens, in one call.
+
+    Returns (encoding, owners) where owners[i] is the index in `texts` of window i. A text that
+    fits in max_length gets exactly one window, identical to encode_batch; at most `max_windows`
+    windows are kept per text.
+    """
+    texts = ["" if t is None else str(t) for t in texts]
+    if not tokenizer.is_fast:
+        # Overflow windows need the Rust tokenizer; the slow one keeps truncating
+        return encode_batch(tokenizer, texts, max_length, return_tensors=return_tensors), list(range(len(texts)))
+
+    enc = tokenizer(texts, truncation=True, padding=True, max_length=max_length, stride=stride,
+                    return_overflowing_tokens=True, return_tensors=return_tensors)
+    owners = [int(o) for o in enc.pop("overflow_to_sample_mapping")]
+    keep, seen = [], {}
+    for i, owner in enumerate(owners):
+        seen[owner] = seen.get(owner, 0) + 1
+        if seen[owner] <= max_windows:
+            keep.append(i)
+    if len(keep) < len(owners):
+        enc = {key: value[keep] for key, value in enc.items()}
+        owners = [owners[i] for i in keep]
+    return enc, owners
+
+def iter_encoded_batches(tokenizer, texts, batch_size=BATCH_SIZE, max_length=MAX_LENGTH, return_tensors="pt"):
+    """Yield (start, encoding) per batch, for bulk scoring where the whole list should not be padded together."""
+    for start in range(0, len(texts), batch_size):
+        yield start, encode_batch(tokenizer, texts[start:start + batch_size], max_length, return_tensors=return_tensors)
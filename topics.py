@@ -0,0 +1,197 @@
+# topics.py
+# Offline topic tagging of feedback responses, meant to run from cron next to scheduler.py:
+#
+#   */30 * * * *  cd /srv/StudentFeedbackAnalysis && python topics.py --threads 2
+#
+# Each new response gets up to TOPIC_MAX_PER_RESPONSE tags from a fixed taxonomy, matched
+# by keyword and by embedding similarity to per-topic centroids (MiniLM, CPU). Tags land in
+# response_topics and are folded into per-form topic/sentiment counts in form_topics, which
+# the analytics page reads as-is. Progress is tracked per form in
+# feedback_forms.topics_last_response_id, so every run only touches responses it has not seen.
+import os
+import re
+import time
+import argparse
+
+from db import get_connection, init_db, list_shards, awaiting_sentiment
+
+BATCH_SIZE = int(os.environ.get("TOPIC_BATCH_SIZE", "256"))
+SIM_THRESHOLD = float(os.environ.get("TOPIC_SIM_THRESHOLD", "0.35"))
+MAX_PER_RESPONSE = int(os.environ.get("TOPIC_MAX_PER_RESPONSE", "3"))
+FALLBACK_TOPIC = "general"
+
+# Seed words per topic for the embedding centroids
+TOPICS = {
+    "faculty": ["teacher", "faculty", "professor", "lecture", "teaching", "explain", "mentor", "sir", "madam"],
+    "labs": ["lab", "laboratory", "practical", "equipment", "experiment", "software", "computer"],
+    "infrastructure": ["classroom", "building", "wifi", "internet", "projector", "fan", "bench", "furniture",
+                       "washroom", "toilet", "clean", "parking", "water"],
+    "placements": ["placement", "internship", "recruit", "company", "companies", "job", "interview", "career", "package"],
+    "curriculum": ["syllabus", "curriculum", "course", "subject", "assignment", "project", "timetable", "schedule"],
+    "exams": ["exam", "test", "marks", "grading", "result", "evaluation", "paper", "viva"],
+    "administration": ["office", "fee", "admin", "staff", "document", "scholarship", "certificate"],
+    "library": ["library", "book", "journal", "reading room"],
+    "campus_life": ["canteen", "food", "hostel", "sport", "event", "fest", "club", "transport", "bus"],
+}
+
+# Keyword matches are whole words with their inflections spelled out: a prefix match on short
+# stems tags "fantastic" as a fan, "example" as an exam and "feel" as a fee
+KEYWORDS = {
+    "faculty": ["teacher", "teachers", "faculty", "faculties", "professor", "professors", "prof", "lecture", "lectures",
+                "lecturer", "lecturers", "teaching", "taught", "explain", "explains", "explained", "explaining",
+                "explanation", "explanations", "mentor", "mentors", "mentoring", "mentorship", "sir", "madam", "maam"],
+    "labs": ["lab", "labs", "laboratory", "laboratories", "practical", "practicals", "equipment", "equipments",
+             "experiment", "experiments", "software", "softwares", "computer", "computers"],
+    "infrastructure": ["classroom", "classrooms", "building", "buildings", "wifi", "wi-fi", "internet", "projector",
+                       "projectors", "fan", "fans", "bench", "benches", "furniture", "washroom", "washrooms", "toilet",
+                       "toilets", "clean", "cleaning", "cleanliness", "unclean", "parking", "water"],
+    "placements": ["placement", "placements", "internship", "internships", "recruit", "recruits", "recruiter",
+                   "recruiters", "recruitment", "recruitments", "recruiting", "company", "companies", "job", "jobs",
+                   "interview", "interviews", "career", "careers", "package", "packages"],
+    "curriculum": ["syllabus", "syllabi", "curriculum", "curricula", "course", "courses", "coursework", "subject",
+                   "subjects", "assignment", "assignments", "project", "projects", "timetable", "timetables",
+                   "schedule", "schedules", "scheduled", "scheduling"],
+    "exams": ["exam", "exams", "examination", "examinations", "test", "tests", "marks", "grading", "grade", "grades",
+              "result", "results", "evaluation", "evaluations", "paper", "papers", "viva", "vivas"],
+    "administration": ["office", "offices", "fee", "fees", "admin", "administration", "administrative", "staff",
+                       "document", "documents", "documentation", "scholarship", "scholarships", "certificate",
+                       "certificates"],
+    "library": ["library", "libraries", "book", "books", "journal", "journals", "reading room", "reading rooms"],
+    "campus_life": ["canteen", "canteens", "food", "hostel", "hostels", "sport", "sports", "event", "events", "fest",
+                    "fests", "festival", "festivals", "club", "clubs", "transport", "transportation", "bus", "buses"],
+}
+
+_patterns = {topic: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in words) + r")\b", re.IGNORECASE)
+             for topic, words in KEYWORDS.items()}
+
+class TopicTagger:
+    def __init__(self, use_embeddings=True):
+        self.encoder = None
+        if use_embeddings:
+            # Same MiniLM the extractive summary backend uses, loaded once per process
+            from summary_backends import get_backend
+            self.encoder = get_backend("extractive")
+            torch = self.encoder.torch
+            seeds = [f"feedback about {topic.replace('_', ' ')}: {', '.join(words)}" for topic, words in TOPICS.items()]
+            self.names = list(TOPICS)
+            self.centroids = torch.nn.functional.normalize(self.encoder.embed(seeds), dim=1)
+
+    def tag(self, texts):
+        """One list of (topic, score) per text, best first."""
+        results = []
+        for text in texts:
+            results.append({topic: 1.0 for topic, pattern in _patterns.items() if pattern.search(text or "")})
+
+        if self.encoder is not None:
+            similarity = self.encoder.embed([t or "" for t in texts]) @ self.centroids.T
+            for scores, row in zip(results, similarity.tolist()):
+                for name, score in zip(self.names, row):
+                    if score >= SIM_THRESHOLD:
+                        scores[name] = max(scores.get(name, 0), round(score, 3))
+
+        return [sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:MAX_PER_RESPONSE] or [(FALLBACK_TOPIC, 0.0)]
+                for scores in results]
+
+def fetch_batch(conn, after_id, batch_size):
+    return conn.execute(f"""
+        SELECT r.id, r.form_id, r.feedback, r.sentiment
+        FROM feedback_responses r JOIN feedback_forms f ON f.id = r.form_id
+        WHERE r.id > ? AND r.id > COALESCE(f.topics_last_response_id, 0)
+          -- Hold a form back at its first response still waiting for a deferred sentiment
+          AND NOT EXISTS (SELECT 1 FROM feedback_responses p
+                          WHERE p.form_id = r.form_id AND {awaiting_sentiment("p")} AND p.id <= r.id)
+        ORDER BY r.id LIMIT ?
+    """, (after_id, batch_size)).fetchall()
+
+def store_batch(conn, rows, tags):
+    aggregates, watermarks, tag_rows = {}, {}, []
+    for row, topics in zip(rows, tags):
+        watermarks[row["form_id"]] = max(watermarks.get(row["form_id"], 0), row["id"])
+        sentiment = (row["sentiment"] or "").lower()
+        for topic, score in topics:
+            tag_rows.append((row["id"], row["form_id"], topic, score))
+            counts = aggregates.setdefault((row["form_id"], topic), [0, 0, 0, 0])
+            counts[0] += sentiment == "positive"
+            counts[1] += sentiment == "neutral"
+            counts[2] += sentiment == "negative"
+            counts[3] += 1
+
+    # Tags, aggregates and the per-form watermark move together, so a crash never double counts
+    conn.executemany("INSERT INTO response_topics (response_id, form_id, topic, score) VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT (response_id, topic) DO NOTHING", tag_rows)
+    conn.executemany("""
+        INSERT INTO form_topics (form_id, topic, positive, neutral, negative, total) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (form_id, topic) DO UPDATE SET
+            positive = form_topics.positive + excluded.positive, neutral = form_topics.neutral + excluded.neutral,
+            negative = form_topics.negative + excluded.negative, total = form_topics.total + excluded.total
+    """, [(form_id, topic, *counts) for (form_id, topic), counts in aggregates.items()])
+    conn.executemany("UPDATE feedback_forms SET topics_last_response_id = ? WHERE id = ? AND COALESCE(topics_last_response_id, 0) < ?",
+                     [(last_id, form_id, last_id) for form_id, last_id in watermarks.items()])
+    conn.commit()
+
+def rebuild_aggregates(conn):
+    # Recount form_topics from the stored tags (e.g. after responses were deleted)
+    conn.execute("DELETE FROM form_topics")
+    conn.execute("""
+        INSERT INTO form_topics (form_id, topic, positive, neutral, negative, total)
+        SELECT t.form_id, t.topic,
+               SUM(CASE WHEN r.sentiment = 'Positive' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.sentiment = 'Neutral' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.sentiment = 'Negative' THEN 1 ELSE 0 END),
+               COUNT(*)
+        FROM response_topics t JOIN feedback_responses r ON r.id = t.response_id
+        GROUP BY t.form_id, t.topic
+    """)
+    conn.commit()
+
+def reset(conn):
+    conn.execute("DELETE FROM response_topics")
+    conn.execute("DELETE FROM form_topics")
+    conn.execute("UPDATE feedback_forms SET topics_last_response_id = 0")
+    conn.commit()
+
+def run(batch_size=BATCH_SIZE, max_responses=None, use_embeddings=True, retag=False, rebuild=False):
+    tagger = None
+    processed = 0
+    for shard in list_shards():
+        conn = get_connection(shard)
+        if retag:
+            reset(conn)
+        if rebuild:
+            rebuild_aggregates(conn)
+
+        after_id = 0
+        while max_responses is None or processed < max_responses:
+            limit = batch_size if max_responses is None else min(batch_size, max_responses - processed)
+            rows = fetch_batch(conn, after_id, limit)
+            if not rows:
+                break
+            tagger = tagger or TopicTagger(use_embeddings)
+            start = time.perf_counter()
+            store_batch(conn, rows, tagger.tag([r["feedback"] for r in rows]))
+            after_id = rows[-1]["id"]
+            processed += len(rows)
+            print(f"✅ {shard or 'main'}: tagged {len(rows)} response(s) up to #{after_id} in {time.perf_counter() - start:.2f}s")
+        conn.close()
+
+    print(f"⚡ {processed} response(s) tagged")
+    return processed
+
+def main():
+    parser = argparse.ArgumentParser(description="Tag new feedback responses with topics and update per-form aggregates")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-responses", type=int, default=None)
+    parser.add_argument("--keywords-only", action="store_true", help="skip the embedding model")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("TOPIC_THREADS", "0")), help="torch CPU threads")
+    parser.add_argument("--retag", action="store_true", help="drop all tags and process every response again")
+    parser.add_argument("--rebuild", action="store_true", help="recount form_topics from stored tags")
+    args = parser.parse_args()
+
+    init_db()
+    if args.threads and not args.keywords_only:
+        import torch
+        torch.set_num_threads(args.threads)
+    run(args.batch_size, args.max_responses, not args.keywords_only, args.retag, args.rebuild)
+
+if __name__ == "__main__":
+    main()
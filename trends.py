@@ -0,0 +1,50 @@
+# trends.py
+# Sentiment time series served from the sentiment_rollups table (see db.rollup_trigger_sql).
+# Raw feedback_responses are never scanned: a year of daily points for a whole college is
+# a single indexed range read over at most (days x active forms) rollup rows.
+from datetime import datetime, timezone
+
+GRANULARITIES = {"hour": "hour", "day": "day", "week": "day"}
+SCOPES = ("college", "department", "teacher", "form")
+WEEK_OFFSET = 4 * 86400  # the epoch fell on a Thursday; weeks start on Monday
+
+def bucket_label(bucket, granularity):
+    # Buckets are wall-clock seconds, so format them as UTC to get the local time back
+    fmt = "%Y-%m-%d %H:00" if granularity == "hour" else "%Y-%m-%d"
+    return datetime.fromtimestamp(bucket, timezone.utc).strftime(fmt)
+
+def trend_series(conn, scope, scope_id, granularity="day", since_ts=0, college_code=None, teacher_id=None):
+    """Sentiment counts per bucket for one college, department, teacher or form."""
+    if scope not in SCOPES or granularity not in GRANULARITIES:
+        raise ValueError(f"unsupported trend {scope}/{granularity}")
+
+    bucket = f"bucket - (bucket - {WEEK_OFFSET}) % 604800" if granularity == "week" else "bucket"
+    where = ["granularity = ?", "bucket >= ?"]
+    params = [GRANULARITIES[granularity], since_ts]
+
+    if scope == "college":
+        college_code = college_code or scope_id
+    elif scope == "department":
+        where.append("teacher_id IN (SELECT id FROM teachers WHERE department = ? AND college_code = ?)")
+        params += [scope_id, college_code]
+    elif scope == "teacher":
+        where.append("teacher_id = ?")
+        params.append(scope_id)
+    else:
+        where.append("form_id = ?")
+        params.append(scope_id)
+    if college_code:
+        where.append("college_code = ?")
+        params.append(college_code)
+    if teacher_id:
+        where.append("teacher_id = ?")
+        params.append(teacher_id)
+
+    rows = conn.execute(f"""
+        SELECT {bucket} AS t, SUM(positive), SUM(neutral), SUM(negative), SUM(total)
+        FROM sentiment_rollups WHERE {" AND ".join(where)}
+        GROUP BY {bucket} ORDER BY t
+    """, params).fetchall()
+
+    return [{"t": r[0], "label": bucket_label(r[0], granularity), "positive": r[1],
+             "neutral": r[2], "negative": r[3], "total": r[4]} for r in rows if r[4]]
@@ -0,0 +1,288 @@
+# warehouse.py
+# Columnar snapshot of responses, forms and users for cross-college reporting. Parquet files
+# under ANALYTICS_DIR are queried in-process with DuckDB, so superadmin reports and other
+# heavy scans never touch the transactional databases. Refresh it from cron, e.g.
+#
+#   */15 * * * *  cd /srv/StudentFeedbackAnalysis && python warehouse.py
+#   0 3 * * 0     cd /srv/StudentFeedbackAnalysis && python warehouse.py --full
+#
+# Responses are exported incrementally per shard (rows after the last exported id, one new
+# part file per run); forms and users are small and rewritten whole. A shard whose exported
+# rows were deleted since (user/teacher removal cascades) is rebuilt automatically.
+import os
+import glob
+import json
+import time
+import argparse
+from itertools import islice
+
+from db import get_connection, list_shards, iter_rows, wallclock_ts, awaiting_sentiment
+from trends import bucket_label, WEEK_OFFSET
+
+ANALYTICS_DIR = os.environ.get("ANALYTICS_DIR", os.path.join("data", "warehouse"))
+STATE_FILE = "state.json"
+MAX_PARTS = int(os.environ.get("ANALYTICS_MAX_PARTS", "32"))  # per shard, before compaction
+BATCH_ROWS = 2000  # rows per fetch and per Parquet record batch
+
+# Explicit types keep every part file on the same schema, even when a batch is all NULL
+RESPONSE_COLUMNS = {"id": "BIGINT", "form_id": "VARCHAR", "student_id": "BIGINT", "college_code": "VARCHAR",
+                    "sentiment": "VARCHAR", "sentiment_confidence": "DOUBLE", "model_version": "VARCHAR",
+                    "submitted_ts": "BIGINT"}
+FORM_COLUMNS = {"id": "VARCHAR", "title": "VARCHAR", "college_code": "VARCHAR", "teacher_id": "BIGINT",
+                "created_at": "VARCHAR"}
+# No e-mail, password or OTP columns leave the OLTP database
+USER_COLUMNS = {"id": "BIGINT", "role": "VARCHAR", "status": "VARCHAR", "college_code": "VARCHAR",
+                "created_at": "VARCHAR"}
+ARROW_TYPES = {"BIGINT": "int64", "VARCHAR": "string", "DOUBLE": "float64"}
+
+def shard_name(shard):
+    return shard or "main"
+
+def path(*parts):
+    return os.path.join(ANALYTICS_DIR, *parts)
+
+def load_state():
+    try:
+        with open(path(STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"responses": {}, "refreshed_at": None}
+
+def save_state(state):
+    tmp = path(STATE_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path(STATE_FILE))
+
+# --- EXPORT ---
+def write_parquet(rows, columns, target, extra=None, batch_size=BATCH_ROWS):
+    """Write rows (iterable of tuples in `columns` order) to `target` atomically; returns the row count.
+
+    Rows are consumed and written one record batch at a time, so a shard of any size is
+    exported with at most `batch_size` rows in memory.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    extra = extra or {}
+    schema = pa.schema([(c, pa.type_for_alias(ARROW_TYPES[t])) for c, t in columns.items()]
+                       + [(name, pa.scalar(value).type) for name, value in extra.items()])
+    rows = iter(rows)
+    written = 0
+    tmp = target + ".tmp"
+    with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+        while True:
+            batch = [tuple(r) for r in islice(rows, batch_size)]
+            if not batch:
+                break
+            arrays = [pa.array([r[i] for r in batch], type=schema.field(i).type) for i in range(len(columns))]
+            arrays += [pa.array([value] * len(batch), type=schema.field(name).type) for name, value in extra.items()]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            written += len(batch)
+    os.replace(tmp, target)
+    return written
+
+def export_table(conn, table, columns, target, extra=None):
+    return write_parquet(iter_rows(conn, f"SELECT {', '.join(columns)} FROM {table}", batch_size=BATCH_ROWS),
+                         columns, target, extra)
+
+def response_parts(shard):
+    return sorted(glob.glob(path("responses", shard_name(shard), "*.parquet")))
+
+def export_responses(conn, shard, state, full=False):
+    name = shard_name(shard)
+    done = state["responses"].get(name, {"last_id": 0, "rows": 0})
+
+    # Deleted rows cannot be appended away: rebuild the shard when the exported range shrank
+    if not full and done["last_id"]:
+        live = conn.execute("SELECT COUNT(*) FROM feedback_responses WHERE id <= ?", (done["last_id"],)).fetchone()[0]
+        if live != done["rows"]:
+            print(f"⚠️ {name}: {done['rows'] - live} exported response(s) were deleted, rebuilding")
+            full = True
+    if full:
+        for part in response_parts(shard):
+            os.remove(part)
+        done = state["responses"][name] = {"last_id": 0, "rows": 0}
+
+    # Stop before the first response still waiting for its deferred sentiment (backlog.py)
+    upper = conn.execute(f"SELECT MIN(id) FROM feedback_responses WHERE {awaiting_sentiment()}").fetchone()[0]
+    high = conn.execute("SELECT MAX(id) FROM feedback_responses WHERE id < ?",
+                        (upper if upper is not None else 2 ** 62,)).fetchone()[0]
+    if not high or high <= done["last_id"]:
+        return 0
+
+    os.makedirs(path("responses", name), exist_ok=True)
+    target = path("responses", name, f"{done['last_id'] + 1:012d}-{high:012d}.parquet")
+    written = write_parquet(
+        iter_rows(conn, f"SELECT {', '.join(RESPONSE_COLUMNS)} FROM feedback_responses WHERE id > ? AND id <= ? ORDER BY id",
+                  (done["last_id"], high), BATCH_ROWS),
+        RESPONSE_COLUMNS, target, {"shard": name})
+    state["responses"][name] = {"last_id": high, "rows": done["rows"] + written}
+
+    if len(response_parts(shard)) > MAX_PARTS:
+        compact(shard)
+    return written
+
+def compact(shard):
+    # Many small incremental files make every scan open them all; fold them into one
+    import duckdb
+
+    parts = response_parts(shard)
+    first = os.path.basename(parts[0]).split("-")[0]
+    last = os.path.basename(parts[-1]).split("-")[1]
+    target = path("responses", shard_name(shard), f"{first}-{last}")
+    con = duckdb.connect()
+    con.execute(f"COPY (SELECT * FROM read_parquet({parts!r}) ORDER BY id) TO '{target}.tmp' (FORMAT PARQUET, COMPRESSION ZSTD)")
+    con.close()
+    os.replace(target + ".tmp", target)
+    for part in parts:
+        os.remove(part)
+
+def refresh(full=False):
+    """Bring the snapshot up to date; returns {"responses": new rows, "forms": rows, "users": rows}."""
+    os.makedirs(path("responses"), exist_ok=True)
+    os.makedirs(path("forms"), exist_ok=True)
+    state = load_state()
+    counts = {"responses": 0, "forms": 0, "users": 0}
+
+    conn = get_connection()
+    counts["users"] = export_table(conn, "users", USER_COLUMNS, path("users.parquet"))
+    conn.close()
+
+    shards = list_shards()
+    for shard in shards:
+        conn = get_connection(shard)
+        try:
+            counts["forms"] += export_table(conn, "feedback_forms", FORM_COLUMNS,
+                                            path("forms", f"{shard_name(shard)}.parquet"), {"shard": shard_name(shard)})
+            counts["responses"] += export_responses(conn, shard, state, full)
+        finally:
+            conn.close()
+
+    # Shards that no longer exist
+    live = {shard_name(s) for s in shards}
+    for stale in set(state["responses"]) - live:
+        for part in response_parts(stale):
+            os.remove(part)
+        state["responses"].pop(stale)
+    for form_file in glob.glob(path("forms", "*.parquet")):
+        if os.path.splitext(os.path.basename(form_file))[0] not in live:
+            os.remove(form_file)
+
+    state["refreshed_at"] = wallclock_ts()
+    save_state(state)
+    return counts
+
+# --- REPORTS ---
+def snapshot_time():
+    return load_state()["refreshed_at"]
+
+def connect():
+    """In-memory DuckDB with views over the snapshot files; None until the first refresh."""
+    import duckdb
+
+    if not snapshot_time():
+        return None
+    con = duckdb.connect()
+    responses = glob.glob(path("responses", "*", "*.parquet"))
+    if responses:
+        con.execute(f"CREATE VIEW responses AS SELECT * FROM read_parquet({responses!r}, union_by_name = true)")
+    else:
+        columns = ", ".join(f"NULL::{t} AS {c}" for c, t in RESPONSE_COLUMNS.items())
+        con.execute(f"CREATE VIEW responses AS SELECT {columns}, NULL::VARCHAR AS shard WHERE false")
+    con.execute(f"CREATE VIEW forms AS SELECT * FROM read_parquet({glob.glob(path('forms', '*.parquet'))!r}, union_by_name = true)")
+    con.execute(f"CREATE VIEW users AS SELECT * FROM read_parquet('{path('users.parquet')}')")
+    return con
+
+def query(con, sql, params=()):
+    cur = con.execute(sql, list(params))
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+def overview(con):
+    row = query(con, """
+        SELECT (SELECT COUNT(DISTINCT college_code) FROM users WHERE college_code != 'GLOBAL') AS total_colleges,
+               (SELECT COUNT(*) FROM users) AS total_users,
+               (SELECT COUNT(*) FROM responses) AS total_feedback
+    """)[0]
+    row["snapshot_at"] = snapshot_time()
+    return row
+
+def college_breakdown(con, since_ts=0):
+    return query(con, """
+        WITH r AS (SELECT * FROM responses WHERE submitted_ts >= ?),
+        people AS (
+            SELECT college_code, COUNT(*) FILTER (WHERE role = 'student') AS students,
+                   COUNT(*) FILTER (WHERE role = 'teacher') AS teachers
+            FROM users GROUP BY college_code
+        )
+        SELECT c.college_code,
+               COALESCE(p.students, 0) AS students, COALESCE(p.teachers, 0) AS teachers,
+               (SELECT COUNT(*) FROM forms f WHERE f.college_code = c.college_code) AS forms,
+               COUNT(r.id) AS responses,
+               COUNT(*) FILTER (WHERE r.sentiment = 'Positive') AS positive,
+               COUNT(*) FILTER (WHERE r.sentiment = 'Neutral') AS neutral,
+               COUNT(*) FILTER (WHERE r.sentiment = 'Negative') AS negative,
+               ROUND(AVG(r.sentiment_confidence), 4) AS avg_confidence
+        FROM (SELECT DISTINCT college_code FROM users WHERE college_code != 'GLOBAL') c
+        LEFT JOIN people p ON p.college_code = c.college_code
+        LEFT JOIN r ON r.college_code = c.college_code
+        GROUP BY c.college_code, p.students, p.teachers
+        ORDER BY responses DESC, c.college_code
+    """, (since_ts,))
+
+def trend(con, granularity="day", since_ts=0, college_code=None):
+    # Same bucket arithmetic and output shape as trends.trend_series
+    buckets = {
+        "day": "submitted_ts - submitted_ts % 86400",
+        "week": f"submitted_ts - (submitted_ts - {WEEK_OFFSET}) % 604800",
+        "month": "CAST(epoch(date_trunc('month', make_timestamp(submitted_ts * 1000000))) AS BIGINT)",
+    }
+    if granularity not in buckets:
+        raise ValueError(f"unsupported granularity {granularity}")
+    rows = query(con, f"""
+        SELECT {buckets[granularity]} AS t,
+               COUNT(*) FILTER (WHERE sentiment = 'Positive') AS positive,
+               COUNT(*) FILTER (WHERE sentiment = 'Neutral') AS neutral,
+               COUNT(*) FILTER (WHERE sentiment = 'Negative') AS negative,
+               COUNT(*) AS total
+        FROM responses WHERE submitted_ts >= ? AND (? IS NULL OR college_code = ?)
+        GROUP BY t ORDER BY t
+    """, (since_ts, college_code, college_code))
+    for row in rows:
+        row["label"] = bucket_label(row["t"], "day")[:7 if granularity == "month" else 10]
+    return rows
+
+TOP_FORM_ORDERS = {
+    "responses": "responses DESC",
+    "negative": "negative_share DESC, responses DESC",
+    "positive": "positive_share DESC, responses DESC",
+}
+
+def top_forms(con, limit=10, order="responses", college_code=None, min_responses=5):
+    if order not in TOP_FORM_ORDERS:
+        raise ValueError(f"unsupported order {order}")
+    return query(con, f"""
+        SELECT f.id AS form_id, f.title, f.college_code, COUNT(*) AS responses,
+               ROUND(AVG(CASE WHEN r.sentiment = 'Positive' THEN 1.0 ELSE 0 END), 4) AS positive_share,
+               ROUND(AVG(CASE WHEN r.sentiment = 'Negative' THEN 1.0 ELSE 0 END), 4) AS negative_share
+        FROM responses r JOIN forms f ON f.id = r.form_id AND f.shard = r.shard
+        WHERE (? IS NULL OR f.college_code = ?)
+        GROUP BY f.id, f.title, f.college_code
+        HAVING COUNT(*) >= ?
+        ORDER BY {TOP_FORM_ORDERS[order]}
+        LIMIT ?
+    """, (college_code, college_code, min_responses, limit))
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the columnar analytics snapshot")
+    parser.add_argument("--full", action="store_true", help="re-export every response instead of only new ones")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = refresh(full=args.full)
+    print(f"✅ Snapshot refreshed in {time.perf_counter() - start:.1f}s: {counts['responses']} new response(s), "
+          f"{counts['forms']} form(s), {counts['users']} user(s) -> {ANALYTICS_DIR}")
+
+if __name__ == "__main__":
+    main()